@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+"""Measures how the TeX output of pgfplot scales with the number of rows.
+
+Usage:
+    python benchmarks/bench_pgfplot.py [--sizes 1000 10000 100000 1000000]
+"""
+from pathlib import Path
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from synthetic import generate_chips
+from src.pgfplot import pgfplot
+from src.preprocess import preprocess_data
+from src.regression import calulate_regression_lines
+from src.settings import PltSettings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**3, 10**4, 10**5, 10**6])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'time (s)':>10} {'peak (MB)':>10} {'size (MB)':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            # No level-of-detail decimation (lod_threshold): measure the writer itself.
+            settings = PltSettings(
+                dc_chips_path=None,
+                output_name=os.path.join(tmp, f"bench_{n}.png"),
+                raw_data_col=["fp32_peak_compute_Gflops", "mem_bw_GBs"],
+                marker=["o", "D"],
+                y_col=["norm_fp32_peak_compute_Gflops", "norm_mem_bw_GBs"],
+                y_label=["FP32 Peak Compute (GFLOPS)", "Memory Bandwidth (GB/s)"],
+                marker_color=["royalblue", "mediumseagreen"],
+                ylim=(0.5, 5e4),
+                mem_bw_label_type="mem_type",
+                lod_threshold=None,
+            )
+            df = preprocess_data(generate_chips(n), settings)
+            regression_lines = calulate_regression_lines(df, settings)
+
+            start = time.perf_counter()
+            pgfplot(df, regression_lines, settings)
+            seconds = time.perf_counter() - start
+
+            # Second run for the memory measurement, tracemalloc distorts the timing.
+            tracemalloc.start()
+            pgfplot(df, regression_lines, settings)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            size = os.path.getsize(settings.get_tex_name())
+            print(f"{n:>10} {seconds:>10.3f} {peak / 2**20:>10.1f} {size / 2**20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
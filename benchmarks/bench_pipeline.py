@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+"""Times the stages of the figure pipeline on synthetic chip tables.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--sizes 100 1000 ...] [--stages load tex ...]
+        [--save-baseline FILE] [--baseline FILE --threshold 0.25]
+
+With --baseline, the script exits with status 1 if any stage is slower than
+the baseline by more than the threshold (relative) and min-delta (absolute).
+"""
+from dataclasses import replace
+from pathlib import Path
+from typing import Callable
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from synthetic import write_chips_csv
+from src.dataset import ChipDataset
+from src.pgfplot import pgfplot
+from src.plot import plot
+from src.preprocess import preprocess_data
+from src.regression import calulate_regression_lines
+from src.settings import PltSettings
+
+STAGES = ["load", "preprocess", "regression", "plot", "tex"]
+
+
+def _best_of(repeat: int, setup: Callable, func: Callable) -> float:
+    """Returns the fastest of repeat runs of func(setup())."""
+    times = []
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def bench_size(n: int, stages: list[str], repeat: int, tmp: str) -> dict[str, float]:
+    """Times the selected stages on a synthetic table with n rows."""
+    csv = Path(tmp) / f"chips_{n}.csv"
+    write_chips_csv(csv, n)
+    settings = PltSettings(
+        dc_chips_path=csv,
+        output_name=os.path.join(tmp, f"bench_{n}.png"),
+        raw_data_col=["ai_dtype_peak_compute_Gflops", "mem_bw_GBs"],
+        marker=["v", "D"],
+        y_col=["norm_ai_dtype_peak_compute_Gflops", "norm_mem_bw_GBs"],
+        y_label=["Peak Compute (GFLOPS)", "Memory Bandwidth (GB/s)"],
+        marker_color=["mediumpurple", "mediumseagreen"],
+        ylim=(0.5, 5e4),
+        mem_bw_label_type="mem_type",
+    )
+
+    def _drop_sidecar() -> None:
+        Path(ChipDataset(csv).sidecar_path).unlink()
+
+    # Unsorted frame without parsed dates, like a plain pd.read_csv.
+    raw = ChipDataset(csv).df.drop(columns="date_pd").sample(frac=1.0, random_state=0)
+    df = preprocess_data(raw.copy(), settings)
+    regression_lines = calulate_regression_lines(df.copy(), settings)
+
+    # yapf: disable
+    runs = {
+        "load": (_drop_sidecar, lambda _: ChipDataset(csv)),
+        "preprocess": (lambda: raw.copy(), lambda d: preprocess_data(d, settings)),
+        "regression": (lambda: df.copy(), lambda d: calulate_regression_lines(d, settings)),
+        "plot": (lambda: df, lambda d: plot(d, regression_lines, settings)),
+        "tex": (lambda: df, lambda d: pgfplot(d, regression_lines, settings)),
+    }
+    # yapf: enable
+    return {stage: _best_of(repeat, *runs[stage]) for stage in stages}
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta: float) -> list[str]:
+    """Returns a message for every stage and size that is slower than the baseline."""
+    regressions = []
+    for stage, sizes in results.items():
+        for n, seconds in sizes.items():
+            base = baseline.get(stage, {}).get(n)
+            if base is None:
+                continue
+            if seconds > base * (1 + threshold) and seconds - base > min_delta:
+                regressions.append(
+                    f"{stage} @ {n} rows: {seconds:.4f}s vs. baseline {base:.4f}s "
+                    f"(+{(seconds / base - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**k for k in range(2, 7)])
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per measurement (best is used)."
+    )
+    parser.add_argument("--save-baseline", type=Path, help="Write the results to this file.")
+    parser.add_argument("--baseline", type=Path, help="Compare the results with this file.")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="Allowed relative slowdown (default: 0.25)."
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=0.005,
+        help="Slowdowns below this many seconds are ignored (default: 0.005)."
+    )
+    args = parser.parse_args()
+
+    results = {stage: {} for stage in args.stages}
+    print(f"{'rows':>10} " + " ".join(f"{stage + ' (s)':>16}" for stage in args.stages))
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            times = bench_size(n, args.stages, args.repeat, tmp)
+            for stage, seconds in times.items():
+                results[stage][str(n)] = seconds
+            print(f"{n:>10} " + " ".join(f"{times[stage]:>16.4f}" for stage in args.stages))
+
+    if args.save_baseline is not None:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"python": platform.python_version(), "results": results}, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        if regressions:
+            print("\nPERFORMANCE REGRESSION", file=sys.stderr)
+            for r in regressions:
+                print(f"  {r}", file=sys.stderr)
+            return 1
+        print("\nNo performance regression compared to the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+"""Compares the TeX-only build on a DataFrame with the build on a ChipStore.
+
+Usage:
+    python benchmarks/bench_store.py [--sizes 10000 100000 1000000]
+
+For every size the table memory, the time of preprocess, regression and tex and the peak
+memory allocated during the build are printed for both paths. The .tex files are checked
+to be identical.
+"""
+from pathlib import Path
+from typing import Callable
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from synthetic import write_chips_csv
+from src.dataset import ChipDataset
+from src.pgfplot import pgfplot
+from src.preprocess import preprocess_data
+from src.regression import calulate_regression_lines
+from src.settings import PltSettings
+from src.store import ChipStore
+
+
+def _build(table, settings: PltSettings) -> None:
+    df = preprocess_data(table, settings)
+    pgfplot(df, calulate_regression_lines(df, settings), settings)
+
+
+def _measure(func: Callable, repeat: int) -> tuple[float, float]:
+    """Returns the best time of repeat runs and the peak traced memory of one run (MB)."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    # Separate run, tracemalloc distorts the timing.
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times), peak / 2**20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**4, 10**5, 10**6])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'rows':>10} {'path':>10} {'table (MB)':>11} {'build (s)':>10} {'peak (MB)':>10} "
+        f"{'same':>5}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            csv = Path(tmp) / f"chips_{n}.csv"
+            write_chips_csv(csv, n)
+            df = ChipDataset(csv).df
+            store = ChipStore.from_frame(df)
+
+            outputs = []
+            for path, table, size in (
+                ("DataFrame", lambda: df.copy(deep=False), df.memory_usage(deep=True).sum()),
+                ("ChipStore", lambda: store, store.nbytes),
+            ):
+                settings = PltSettings(
+                    dc_chips_path=csv,
+                    output_name=os.path.join(tmp, f"bench_{n}.png"),
+                    raw_data_col=["fp32_peak_compute_Gflops", "mem_bw_GBs"],
+                    marker=["o", "D"],
+                    y_col=["norm_fp32_peak_compute_Gflops", "norm_mem_bw_GBs"],
+                    y_label=["FP32 Peak Compute (GFLOPS)", "Memory Bandwidth (GB/s)"],
+                    marker_color=["royalblue", "mediumseagreen"],
+                    ylim=(0.5, 5e4),
+                    mem_bw_label_type="mem_type",
+                    backends=("tex", ),
+                )
+                seconds, peak = _measure(lambda: _build(table(), settings), args.repeat)
+                with open(settings.get_tex_name()) as f:
+                    outputs.append(f.read())
+                same = "yes" if outputs[0] == outputs[-1] else "NO"
+                print(
+                    f"{n:>10} {path:>10} {size / 2**20:>11.1f} {seconds:>10.3f} {peak:>10.1f} "
+                    f"{same:>5}"
+                )
+
+
+if __name__ == "__main__":
+    main()
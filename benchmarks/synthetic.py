@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+"""Generates synthetic chip tables with the columns of data/datacenter_chips.csv.
+
+Usage:
+    python benchmarks/synthetic.py ROWS OUTPUT.csv [--seed SEED]
+"""
+from pathlib import Path
+import argparse
+import numpy as np
+import pandas as pd
+
+VENDORS = ["NVIDIA", "AMD", "Google", "Intel"]
+MEM_TYPES = ["GDDR3", "GDDR5", "GDDR6", "HBM2", "HBM2e", "HBM3", "HBM3e"]
+DTYPES = ["FP32", "FP16", "BF16", "FP8", "FP4"]
+
+
+def generate_chips(n: int, seed: int = 0, label_fraction: float = 0.01) -> pd.DataFrame:
+    """Creates a chip table with n rows in file order (not sorted by date).
+    Compute grows faster than memory bandwidth, both with log-normal noise.
+    About 5% of the compute and bandwidth values are missing and label positions
+    are only set for label_fraction of the rows.
+
+    Args:
+        n (int): Number of chips.
+        seed (int): Seed of the random number generator.
+        label_fraction (float): Fraction of the rows with a label position.
+
+    Returns:
+        pd.DataFrame: Table with the same columns as data/datacenter_chips.csv.
+    """
+    rng = np.random.default_rng(seed)
+
+    date_num = rng.uniform(2007.0, 2026.0, n).round(2)
+    year = np.floor(date_num).astype(int)
+    day = np.minimum((date_num - year) * 365, 364).astype(int)
+    date_pd = pd.to_datetime(year.astype(str), format="%Y") + pd.to_timedelta(day, unit="D")
+
+    age = date_num - 2007
+    fp32 = 10**(2.5 + 0.11 * age + rng.normal(0, 0.15, n))
+    ai_dtype = fp32 * np.where(age > 10, 10**(0.12 * (age - 10) + rng.normal(0, 0.2, n)), 1.0)
+    mem_bw = 10**(1.9 + 0.07 * age + rng.normal(0, 0.12, n))
+
+    def _gaps(values: np.ndarray, fraction: float = 0.05) -> np.ndarray:
+        values = values.round(1)
+        missing = rng.random(n) < fraction
+        # The oldest chips are the normalization baseline and must have all values.
+        missing[date_num == date_num.min()] = False
+        values[missing] = np.nan
+        return values
+
+    def _labels() -> np.ndarray:
+        labels = np.where(rng.random(n) < 0.5, "t", "b").astype(object)
+        labels[rng.random(n) >= label_fraction] = None
+        return labels
+
+    names = np.char.add("C", np.arange(n).astype(str))
+    return pd.DataFrame(
+        {
+            "full_name": np.char.add("Chip ", names),
+            "name": names,
+            "date_de": date_pd.strftime("%d.%m.%Y"),
+            "date_num": date_num,
+            "mem_type": rng.choice(MEM_TYPES, n),
+            "mem_type_labels": _labels(),
+            "mem_bw_GBs": _gaps(mem_bw),
+            "mem_bw_GBs_labels": _labels(),
+            "fp32_peak_compute_Gflops": _gaps(fp32),
+            "fp32_peak_compute_Gflops_labels": _labels(),
+            "ai_dtype_peak_compute_Gflops": _gaps(ai_dtype),
+            "ai_dtype_peak_compute_Gflops_labels": _labels(),
+            "dtype": np.where(age > 10, rng.choice(DTYPES, n), "FP32"),
+            "wikipedia": "https://en.wikipedia.org/wiki/Chip",
+            "techpowerup": "https://www.techpowerup.com/gpu-specs/",
+            "vendor": rng.choice(VENDORS, n),
+        }
+    )
+
+
+def write_chips_csv(path: Path, n: int, seed: int = 0) -> None:
+    """Writes a synthetic chip table in the format of data/datacenter_chips.csv."""
+    generate_chips(n, seed).to_csv(path, sep=",", index=False, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("rows", type=int)
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_chips_csv(args.output, args.rows, args.seed)
@@ -0,0 +1,71 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+# Definitions of all figures that are generated by main.py.
+# In watch mode (python main.py --watch) this file is reloaded after every change.
+from pathlib import Path
+from dataclasses import replace
+
+from src.matrix import FigureMatrix
+from src.settings import PltSettings
+
+base = PltSettings(
+    dc_chips_path=Path("data/datacenter_chips.csv"),
+    output_name="memory_wall_problem.png",
+    raw_data_col=[],
+    marker=[],
+    y_col=[],
+    y_label=[],
+    marker_color=[],
+    label_fontsize=14,
+    tick_fontsize=12,
+    title_fontsize=14,
+    legend_fontsize=14,
+    annotation_fontsize=10,
+    ylim=(5 * 10e-2, 5.0 * 10e3),
+    text_offsets=0.1,
+    mem_bw_label_type="mem_type"
+)
+
+configs = [
+    replace(
+        base,
+        output_name="memory_wall_problem_fp32.png",
+        raw_data_col=["fp32_peak_compute_Gflops", "mem_bw_GBs"],
+        marker=["o", "D"],
+        y_col=["norm_fp32_peak_compute_Gflops", "norm_mem_bw_GBs"],
+        y_label=["FP32 Peak Compute (GFLOPS)", "Memory Bandwidth (GB/s)"],
+        marker_color=["royalblue", "mediumseagreen"],
+        title="Development of Peak Compute (only FP32) vs. Memory Bandwidth"
+    ),
+    replace(
+        base,
+        output_name="memory_wall_problem.png",
+        raw_data_col=["ai_dtype_peak_compute_Gflops", "mem_bw_GBs"],
+        marker=["v", "D"],
+        y_col=["norm_ai_dtype_peak_compute_Gflops", "norm_mem_bw_GBs"],
+        y_label=["Peak Compute (GFLOPS)", "Memory Bandwidth (GB/s)"],
+        marker_color=["mediumpurple", "mediumseagreen"],
+        title="Development of Peak Compute vs. Memory Bandwidth"
+    )
+]
+
+# Figure matrices expand into one figure per combination of their axes, e.g.
+#
+# matrices = [
+#     FigureMatrix(
+#         base=replace(base, output_name="matrix/memory_wall.png"),
+#         metrics={
+#             "fp32": dict(raw_data_col=["fp32_peak_compute_Gflops", "mem_bw_GBs"], ...),
+#             "ai": dict(raw_data_col=["ai_dtype_peak_compute_Gflops", "mem_bw_GBs"], ...),
+#             # Derived metrics (src/metrics.py) are used like CSV columns.
+#             "ridge": dict(raw_data_col=["ridge_point_flops_per_byte"], ...),
+#         },
+#         vendors={"all": None, "nvidia": ("NVIDIA", ), "amd": ("AMD", )},
+#         date_ranges={"all": None, "2015-2026": (2015, 2026)},
+#     )
+# ]
+matrices: list[FigureMatrix] = []
@@ -4,66 +4,411 @@
 # This work is licensed under the terms described in the LICENSE file        #
 # found in the root directory of this source tree.                           #
 ##############################################################################
-import pandas as pd
+import argparse
+import importlib
+import sys
 from pathlib import Path
 from dataclasses import replace
+from functools import partial
 
-from src.regression import *
-from src.settings import *
-from src.preprocess import *
-from src.plot import plot
-from src.pgfplot import pgfplot
+# Only lightweight modules are imported at startup.
+# pandas and matplotlib are imported in run_plot when a figure is actually rendered.
+from src.settings import PltSettings
+from src.build import build
+from src.cache import BuildCache
+from src.matrix import finish, schedule
+from src.profiling import print_summary, stage, write_report
+from src.watch import watch
 
 
-def run_plot(settings: PltSettings) -> None:
-    df = pd.read_csv(settings.dc_chips_path, sep=",", header=0, decimal=".", encoding="utf-8")
-    df = preprocess_data(df, settings)
-    regression_lines = calulate_regression_lines(df, settings)
-    plot(df, regression_lines, settings)
-    pgfplot(df, regression_lines, settings)
+def render_figure(source, settings: PltSettings) -> None:
+    """Renders a figure with one panel (regression lines, labels, outputs)."""
+    from src import precompute
 
+    # Row selections, normalized columns and regression lines are shared between figures.
+    with stage("preprocess"):
+        rows, df = precompute.preprocess(source, settings)
+    with stage("regression"):
+        regression_lines = precompute.regression_lines(source, rows, df, settings)
+    if settings.label_placement == "auto":
+        # Both outputs read the same computed positions.
+        with stage("labels"):
+            from src.labels import place_labels
+            df = place_labels(df, settings)
+    if "png" in settings.backends:
+        with stage("plot"):
+            from src.plot import plot
+            plot(df, regression_lines, settings)
+    if "tex" in settings.backends:
+        with stage("tex"):
+            from src.pgfplot import pgfplot
+            pgfplot(df, regression_lines, settings)
 
-if __name__ == "__main__":
-    base = PltSettings(
-        dc_chips_path=Path("data/datacenter_chips.csv"),
-        output_name="memory_wall_problem.png",
-        raw_data_col=[],
-        marker=[],
-        y_col=[],
-        y_label=[],
-        marker_color=[],
-        label_fontsize=14,
-        tick_fontsize=12,
-        title_fontsize=14,
-        legend_fontsize=14,
-        annotation_fontsize=10,
-        ylim=(5 * 10e-2, 5.0 * 10e3),
-        text_offsets=0.1,
-        mem_bw_label_type="mem_type"
-    )
-
-    configs = [
-        replace(
-            base,
-            output_name="memory_wall_problem_fp32.png",
-            raw_data_col=["fp32_peak_compute_Gflops", "mem_bw_GBs"],
-            marker=["o", "D"],
-            y_col=["norm_fp32_peak_compute_Gflops", "norm_mem_bw_GBs"],
-            y_label=["FP32 Peak Compute (GFLOPS)", "Memory Bandwidth (GB/s)"],
-            marker_color=["royalblue", "mediumseagreen"],
-            title="Development of Peak Compute (only FP32) vs. Memory Bandwidth"
-        ),
+
+def render_facets(source, settings: PltSettings) -> None:
+    """Renders a figure with one panel per value of the facet column (small multiples)."""
+    from src import precompute
+
+    with stage("preprocess"):
+        rows, df = precompute.preprocess(source, settings)
+    with stage("regression"):
+        panels = precompute.facet_panels(source, rows, df, settings)
+    if "png" in settings.backends:
+        with stage("plot"):
+            from src.plot import plot_facets
+            plot_facets(panels, settings)
+    if "tex" in settings.backends:
+        with stage("tex"):
+            from src.pgfplot import pgfplot_facets
+            pgfplot_facets(df, panels, settings)
+
+
+def render_tex(store, settings: PltSettings) -> None:
+    """Renders the pgfplots output of a figure from a ChipStore (see src/store.py)."""
+    from src.pgfplot import pgfplot
+    from src.preprocess import preprocess_data
+    from src.regression import calulate_regression_lines
+
+    with stage("preprocess"):
+        table = preprocess_data(store, settings)
+    with stage("regression"):
+        regression_lines = calulate_regression_lines(table, settings)
+    with stage("tex"):
+        pgfplot(table, regression_lines, settings)
+
+
+def run_plot(settings: PltSettings, cache: BuildCache = None) -> str:
+    # Output names may contain directories (e.g. the figures of a matrix).
+    Path(settings.output_name).parent.mkdir(parents=True, exist_ok=True)
+    if cache is not None:
+        with stage("cache"):
+            key = cache.key(settings)
+            if cache.restore(key, settings):
+                return "cached"
+
+    with stage("import"):
+        from src.dataset import is_loaded, load_dataset, load_store
+
+    # TeX only: the figure is computed on the NumPy arrays of the columnar chip store, which
+    # replaces the DataFrame in memory (unless the frame is loaded anyway, e.g. by the service).
+    tex_only = (
+        settings.facet_col is None and settings.backends == ("tex", )
+        and settings.label_placement == "manual" and not is_loaded(settings.dc_chips_path)
+    )
+    with stage("load"):
+        if tex_only:
+            store = load_store(settings.dc_chips_path, settings.csv_engine)
+        else:
+            source = load_dataset(settings.dc_chips_path, settings.csv_engine).df
+    if tex_only:
+        render_tex(store, settings)
+    elif settings.facet_col is not None:
+        render_facets(source, settings)
+    else:
+        render_figure(source, settings)
+
+    if cache is not None:
+        with stage("cache"):
+            cache.store(key, settings)
+    return "ok"
+
+
+def run_animation(settings: PltSettings, fmt: str) -> str:
+    Path(settings.output_name).parent.mkdir(parents=True, exist_ok=True)
+    with stage("import"):
+        from src.dataset import load_dataset
+        from src import precompute
+        from src.animate import animate
+
+    with stage("load"):
+        source = load_dataset(settings.dc_chips_path, settings.csv_engine).df
+    with stage("preprocess"):
+        _, df = precompute.preprocess(source, settings)
+    if settings.label_placement == "auto":
+        # The same positions as in the figure.
+        with stage("labels"):
+            from src.labels import place_labels
+            df = place_labels(df, settings)
+    with stage("animate"):
+        animate(df, settings, fmt)
+    return "ok"
+
+
+def animation_files(settings: PltSettings, fmt: str) -> list[str]:
+    """Returns the file (or the directory of frames) written by run_animation."""
+    return [settings.get_animation_name(fmt)]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate the memory-wall figures.")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes used to render the figures (default: 1)."
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Re-render all figures even if they are cached."
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Neither read nor write the build cache."
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=100,
+        help="Size limit of the build cache in MB (default: 100)."
+    )
+    parser.add_argument(
+        "--only",
+        choices=["png", "tex"],
+        help="Render only the matplotlib figures (png) or only the pgfplots code (tex). "
+        "matplotlib is not imported for --only tex."
+    )
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        metavar="FORMAT",
+        help="Save the matplotlib figures in these formats (e.g. png pdf svg). "
+        "Every figure is built once and saved to all formats (default: from configs.py)."
+    )
+    parser.add_argument(
+        "--dpi",
+        type=int,
+        nargs="+",
+        help="Resolutions of the raster formats. Several resolutions add '_<dpi>dpi' "
+        "to the file names (default: from configs.py)."
+    )
+    parser.add_argument(
+        "--animate",
+        choices=["gif", "mp4", "png"],
+        help="Render an animation per figure instead of the figures: the chips appear year by "
+        "year and the regression lines are refitted. png writes one file per frame, "
+        "mp4 requires ffmpeg."
+    )
+    parser.add_argument(
+        "--labels",
+        choices=["manual", "auto"],
+        help="Label placement: curated positions of the '*_labels' columns (manual) or "
+        "non-overlapping positions for all chips (auto, default: from configs.py)."
+    )
+    parser.add_argument(
+        "--facet",
+        metavar="COLUMN",
+        help="Split every figure into panels with shared axes, one per value of COLUMN "
+        "(e.g. vendor or dtype), rendered as one figure and one pgfplots groupplot."
+    )
+    parser.add_argument(
+        "--window",
+        type=float,
+        nargs=2,
+        metavar=("START", "END"),
+        help="Only plot the chips released in the years START to END (inclusive)."
+    )
+    parser.add_argument(
+        "--as-of",
+        type=float,
+        metavar="YEAR",
+        help="Only plot the chips released up to and including YEAR (retrospective figures)."
+    )
+    parser.add_argument(
+        "--baseline",
+        metavar="CHIP",
+        help="Normalize the columns to the chip named CHIP instead of the first plotted chip, "
+        "so figures of different windows share the baseline."
+    )
+    parser.add_argument(
+        "--bootstrap",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Add bootstrap confidence intervals (N resamples) to the regression lines."
+    )
+    parser.add_argument(
+        "--seed", type=int, help="Seed of the bootstrap resampling (default: from configs.py)."
+    )
+    parser.add_argument(
+        "--csv-engine",
+        choices=["c", "pyarrow"],
+        help="pandas parser engine of the chip table (pyarrow requires the pyarrow package)."
+    )
+    parser.add_argument(
+        "--regression",
+        choices=["ols", "theil_sen", "huber", "segmented"],
+        help="Estimator of the regression lines. theil_sen and huber are robust against "
+        "outliers, segmented fits a piecewise line (default: from configs.py)."
+    )
+    parser.add_argument(
+        "--segments",
+        type=int,
+        help="Number of segments of the piecewise regression (default: from configs.py)."
+    )
+    parser.add_argument(
+        "--pgf-external-data",
+        action="store_true",
+        default=None,
+        help="Write the pgfplots data and regression samples to '.dat' files."
+    )
+    parser.add_argument(
+        "--pgf-precision",
+        type=int,
+        help="Significant digits of the values in the pgfplots output (default: from configs.py)."
+    )
+    parser.add_argument(
+        "--pgf-externalize",
+        action="store_true",
+        default=None,
+        help="Prepare the pgfplots output for the TikZ 'external' library."
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="profile.json",
+        metavar="REPORT",
+        help="Record time and peak memory per stage and figure and write them to REPORT "
+        "(default: profile.json)."
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="STAGE",
+        help="Additionally profile one stage (e.g. 'plot/savefig') with cProfile. "
+        "Requires --profile."
+    )
+    parser.add_argument(
+        "--manifest",
+        nargs="?",
+        const="manifest.json",
+        metavar="PATH",
+        help="Write the SHA-256 hashes of all artifacts to PATH (default: manifest.json) and "
+        "report the artifacts that changed since the previous manifest."
+    )
+    parser.add_argument(
+        "--publish",
+        metavar="DIR",
+        help="Copy only the new and changed artifacts to DIR (e.g. a checkout of gh-pages), "
+        "delete artifacts that are no longer built and store the manifest in DIR."
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and re-render the figures affected by changes of the CSV data "
+        "or configs.py."
+    )
+    parser.add_argument(
+        "--serve",
+        nargs="?",
+        type=int,
+        const=8000,
+        metavar="PORT",
+        help="Serve figures on http://127.0.0.1:PORT/figure (default port: 8000). The figures of "
+        "configs.py are the bases, query parameters override PltSettings fields. "
+        "--jobs sets the number of rendering processes."
+    )
+    parser.add_argument(
+        "--serve-cache",
+        type=int,
+        default=128,
+        metavar="N",
+        help="Number of rendered figures kept in memory by --serve (default: 128)."
+    )
+    args = parser.parse_args()
+    if args.cprofile is not None and args.profile is None:
+        parser.error("--cprofile requires --profile")
+    return args
+
+
+def load_configs(args: argparse.Namespace) -> list[PltSettings]:
+    """(Re-)imports configs.py and applies the command line options to all figures."""
+    if "configs" in sys.modules:
+        module = importlib.reload(sys.modules["configs"])
+    else:
+        module = importlib.import_module("configs")
+
+    configs = module.configs + [cfg for m in getattr(module, "matrices", []) for cfg in m.expand()]
+    date_range = tuple(args.window) if args.window else None
+    if args.as_of is not None:
+        date_range = (None, args.as_of)
+    return [
         replace(
-            base,
-            output_name="memory_wall_problem.png",
-            raw_data_col=["ai_dtype_peak_compute_Gflops", "mem_bw_GBs"],
-            marker=["v", "D"],
-            y_col=["norm_ai_dtype_peak_compute_Gflops", "norm_mem_bw_GBs"],
-            y_label=["Peak Compute (GFLOPS)", "Memory Bandwidth (GB/s)"],
-            marker_color=["mediumpurple", "mediumseagreen"],
-            title="Development of Peak Compute vs. Memory Bandwidth"
-        )
+            cfg,
+            pgf_external_data=args.pgf_external_data or cfg.pgf_external_data,
+            pgf_precision=cfg.pgf_precision if args.pgf_precision is None else args.pgf_precision,
+            pgf_externalize=args.pgf_externalize or cfg.pgf_externalize,
+            backends=(args.only, ) if args.only else cfg.backends,
+            export_formats=tuple(args.formats) if args.formats else cfg.export_formats,
+            export_dpi=tuple(args.dpi) if args.dpi else cfg.export_dpi,
+            bootstrap_resamples=args.bootstrap or cfg.bootstrap_resamples,
+            bootstrap_seed=cfg.bootstrap_seed if args.seed is None else args.seed,
+            regression_type=args.regression or cfg.regression_type,
+            regression_segments=args.segments or cfg.regression_segments,
+            csv_engine=args.csv_engine or cfg.csv_engine,
+            label_placement=args.labels or cfg.label_placement,
+            facet_col=args.facet or cfg.facet_col,
+            date_range=date_range or cfg.date_range,
+            baseline=args.baseline or cfg.baseline
+        ) for cfg in configs
     ]
 
-    for cfg in configs:
-        run_plot(cfg)
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    configs = load_configs(args)
+    cache = None if args.no_cache else BuildCache(
+        max_bytes=args.cache_size * 2**20, force=args.force
+    )
+    if args.watch:
+        config_file = Path(sys.modules["configs"].__file__)
+        watch(partial(load_configs, args), config_file, partial(run_plot, cache=cache))
+        sys.exit(0)
+
+    if args.serve is not None:
+        from src.serve import serve
+        serve(
+            configs,
+            partial(run_plot, cache=None),
+            port=args.serve,
+            jobs=args.jobs,
+            max_entries=args.serve_cache
+        )
+        sys.exit(0)
+
+    profiling = dict(profile=args.profile is not None, cprofile_stage=args.cprofile)
+    if args.animate:
+        run = partial(run_animation, fmt=args.animate)
+        outputs = partial(animation_files, fmt=args.animate)
+        results = build(configs, run, jobs=args.jobs, outputs=outputs, **profiling)
+    else:
+        # Identical figures are rendered once, figures without data are skipped.
+        plan = schedule(configs)
+        results = build(plan.render, partial(run_plot, cache=cache), jobs=args.jobs, **profiling)
+        results += finish(plan, results)
+    if args.profile is not None:
+        records = [r for result in results if result.profile for r in result.profile]
+        write_report(records, args.profile)
+        print_summary(records)
+    ok = all(r.ok for r in results)
+    if args.animate:
+        sys.exit(0 if ok else 1)
+    if args.manifest is not None or args.publish is not None:
+        from src.manifest import (
+            build_manifest, compare, publish, read_manifest, report, write_manifest
+        )
+        if not ok:
+            print("Manifest not updated: some figures failed.", flush=True)
+            sys.exit(1)
+        # Figures without data write no files.
+        empty = {cfg.output_name for cfg in plan.empty}
+        manifest = build_manifest(
+            f for cfg in configs if cfg.output_name not in empty for f in cfg.get_output_files()
+        )
+        if args.manifest is not None:
+            changed, removed = compare(read_manifest(args.manifest), manifest)
+            write_manifest(manifest, args.manifest)
+            report(changed, removed, len(manifest))
+        if args.publish is not None:
+            changed, removed = publish(manifest, Path(args.publish))
+            print(f"Published to {args.publish}:", flush=True)
+            report(changed, removed, len(manifest))
+    sys.exit(0 if ok else 1)
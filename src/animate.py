@@ -0,0 +1,212 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from PIL import Image
+from typing import Iterable
+import matplotlib.dates as mdates
+import matplotlib.pyplot as plt
+import math
+import os
+import shutil
+import subprocess
+import numpy as np
+
+from .plot import label_placement
+from .profiling import stage
+from .settings import PltSettings
+from .window import TimeIndex
+import pandas as pd
+
+
+def _fit_label(coefficients: tuple[float, float]) -> str:
+    if coefficients is None:
+        return "-"
+    b = coefficients[1]
+    return fr"{int(10**(b * 20)):d}$\times$/20 years ({10**(b * 2):.1f}$\times$/2 years)"
+
+
+def _frame_ends(df: pd.DataFrame, step: float) -> np.ndarray:
+    """End of every frame in years: the first frame shows the first year, the last all chips."""
+    first = math.floor(df["date_num"].min())
+    last = df["date_num"].max()
+    return np.append(np.arange(first + step, last, step), last)
+
+
+def animate(df: pd.DataFrame, settings: PltSettings, fmt: str = "gif") -> str:
+    """Renders an animation in which the chips appear year by year and the regression lines
+    are refitted on the chips released so far.
+    The axes, legend and annotations are created once. A frame only moves the scatter offsets,
+    the regression line data and the visibility of annotations; the regression lines are
+    refitted from prefix sums (see TimeIndex).
+
+    Args:
+        df (pd.DataFrame): The preprocessed DataFrame (sorted by date), with the computed
+            label positions if label_placement is "auto" (see labels.place_labels).
+        settings (PltSettings): Plotting settings.
+        fmt (str): "gif" (Pillow), "mp4" (requires ffmpeg) or "png" (one file per frame in a
+            directory, see PltSettings.get_animation_name).
+
+    Returns:
+        str: Name of the written file or directory.
+    """
+    fig, ax = plt.subplots(figsize=(12, 8))
+    plt.rcParams["font.family"] = settings.font_family
+    ends = _frame_ends(df, settings.animation_step)
+
+    series = []
+    for d_col, y_col, y_label, marker, marker_color in zip(
+        settings.raw_data_col, settings.y_col, settings.y_label, settings.marker,
+        settings.marker_color
+    ):
+        mask = (df[y_col].notna() & df["date_num"].notna()).to_numpy()
+        date_num = df["date_num"].to_numpy()[mask]
+        x = mdates.date2num(df["date_pd"].to_numpy()[mask])
+        y = df[y_col].to_numpy()[mask]
+        fit = TimeIndex(date_num, y)
+        scatter = ax.scatter(
+            x[:0], y[:0], label=y_label, marker=marker, facecolors="none", edgecolors=marker_color
+        )
+        # The legend is laid out for the fit of all chips.
+        (line, ) = ax.plot(
+            [], [],
+            linestyle="--",
+            linewidth=settings.regression_line_width,
+            color=marker_color,
+            label=_fit_label(fit.fit())
+        )
+
+        annotations = []
+        # The curated or the computed positions (see labels.place_labels), like in the figure.
+        _, label_text_col = settings.get_label_cols(d_col)
+        label_pos_col = settings.get_label_pos_col(d_col)
+        if label_pos_col in df.columns:
+            label_pos = df[label_pos_col].to_numpy()[mask]
+            label_text = df[label_text_col].to_numpy()[mask]
+            for i in np.flatnonzero(pd.notna(label_pos)):
+                annotation = ax.annotate(
+                    label_text[i], (x[i], y[i]),
+                    **label_placement(label_pos[i], x[i], y[i], settings),
+                    fontsize=settings.annotation_fontsize,
+                    color=marker_color,
+                    bbox=dict(
+                        boxstyle="round,pad=0.05",
+                        facecolor="white",
+                        edgecolor="black",
+                        linewidth=0.3,
+                        alpha=1.0,
+                    )
+                )
+                annotation.set_visible(False)
+                annotations.append((i, annotation))
+
+        series.append(
+            (
+                date_num, x, y, scatter, line, annotations, fit,
+                np.searchsorted(date_num, ends, side="right")
+            )
+        )
+
+    ax.set_xlabel("Year", fontsize=settings.label_fontsize)
+    ax.set_ylabel("Normalized Scaling", fontsize=settings.label_fontsize)
+    ax.tick_params(axis="both", which="major", labelsize=settings.tick_fontsize)
+    if settings.title is not None:
+        ax.set_title(settings.title, fontsize=settings.title_fontsize)
+    ax.set_yscale("log", base=10)
+    if settings.ylim is not None:
+        ax.set_ylim(*settings.ylim)
+    ax.xaxis_date()
+    # The axes cover all chips from the first frame on.
+    ax.set_xlim(*mdates.date2num(df["date_pd"].agg(["min", "max"]).to_numpy()))
+    ax.grid(True)
+    legend = ax.legend(fontsize=settings.legend_fontsize, loc="upper left")
+    # Legend texts of the regression lines (every series adds a scatter and a line entry).
+    line_texts = legend.get_texts()[1::2]
+    year_text = ax.text(
+        0.98, 0.02, "", transform=ax.transAxes, ha="right", fontsize=settings.title_fontsize
+    )
+    fig.tight_layout()
+
+    def _update(frame: int) -> None:
+        year_text.set_text(f"{ends[frame]:.0f}")
+        for data, text in zip(series, line_texts):
+            date_num, x, y, scatter, line, annotations, fit, counts = data
+            k = counts[frame]
+            scatter.set_offsets(np.column_stack([x[:k], y[:k]]))
+            for i, annotation in annotations:
+                annotation.set_visible(i < k)
+
+            coefficients = fit.fit(slice(0, k))
+            text.set_text(_fit_label(coefficients))
+            if coefficients is None:
+                line.set_data([], [])
+                continue
+            logA, b = coefficients
+            # Like in the figure, the line spans all years of the series (the chips that are
+            # not released yet show the extrapolation).
+            line.set_data(x[[0, -1]], 10**(logA + b * (date_num[[0, -1]] - 2000)))
+
+    # Blitting: the static parts of the figure are rendered once, a frame only redraws the
+    # changed artists on top of the saved background.
+    animated = [
+        artist for _, _, _, scatter, line, annotations, _, _ in series
+        for artist in [scatter, line, *(a for _, a in annotations)]
+    ] + [legend, year_text]
+    for artist in animated:
+        artist.set_animated(True)
+    canvas = fig.canvas
+    canvas.draw()
+    background = canvas.copy_from_bbox(fig.bbox)
+
+    def _render(frame: int) -> np.ndarray:
+        """Returns the RGBA pixels of a frame."""
+        _update(frame)
+        canvas.restore_region(background)
+        for artist in animated:
+            fig.draw_artist(artist)
+        return np.asarray(canvas.buffer_rgba())
+
+    output = settings.get_animation_name(fmt)
+    with stage("encode"):
+        if fmt == "png":
+            os.makedirs(output, exist_ok=True)
+            for frame in range(len(ends)):
+                Image.fromarray(_render(frame)).save(os.path.join(output, f"frame_{frame:04d}.png"))
+        elif fmt == "gif":
+            images = [Image.fromarray(_render(frame)).convert("RGB") for frame in range(len(ends))]
+            images[0].save(
+                output,
+                save_all=True,
+                append_images=images[1:],
+                duration=int(1000 / settings.animation_fps),
+                loop=0
+            )
+        else:
+            _write_mp4(output, (_render(frame) for frame in range(len(ends))), settings)
+    plt.close(fig)
+    return output
+
+
+def _write_mp4(output: str, frames: Iterable[np.ndarray], settings: PltSettings) -> None:
+    """Encodes RGBA frames (consumed one by one) with ffmpeg (rcParams['animation.ffmpeg_path'])."""
+    ffmpeg = plt.rcParams["animation.ffmpeg_path"]
+    if shutil.which(ffmpeg) is None:
+        raise RuntimeError(f"mp4 animations require ffmpeg ('{ffmpeg}' was not found)")
+    frames = iter(frames)
+    first = next(frames)
+    height, width = first.shape[:2]
+    command = [
+        ffmpeg, "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgba", "-s",
+        f"{width}x{height}", "-r",
+        str(settings.animation_fps), "-i", "-", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt",
+        "yuv420p", output
+    ]
+    with subprocess.Popen(command, stdin=subprocess.PIPE) as process:
+        process.stdin.write(first.tobytes())
+        for frame in frames:
+            process.stdin.write(frame.tobytes())
+        process.stdin.close()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed with exit code {process.returncode}")
@@ -0,0 +1,124 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable
+import sys
+import time
+import traceback
+
+from . import profiling
+from .settings import PltSettings
+
+
+@dataclass
+class BuildResult:
+    """Outcome of rendering one figure.
+    Attributes:
+        output_name (str): Name of the output plot file.
+        seconds (float): Wall time spent on the figure.
+        error (str): Formatted traceback if the figure failed, None otherwise.
+        status (str): Short status returned by the render function (e.g. "cached").
+        profile (list[StageRecord]): Stage measurements if the build was profiled.
+        files (list[str]): Files (or directories) written for the figure, None = output_name.
+    """
+    output_name: str
+    seconds: float
+    error: str = None
+    status: str = "ok"
+    profile: list[profiling.StageRecord] = None
+    files: list[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _run_job(
+    run: Callable[[PltSettings], str],
+    settings: PltSettings,
+    profile: bool = False,
+    cprofile_stage: str = None,
+    outputs: Callable[[PltSettings], list[str]] = PltSettings.get_output_files
+) -> BuildResult:
+    """Renders a single figure and captures any exception as a formatted traceback."""
+    if profile:
+        profiling.start(settings.output_name, cprofile_stage)
+    start = time.perf_counter()
+    status = "failed"
+    try:
+        status = run(settings) or "ok"
+    except Exception:
+        error = traceback.format_exc()
+    else:
+        error = None
+    seconds = time.perf_counter() - start
+    records = profiling.stop() if profile else None
+    return BuildResult(settings.output_name, seconds, error, status, records, outputs(settings))
+
+
+def _report(result: BuildResult) -> None:
+    """Prints the result of a finished figure."""
+    files = ", ".join(result.files or [result.output_name])
+    print(f"{'[' + result.status + ']':<8} {files} ({result.seconds:.2f}s)", flush=True)
+    if not result.ok:
+        print(result.error, file=sys.stderr, flush=True)
+
+
+def build(
+    configs: list[PltSettings],
+    run: Callable[[PltSettings], str],
+    jobs: int = 1,
+    profile: bool = False,
+    cprofile_stage: str = None,
+    outputs: Callable[[PltSettings], list[str]] = PltSettings.get_output_files
+) -> list[BuildResult]:
+    """Renders all figures, either one after another or spread over a process pool.
+    A process pool (instead of threads) is used because the pyplot state is global.
+    Every figure is rendered by exactly one process, so the output files are identical
+    to a serial run. Results are printed as soon as a figure finishes.
+
+    Args:
+        configs (list[PltSettings]): Settings of all figures.
+        run (Callable[[PltSettings], str]): Renders one figure and optionally returns a
+            short status. Must be picklable.
+        jobs (int): Number of worker processes. Values <= 1 render serially.
+        profile (bool): Record wall time, CPU time and peak memory of each stage.
+        cprofile_stage (str): Stage that is additionally profiled with cProfile.
+        outputs (Callable[[PltSettings], list[str]]): Returns the files that run writes for a
+            figure (reported with the results). Must be picklable.
+
+    Returns:
+        list[BuildResult]: Results in the order in which the figures finished.
+    """
+    results = []
+
+    if jobs <= 1 or len(configs) <= 1:
+        for cfg in configs:
+            results.append(_run_job(run, cfg, profile, cprofile_stage, outputs))
+            _report(results[-1])
+        return results
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(configs))) as pool:
+        start = time.perf_counter()
+        futures = {
+            pool.submit(_run_job, run, cfg, profile, cprofile_stage, outputs): cfg
+            for cfg in configs
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception:
+                # The worker process itself died (e.g. BrokenProcessPool).
+                elapsed = time.perf_counter() - start
+                result = BuildResult(
+                    futures[future].output_name, elapsed, traceback.format_exc(), "failed"
+                )
+            results.append(result)
+            _report(result)
+
+    return results
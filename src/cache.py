@@ -0,0 +1,133 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+
+from .settings import PltSettings
+
+SRC_DIR = Path(__file__).resolve().parent
+# main.py routes the figures to the renderers (facets, TeX-only path, formats).
+MAIN_FILE = SRC_DIR.parent / "main.py"
+
+
+@lru_cache(maxsize=None)
+def renderer_version() -> str:
+    """Hash of the source code of the rendering pipeline (all modules in src/ and main.py).
+    Any code change invalidates all cached figures.
+    """
+    h = hashlib.sha256()
+    for f in [*sorted(SRC_DIR.glob("*.py")), MAIN_FILE]:
+        h.update(f.name.encode())
+        h.update(f.read_bytes())
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=32)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of the file content. Memoized as long as mtime and size are unchanged."""
+    st = os.stat(path)
+    return _file_digest(str(path), st.st_mtime_ns, st.st_size)
+
+
+def settings_digest(settings: PltSettings) -> str:
+    """SHA-256 of all fields of the settings dataclass."""
+    fields = json.dumps(asdict(settings), sort_keys=True, default=str)
+    return hashlib.sha256(fields.encode()).hexdigest()
+
+
+@dataclass
+class BuildCache:
+    """Content-addressed cache for the rendered figure files.
+    Each entry is a directory named after the cache key that contains copies of all output
+    files of one figure. The key is derived from the input data, the settings and the
+    renderer code. Entries are evicted in least-recently-used order once the total size
+    exceeds max_bytes.
+
+    Attributes:
+        cache_dir (Path): Directory that holds the cache entries.
+        max_bytes (int): Size limit of the cache in bytes.
+        force (bool): Never restore entries, always re-render (entries are still stored).
+    """
+    cache_dir: Path = Path(".build_cache/figures")
+    max_bytes: int = 100 * 2**20
+    force: bool = False
+
+    def key(self, settings: PltSettings) -> str:
+        """Returns the cache key of a figure."""
+        h = hashlib.sha256()
+        for path in settings.get_data_files():
+            h.update(file_digest(path).encode())
+        h.update(settings_digest(settings).encode())
+        h.update(renderer_version().encode())
+        return h.hexdigest()
+
+    def restore(self, key: str, settings: PltSettings) -> bool:
+        """Copies the cached output files of a figure to their destination.
+
+        Returns:
+            bool: True if the entry exists and was restored, False on a cache miss.
+        """
+        if self.force:
+            return False
+        entry = self.cache_dir / key
+        files = settings.get_output_files()
+        if not all((entry / os.path.basename(f)).is_file() for f in files):
+            return False
+        for f in files:
+            shutil.copyfile(entry / os.path.basename(f), f)
+        # Mark the entry as recently used.
+        os.utime(entry)
+        return True
+
+    def store(self, key: str, settings: PltSettings) -> None:
+        """Adds the output files of a freshly rendered figure to the cache."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry = self.cache_dir / key
+        tmp = self.cache_dir / f".{key}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        for f in settings.get_output_files():
+            shutil.copyfile(f, tmp / os.path.basename(f))
+        shutil.rmtree(entry, ignore_errors=True)
+        try:
+            os.replace(tmp, entry)
+        except OSError:
+            # Another process stored the same entry in the meantime.
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def evict(self) -> None:
+        """Removes the least recently used entries until the cache fits into max_bytes."""
+        entries = []
+        for entry in self.cache_dir.iterdir():
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            try:
+                size = sum(f.stat().st_size for f in entry.iterdir())
+                entries.append((entry.stat().st_mtime_ns, size, entry))
+            except FileNotFoundError:
+                continue
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
@@ -0,0 +1,297 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Iterable
+from pandas.api.types import union_categoricals
+import importlib.util
+import os
+import pickle
+import numpy as np
+import pandas as pd
+
+from .cache import file_digest, renderer_version
+from .schema import as_float64, compact, read_csv_chunks
+from .settings import find_data_files
+from .store import ChipStore
+
+# Rows per chunk when a CSV file is parsed.
+CHUNK_ROWS = 1 << 18
+
+
+def check_engine(engine: str) -> None:
+    """Raises an ImportError if the parser engine is not installed.
+    The engine only affects parsing: the parsed frame (and its sidecar) is the same for all
+    engines, so the check is done up front and not only when a file is actually parsed.
+    """
+    if engine == "pyarrow" and importlib.util.find_spec("pyarrow") is None:
+        raise ImportError('csv_engine "pyarrow" requires the pyarrow package')
+
+
+def _sidecar_path(path: Path) -> Path:
+    path = Path(path)
+    return path.with_name(f".{path.name}.pkl")
+
+
+def _detach(column: pd.Series) -> pd.Series:
+    """Returns a copy of a column that does not keep the memory of its frame alive."""
+    return pd.Series(column.array.copy(), name=column.name, copy=False)
+
+
+def merge_sorted(runs: Iterable[pd.DataFrame], key: str = "date_num") -> pd.DataFrame:
+    """Merges frames that are each sorted by key into one sorted frame.
+    The runs are consumed one after the other and split into their columns, so a run that
+    is passed by a generator is freed as soon as it is split. The merge order is computed
+    once from the keys (the stable sort of numpy detects the presorted runs and merges them
+    in O(n log k)). Every column is written directly to its merged rows, releasing the
+    columns of the runs as they are merged: the peak memory is about the merged frame plus
+    one run. Only the columns that all runs have are kept.
+    """
+    runs = iter(runs)
+    first, second = next(runs), next(runs, None)
+    if second is None:
+        return first
+    pieces = {c: [] for c in first.columns}
+    index = []
+
+    def split(run: pd.DataFrame) -> None:
+        for c in list(pieces):
+            if c in run.columns:
+                pieces[c].append(_detach(run[c]))
+            else:
+                del pieces[c]
+        index.append(run.index.to_numpy())
+
+    split(first)
+    split(second)
+    del first, second
+    for run in runs:
+        split(run)
+    # The last run is released before the columns are merged.
+    run = None
+
+    order = np.argsort(np.concatenate([p.to_numpy() for p in pieces[key]]), kind="stable")
+    # Row of the merged frame of every row of the runs.
+    positions = np.empty_like(order)
+    positions[order] = np.arange(len(order))
+    columns = {}
+    for c in list(pieces):
+        parts = pieces.pop(c)
+        if any(isinstance(p.dtype, pd.CategoricalDtype) for p in parts):
+            columns[c] = union_categoricals([p.astype("category") for p in parts]).take(order)
+            continue
+        if len({p.dtype for p in parts}) > 1:
+            # E.g. a float column that is float32 only in some runs.
+            parts = [as_float64(p) for p in parts]
+        if not all(isinstance(p.dtype, np.dtype) for p in parts):
+            # E.g. strings.
+            columns[c] = np.concatenate([p.to_numpy() for p in parts])[order]
+            continue
+        # The parts are written directly to their rows and released one after the other.
+        values = np.empty(len(order), dtype=np.result_type(*[p.dtype for p in parts]))
+        start = 0
+        while parts:
+            part = parts.pop(0).to_numpy()
+            values[positions[start:start + len(part)]] = part
+            start += len(part)
+        columns[c] = values
+    index = np.concatenate(index)[order]
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+class ChipDataset:
+    """Chip table that is parsed, validated, sorted by date and date-converted only once.
+    The column types are declared in src/schema.py.
+    The parsed frame is kept in a binary sidecar file next to the CSV
+    ('.<csv name>.pkl') and reused as long as mtime and content hash of the CSV match
+    (for all parser engines, the parsed frames are identical).
+    Configs never modify the shared frame: they work on a shallow copy (see view()),
+    so config-specific columns like 'norm_*' do not leak into other configs.
+
+    Attributes:
+        path (Path): Path to the CSV file.
+        digest (str): SHA-256 of the CSV file content.
+        mtime_ns (int): Modification time of the CSV file.
+        df (pd.DataFrame): The sorted table including the 'date_pd' column and the
+            provenance column 'source' (path of the CSV file).
+        engine (str): pandas parser engine ("c" or "pyarrow").
+    """
+    def __init__(self, path: Path, engine: str = "c"):
+        check_engine(engine)
+        self.path = Path(path)
+        self.engine = engine
+        self.mtime_ns = os.stat(self.path).st_mtime_ns
+        self.digest = file_digest(self.path)
+        self.df = self._load_sidecar()
+        if self.df is None:
+            self.df = self._parse()
+            self._write_sidecar()
+
+    @property
+    def sidecar_path(self) -> Path:
+        return _sidecar_path(self.path)
+
+    @staticmethod
+    def sidecar_is_newer(path: Path) -> bool:
+        """Cheap check whether a CSV file probably has a valid sidecar (without loading it)."""
+        try:
+            return os.stat(_sidecar_path(path)).st_mtime_ns >= os.stat(path).st_mtime_ns
+        except OSError:
+            return False
+
+    def _parse(self) -> pd.DataFrame:
+        # Large files are streamed in chunks that are sorted separately and merged.
+        runs = (
+            df.sort_values(by="date_num", ascending=True, kind="stable")
+            for df in read_csv_chunks(self.path, engine=self.engine, chunksize=CHUNK_ROWS)
+        )
+        df = merge_sorted(runs)
+        compact(df)
+        df["source"] = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), [str(self.path)])
+        return df
+
+    def _load_sidecar(self) -> pd.DataFrame:
+        try:
+            with open(self.sidecar_path, "rb") as f:
+                sidecar = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+        if sidecar.get("mtime_ns") != self.mtime_ns or sidecar.get("digest") != self.digest:
+            return None
+        # Frames of older versions of the parser (e.g. other column types) are not reused.
+        if sidecar.get("version") != renderer_version():
+            return None
+        return sidecar["frame"]
+
+    def _write_sidecar(self) -> None:
+        sidecar = {
+            "mtime_ns": self.mtime_ns,
+            "digest": self.digest,
+            "version": renderer_version(),
+            "frame": self.df
+        }
+        tmp = self.sidecar_path.with_name(f"{self.sidecar_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump(sidecar, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.sidecar_path)
+        except OSError:
+            # The sidecar is only an optimization (e.g. read-only data directory).
+            tmp.unlink(missing_ok=True)
+
+    def is_stale(self) -> bool:
+        """Checks whether the CSV file was modified since it was loaded."""
+        return os.stat(self.path).st_mtime_ns != self.mtime_ns
+
+    def view(self) -> pd.DataFrame:
+        """Returns a cheap shallow copy of the table.
+        New columns added to the view are not visible in the shared frame.
+        """
+        return self.df.copy(deep=False)
+
+
+class ShardedDataset:
+    """Chip table that is combined from several CSV files (e.g. one per vendor or chip class).
+    The files are parsed in parallel processes (each into its own ChipDataset sidecar) and
+    merged by date. Only the merged frame is kept in memory. The 'source' column names the file of
+    each row.
+
+    Attributes:
+        path (Path): Directory or glob pattern of the CSV files.
+        files (list[Path]): The CSV files.
+        mtimes (list[int]): Modification times of the files.
+        df (pd.DataFrame): The merged, sorted table.
+        engine (str): pandas parser engine ("c" or "pyarrow").
+    """
+    def __init__(self, path: Path, files: list[Path], engine: str = "c", jobs: int = None):
+        self.path = path
+        self.files = files
+        self.engine = engine
+        self.mtimes = [os.stat(f).st_mtime_ns for f in files]
+        # Files without an up-to-date sidecar are parsed in worker processes that only write
+        # the sidecars, the frames are then loaded from the sidecars.
+        outdated = [f for f in files if not ChipDataset.sidecar_is_newer(f)]
+        # At most one parser process per CPU (or jobs processes).
+        jobs = min(len(outdated), jobs or os.cpu_count() or 1)
+        if jobs > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                list(pool.map(partial(ChipDataset, engine=engine), outdated))
+        # The frames are loaded one after the other and released while they are merged.
+        self.df = merge_sorted(ChipDataset(f, engine).df for f in files)
+        compact(self.df)
+        # The row labels of the files overlap.
+        self.df.index = pd.RangeIndex(len(self.df))
+
+    def is_stale(self) -> bool:
+        """Checks whether files were added, removed or modified since they were loaded."""
+        files = find_data_files(self.path)
+        return files != self.files or [os.stat(f).st_mtime_ns for f in files] != self.mtimes
+
+    def view(self) -> pd.DataFrame:
+        """Returns a cheap shallow copy of the table (see ChipDataset.view)."""
+        return self.df.copy(deep=False)
+
+
+_datasets: dict[Path, ChipDataset | ShardedDataset] = {}
+# Tables that are kept as ChipStore instead of a DataFrame (see load_store).
+_stores: dict[Path, tuple[ChipDataset | ShardedDataset, ChipStore]] = {}
+
+
+def _open_dataset(path: Path, engine: str) -> ChipDataset | ShardedDataset:
+    files = find_data_files(path)
+    if not files:
+        raise FileNotFoundError(f"No CSV files found for {path}")
+    if files == [Path(path)]:
+        return ChipDataset(path, engine)
+    return ShardedDataset(Path(path), files, engine)
+
+
+def load_dataset(path: Path, engine: str = "c") -> ChipDataset | ShardedDataset:
+    """Returns the dataset of a CSV file, a directory or a glob pattern of CSV files
+    (see find_data_files). It is parsed only once per process and re-parsed only if
+    a file changed (which drops all intermediate results of precompute.py). The parsed
+    table does not depend on the engine, which is only checked for availability (see
+    check_engine). A ChipStore of the same table (see load_store) is dropped.
+    """
+    check_engine(engine)
+    key = Path(path).resolve()
+    dataset = _datasets.get(key)
+    if dataset is None or dataset.is_stale():
+        _stores.pop(key, None)
+        dataset = _datasets[key] = _open_dataset(path, engine)
+        # The intermediate results of the previous table are no longer needed.
+        from . import precompute
+        precompute.clear()
+    return dataset
+
+
+def is_loaded(path: Path) -> bool:
+    """Checks whether the DataFrame of a table is loaded and up to date."""
+    dataset = _datasets.get(Path(path).resolve())
+    return dataset is not None and not dataset.is_stale()
+
+
+def load_store(path: Path, engine: str = "c") -> ChipStore:
+    """Returns the table of load_dataset as a ChipStore (see src/store.py) without keeping
+    its DataFrame: the frame is parsed (or read from its sidecar) and released column by
+    column while it is converted. The store is cached like the datasets of load_dataset
+    (the DataFrame of the table is dropped, so at most one of both is kept per process).
+    """
+    check_engine(engine)
+    key = Path(path).resolve()
+    dataset, store = _stores.get(key, (None, None))
+    if dataset is None or dataset.is_stale():
+        if _datasets.pop(key, None) is not None:
+            from . import precompute
+            precompute.clear()
+        dataset = _open_dataset(path, engine)
+        store = ChipStore.from_frame(dataset.df, release=True)
+        # Only the file state is kept (for is_stale).
+        dataset.df = None
+        _stores[key] = (dataset, store)
+    return store
@@ -0,0 +1,201 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+from matplotlib.collections import PathCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.markers import MarkerStyle
+import matplotlib.image as mimage
+import matplotlib.pyplot as plt
+import gzip
+import numpy as np
+import os
+import re
+
+from .settings import RASTER_FORMATS, PltSettings
+
+# Output settings of the vector formats (maximum compression of the PDF streams, fixed salt
+# of the SVG ids instead of a random one).
+VECTOR_RC = {"path.simplify": True, "pdf.compression": 9, "svg.hashsalt": "memory-wall-problem"}
+
+# Fixed metadata: no creation dates and no library versions, so that the same figure always
+# gives the same bytes (see manifest.py). The PostScript date is taken from SOURCE_DATE_EPOCH.
+_SVG_METADATA = {"Creator": None, "Date": None}
+METADATA = {
+    "png": {
+        "Software": None
+    },
+    "pdf": {
+        "Creator": None,
+        "Producer": None,
+        "CreationDate": None
+    },
+    "svg": _SVG_METADATA,
+    "svgz": _SVG_METADATA,
+    "eps": {
+        "Creator": "matplotlib"
+    },
+    "ps": {
+        "Creator": "matplotlib"
+    },
+}
+
+
+def _uniform_scatter(collection: PathCollection) -> bool:
+    """Checks whether all points of a scatter layer look the same (one marker, size and color)."""
+    return (
+        isinstance(collection, PathCollection) and collection.get_visible()
+        and not collection.get_rasterized() and len(collection.get_paths()) == 1
+        and len(collection.get_sizes()) == 1 and len(collection.get_edgecolors()) <= 1
+        and len(collection.get_facecolors()) <= 1 and len(collection.get_linewidths()) == 1
+        and len(collection.get_offsets()) > 0
+    )
+
+
+def _as_markers(collection: PathCollection) -> Line2D:
+    """Returns a Line2D that draws the points of a uniform scatter layer as markers."""
+    path = collection.get_paths()[0]
+    # A custom marker is rescaled to a maximum extent of 0.5, scatter markers are not.
+    extent = np.max(np.abs(path.vertices))
+    offsets = collection.get_offsets()
+    edgecolor = collection.get_edgecolors()
+    facecolor = collection.get_facecolors()
+    # Drawn before all other artists with the same zorder, like the collection.
+    zorder = collection.get_zorder() - 1e-6
+    return Line2D(
+        offsets[:, 0],
+        offsets[:, 1],
+        linestyle="none",
+        marker=MarkerStyle(path, joinstyle=collection.get_joinstyle() or "round"),
+        markersize=2 * extent * np.sqrt(collection.get_sizes()[0]),
+        markeredgewidth=collection.get_linewidths()[0],
+        markeredgecolor=edgecolor[0] if len(edgecolor) else "none",
+        markerfacecolor=facecolor[0] if len(facecolor) else "none",
+        transform=collection.get_offset_transform(),
+        clip_on=collection.get_clip_on(),
+        zorder=zorder,
+    )
+
+
+@contextmanager
+def symbol_markers(fig: Figure):
+    """Temporarily draws uniform scatter layers as Line2D markers.
+    The vector backends emit the marker of a Line2D once (SVG symbol, PDF form XObject) and
+    only place it per point, while a scatter layer of small markers is written as one path
+    per point. Only used for vector outputs, raster outputs are rendered from the scatter.
+    """
+    swapped = []
+    for ax in fig.axes:
+        for collection in ax.collections:
+            if _uniform_scatter(collection):
+                line = _as_markers(collection)
+                ax.add_line(line)
+                collection.set_visible(False)
+                swapped.append((collection, line))
+    try:
+        yield
+    finally:
+        for collection, line in swapped:
+            line.remove()
+            collection.set_visible(True)
+
+
+# A clip group that only contains placed symbols.
+_USE_GROUP = re.compile(r'(<g clip-path="[^"]*")>\n((?:\s*<use [^>]*/>\n)+)(\s*</g>)')
+_USE_STYLE = re.compile(r' style="([^"]*)"/>')
+
+
+def _hoist_use_styles(match: re.Match) -> str:
+    styles = set(_USE_STYLE.findall(match.group(2)))
+    if len(styles) != 1:
+        return match.group(0)
+    uses = _USE_STYLE.sub("/>", match.group(2))
+    return f'{match.group(1)} style="{styles.pop()}">\n{uses}{match.group(3)}'
+
+
+def compact_svg(name: str) -> None:
+    """Moves the style that matplotlib repeats on every placed marker to the enclosing group
+    (the style is inherited), which roughly halves the size of large scatter plots.
+    """
+    with open(name, encoding="utf-8") as f:
+        svg = f.read()
+    with open(name, "w", encoding="utf-8") as f:
+        f.write(_USE_GROUP.sub(_hoist_use_styles, svg))
+
+
+def _save_svgz(fig: Figure, name: str, dpi: float) -> None:
+    """Saves a compacted SVG (see compact_svg) compressed with a fixed gzip timestamp."""
+    buffer = BytesIO()
+    fig.savefig(buffer, format="svg", dpi=dpi, metadata=METADATA["svgz"])
+    svg = _USE_GROUP.sub(_hoist_use_styles, buffer.getvalue().decode("utf-8"))
+    with open(name, "wb") as f:
+        f.write(gzip.compress(svg.encode("utf-8"), mtime=0))
+
+
+@contextmanager
+def _source_date_epoch():
+    """Sets SOURCE_DATE_EPOCH (reproducible-builds.org) to 0 unless it is already set."""
+    if "SOURCE_DATE_EPOCH" in os.environ:
+        yield
+        return
+    os.environ["SOURCE_DATE_EPOCH"] = "0"
+    try:
+        yield
+    finally:
+        del os.environ["SOURCE_DATE_EPOCH"]
+
+
+def save_figure(fig: Figure, settings: PltSettings) -> None:
+    """Saves the laid out figure to all targets of settings.get_figure_targets().
+    Raster targets are drawn once per resolution, the pixels are encoded in parallel threads
+    (the encoders release the GIL). Vector targets are written with reused marker symbols
+    (see symbol_markers, compact_svg) and the options in VECTOR_RC. All files are written with
+    the fixed METADATA, so they are byte-reproducible.
+    """
+    targets = settings.get_figure_targets()
+    canvas = fig.canvas
+    dpi = fig.dpi
+    default_dpi = dpi if plt.rcParams["savefig.dpi"] == "figure" else plt.rcParams["savefig.dpi"]
+    raster = [t for t in targets if t[1] in RASTER_FORMATS]
+    vector = [t for t in targets if t[1] not in RASTER_FORMATS]
+
+    with ThreadPoolExecutor(max_workers=max(1, min(len(raster), os.cpu_count() or 1))) as pool:
+        encoded = []
+        for name, fmt, target_dpi in raster:
+            fig.set_dpi(default_dpi if target_dpi is None else target_dpi)
+            canvas.draw()
+            # Same encoding as savefig (dpi), on a copy of the pixels.
+            pixels = np.array(canvas.buffer_rgba())
+            # Pillow only knows the name "tiff".
+            image_format = "tiff" if fmt == "tif" else fmt
+            encoded.append(
+                pool.submit(
+                    mimage.imsave,
+                    name,
+                    pixels,
+                    format=image_format,
+                    origin="upper",
+                    dpi=fig.dpi,
+                    metadata=METADATA.get(fmt)
+                )
+            )
+        fig.set_dpi(dpi)
+
+        # Rasterized layers of vector outputs use the highest resolution of the raster targets.
+        vector_dpi = max((t[2] for t in raster if t[2] is not None), default=None)
+        with plt.rc_context(VECTOR_RC), symbol_markers(fig), _source_date_epoch():
+            for name, fmt, _ in vector:
+                if fmt == "svgz":
+                    _save_svgz(fig, name, vector_dpi)
+                    continue
+                fig.savefig(name, format=fmt, dpi=vector_dpi, metadata=METADATA.get(fmt))
+                if fmt == "svg":
+                    compact_svg(name)
+        for future in encoded:
+            future.result()
@@ -0,0 +1,65 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+
+from .regression import RegressionLine, calculate_group_regression_lines
+from .settings import PltSettings
+
+
+@dataclass
+class Panel:
+    """One panel of a faceted figure.
+    Attributes:
+        name (str): Value of the facet column (panel title).
+        df (pd.DataFrame): The rows of the panel (in the order of the figure).
+        regression_lines (dict[str, RegressionLine]): Regression lines keyed by column name.
+            Columns with fewer than two distinct years in the panel have no line.
+    """
+    name: str
+    df: pd.DataFrame
+    regression_lines: dict[str, RegressionLine]
+
+
+def facet_codes(df: pd.DataFrame, settings: PltSettings) -> tuple[np.ndarray, list[str]]:
+    """Assigns every row to a panel of settings.facet_col.
+    The panels are the values in settings.facet_values (in this order) or all values (sorted).
+
+    Returns:
+        tuple[np.ndarray, list[str]]: Panel of every row (-1 = no panel) and the panel names.
+    """
+    values = df[settings.facet_col]
+    if settings.facet_values is not None:
+        names = list(settings.facet_values)
+        codes = pd.Categorical(values.astype(object), categories=names).codes
+    else:
+        codes, uniques = pd.factorize(values, sort=True)
+        names = [str(value) for value in uniques]
+    return np.asarray(codes, dtype=np.intp), names
+
+
+def facet_panels(df: pd.DataFrame, settings: PltSettings) -> list[Panel]:
+    """Splits the preprocessed frame into the panels of settings.facet_col.
+    The rows are grouped once (one stable sort of the panel codes) and the regression lines
+    of all panels are fitted in one batched pass per column.
+
+    Args:
+        df (pd.DataFrame): The preprocessed DataFrame.
+        settings (PltSettings): Plotting settings.
+
+    Returns:
+        list[Panel]: The panels in figure order.
+    """
+    codes, names = facet_codes(df, settings)
+    lines = calculate_group_regression_lines(df, codes, len(names), settings)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(names) + 1))
+    return [
+        Panel(name, df.iloc[order[bounds[k]:bounds[k + 1]]], lines[k])
+        for k, name in enumerate(names)
+    ]
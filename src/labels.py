@@ -0,0 +1,304 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from dataclasses import dataclass
+import math
+import numpy as np
+import pandas as pd
+
+from .settings import PltSettings
+
+# Positions of a label relative to its point: top, bottom, left and right.
+POSITIONS = ("t", "b", "l", "r")
+
+
+@dataclass(frozen=True)
+class _Canvas:
+    """Approximate geometry of the plot area of one output (all lengths in pt).
+    Attributes:
+        width (float): Width of the plot area.
+        height (float): Height of the plot area.
+        xlim (tuple[float, float]): Range of years.
+        ylim (tuple[float, float]): Range of log10 y-values.
+        char_width (float): Width of one label character.
+        text_height (float): Height of a label text.
+        pad (float): Padding between text and label frame.
+        gap (tuple[float, float]): Distance of "t" and "b" labels to their point in decades
+            (the pyplot figure offsets labels by a factor of the value).
+        sep (float): Distance of a label to its point in pt.
+        mark (float): Radius of a marker.
+    """
+    width: float
+    height: float
+    xlim: tuple[float, float]
+    ylim: tuple[float, float]
+    char_width: float
+    text_height: float
+    pad: float
+    gap: tuple[float, float]
+    sep: float
+    mark: float
+
+    def to_axes(self, x: np.ndarray, v: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Maps years and log10 values to pt in the plot area."""
+        u = (x - self.xlim[0]) / (self.xlim[1] - self.xlim[0]) * self.width
+        w = (v - self.ylim[0]) / (self.ylim[1] - self.ylim[0]) * self.height
+        return u, w
+
+    def boxes(self, x: np.ndarray, v: np.ndarray, chars: np.ndarray, pos: str) -> np.ndarray:
+        """Returns the frames (x0, y0, x1, y1) of labels at a position in axes fractions."""
+        w = chars * self.char_width + 2 * self.pad
+        h = self.text_height + 2 * self.pad
+        if pos == "t":
+            u, bottom = self.to_axes(x, v + self.gap[0])
+            frame = (u - w / 2, bottom, u + w / 2, bottom + h)
+        elif pos == "b":
+            u, top = self.to_axes(x, v + self.gap[1])
+            frame = (u - w / 2, top - h, u + w / 2, top)
+        else:
+            u, c = self.to_axes(x, v)
+            left = u + self.sep if pos == "r" else u - self.sep - w
+            frame = (left, c - h / 2, left + w, c + h / 2)
+        x0, y0, x1, y1 = frame
+        return np.column_stack(
+            [x0 / self.width, y0 / self.height, x1 / self.width, y1 / self.height]
+        )
+
+    def marks(self, x: np.ndarray, v: np.ndarray) -> np.ndarray:
+        """Returns the bounding boxes of the markers in axes fractions."""
+        u, c = self.to_axes(x, v)
+        return np.column_stack(
+            [
+                (u - self.mark) / self.width, (c - self.mark) / self.height,
+                (u + self.mark) / self.width, (c + self.mark) / self.height
+            ]
+        )
+
+
+def _canvases(x: np.ndarray, v: np.ndarray, settings: PltSettings) -> list[_Canvas]:
+    """Geometry of the pyplot figure (12x8 in, tight layout) and the pgfplots axis
+    (15.4x7 cm, \\tiny labels of the 'lbl' style).
+    """
+    if settings.ylim is not None:
+        ylim = tuple(math.log10(y) for y in settings.ylim)
+    else:
+        margin = 0.05 * (v.max() - v.min())
+        ylim = (v.min() - margin, v.max() + margin)
+    fs = settings.annotation_fontsize
+    offset = settings.text_offsets
+    margin = 0.05 * (x.max() - x.min())
+    pyplot = _Canvas(
+        width=0.9 * 12 * 72,
+        height=0.88 * 8 * 72,
+        xlim=(x.min() - margin, x.max() + margin),
+        ylim=ylim,
+        char_width=0.6 * fs,
+        text_height=1.2 * fs,
+        pad=0.05 * fs,
+        gap=(math.log10(1 + offset), math.log10(max(1 - offset, 1e-3))),
+        sep=3,
+        mark=3
+    )
+    # pgfplots anchors the labels at the point, the outer sep (1pt) is converted to decades.
+    outer_sep = (ylim[1] - ylim[0]) / 158
+    pgfplots = _Canvas(
+        width=390,
+        height=158,
+        xlim=(math.floor(x.min()) - 1, math.ceil(x.max()) + 1),
+        ylim=ylim,
+        char_width=3,
+        text_height=5,
+        pad=1,
+        gap=(outer_sep, -outer_sep),
+        sep=1,
+        mark=2
+    )
+    return [pyplot, pgfplots]
+
+
+def _union(boxes: list[np.ndarray]) -> np.ndarray:
+    """Smallest boxes that contain the boxes of all outputs."""
+    stacked = np.stack(boxes)
+    return np.column_stack([stacked[:, :, :2].min(axis=0), stacked[:, :, 2:].max(axis=0)])
+
+
+class _Occupancy:
+    """Number of markers per cell of a grid over the plot area with a summed-area table:
+    the number of markers that touch a rectangle of cells is read in O(1).
+    """
+    def __init__(self, marks: np.ndarray, nx: int, ny: int):
+        self.nx, self.ny = nx, ny
+        self.cells = np.column_stack(
+            [
+                self._cells(marks[:, 0], nx),
+                self._cells(marks[:, 1], ny),
+                self._cells(marks[:, 2], nx) + 1,
+                self._cells(marks[:, 3], ny) + 1
+            ]
+        )
+        # Every marker covers a rectangle of cells: a 2D difference array, integrated twice,
+        # gives the number of markers per cell.
+        diff = np.zeros((nx + 1, ny + 1), dtype=np.int64)
+        i0, j0, i1, j1 = self.cells.T
+        np.add.at(diff, (i0, j0), 1)
+        np.add.at(diff, (i1, j0), -1)
+        np.add.at(diff, (i0, j1), -1)
+        np.add.at(diff, (i1, j1), 1)
+        count = diff.cumsum(axis=0).cumsum(axis=1)[:nx, :ny]
+        self.table = np.zeros((nx + 1, ny + 1), dtype=np.int64)
+        self.table[1:, 1:] = count.cumsum(axis=0).cumsum(axis=1)
+
+    @staticmethod
+    def _cells(f: np.ndarray, n: int) -> np.ndarray:
+        return np.clip(np.floor(f * n).astype(np.int64), 0, n - 1)
+
+    def blocked(self, boxes: np.ndarray, own: np.ndarray) -> np.ndarray:
+        """Checks for every box whether a marker other than its own marker touches it."""
+        i0 = np.clip((boxes[:, 0] * self.nx).astype(np.int64), 0, self.nx)
+        j0 = np.clip((boxes[:, 1] * self.ny).astype(np.int64), 0, self.ny)
+        i1 = np.clip(np.ceil(boxes[:, 2] * self.nx).astype(np.int64), 0, self.nx)
+        j1 = np.clip(np.ceil(boxes[:, 3] * self.ny).astype(np.int64), 0, self.ny)
+        t = self.table
+        total = t[i1, j1] - t[i0, j1] - t[i1, j0] + t[i0, j0]
+        # Cells of the own marker inside the box.
+        m0, n0, m1, n1 = self.cells[own].T
+        covered = (
+            np.maximum(0,
+                       np.minimum(i1, m1) - np.maximum(i0, m0)) *
+            np.maximum(0,
+                       np.minimum(j1, n1) - np.maximum(j0, n0))
+        )
+        return total - covered > 0
+
+
+class _LabelGrid:
+    """Spatial hash of the placed label frames. The cells are at least as large as a label,
+    so a frame touches at most four cells and every cell holds a bounded number of labels.
+    """
+    def __init__(self, cell_w: float, cell_h: float):
+        self.cell_w, self.cell_h = cell_w, cell_h
+        self.cells: dict[tuple[int, int], list[list[float]]] = {}
+
+    def _keys(self, box: list[float]):
+        for i in range(int(box[0] // self.cell_w), int(box[2] // self.cell_w) + 1):
+            for j in range(int(box[1] // self.cell_h), int(box[3] // self.cell_h) + 1):
+                yield i, j
+
+    def overlaps(self, box: list[float]) -> bool:
+        x0, y0, x1, y1 = box
+        for key in self._keys(box):
+            for other in self.cells.get(key, ()):
+                if x0 < other[2] and other[0] < x1 and y0 < other[3] and other[1] < y1:
+                    return True
+        return False
+
+    def add(self, box: list[float]) -> None:
+        for key in self._keys(box):
+            self.cells.setdefault(key, []).append(box)
+
+
+def place_labels(df: pd.DataFrame, settings: PltSettings) -> pd.DataFrame:
+    """Chooses the label positions of all series of a figure so that the labels neither overlap
+    each other nor cover a marker, in the pyplot figure and in the pgfplots output.
+    Candidates are all points with a label text; a text that was already a candidate earlier
+    in a series (e.g. a memory type) is only labeled again where a position was curated in the
+    '*_labels' column. Curated labels are placed first and try their curated position first,
+    the other positions are tried in the order of POSITIONS. Labels that fit nowhere are dropped.
+    The marker occupancy is a summed-area table and the placed labels are kept in a spatial
+    hash, so the placement takes O(n log n) for n candidates.
+
+    Args:
+        df (pd.DataFrame): The preprocessed DataFrame (sorted by date).
+        settings (PltSettings): Plotting settings.
+
+    Returns:
+        pd.DataFrame: A shallow copy of df with the computed positions in private columns
+            (see PltSettings.get_label_pos_col), which are read by both outputs. The curated
+            positions are left untouched.
+    """
+    date_num = df["date_num"].to_numpy()
+    series = []
+    for d_col, y_col in zip(settings.raw_data_col, settings.y_col):
+        label_pos_col, label_text_col = settings.get_label_cols(d_col)
+        mask = (df[y_col].notna() & df["date_num"].notna()).to_numpy()
+        series.append(
+            (
+                settings.get_label_pos_col(d_col), label_pos_col, label_text_col,
+                np.flatnonzero(mask), y_col
+            )
+        )
+    placed = {auto_pos_col: np.full(len(df), None, dtype=object) for auto_pos_col, *_ in series}
+    if not any(len(rows) for *_, rows, _ in series):
+        return _with_positions(df, placed)
+
+    x = np.concatenate([date_num[rows] for *_, rows, _ in series])
+    v = np.log10(np.concatenate([df[y_col].to_numpy()[rows] for *_, rows, y_col in series]))
+    canvases = _canvases(x, v, settings)
+    occupancy = _Occupancy(
+        _union([c.marks(x, v) for c in canvases]),
+        int(max(c.width for c in canvases) / 2),
+        int(max(c.height for c in canvases) / 2),
+    )
+
+    # Candidates of all series (columns of the arrays below).
+    parts = []
+    start = 0
+    for k, (_, label_pos_col, label_text_col, rows, y_col) in enumerate(series):
+        if label_pos_col in df.columns:
+            positions = df[label_pos_col].to_numpy()[rows]
+        else:
+            positions = np.full(len(rows), None)
+        curated = pd.notna(positions)
+        texts = df[label_text_col].to_numpy()[rows]
+        first = ~pd.Series(texts).duplicated().to_numpy()
+        keep = np.flatnonzero(pd.notna(texts) & (first | curated))
+        parts.append(
+            (
+                rows[keep], np.full(len(keep), k), np.where(curated, positions, None)[keep],
+                start + keep, texts[keep], df[y_col].to_numpy()[rows][keep]
+            )
+        )
+        start += len(rows)
+    rows, ks, curated, markers, texts, values = (np.concatenate(c) for c in zip(*parts))
+    # Curated labels first, then in the order of the rows and series.
+    order = np.lexsort((ks, rows, pd.isna(curated)))
+    rows, ks, curated, markers = rows[order], ks[order], curated[order], markers[order]
+    xs, vs = date_num[rows], np.log10(values[order].astype(np.float64))
+    chars = np.array([len(str(t)) for t in texts[order]], dtype=np.int64)
+    # Frames of all candidates at all positions (in both outputs) and whether they fit into
+    # the plot area without touching a marker.
+    frames, free = {}, {}
+    for pos in POSITIONS:
+        frames[pos] = _union([c.boxes(xs, vs, chars, pos) for c in canvases])
+        inside = (frames[pos][:, :2] >= 0).all(axis=1) & (frames[pos][:, 2:] <= 1).all(axis=1)
+        free[pos] = inside & ~occupancy.blocked(frames[pos], markers)
+    # Only candidates with a free position are placed one by one (against the placed labels).
+    todo = np.flatnonzero(np.logical_or.reduce([free[pos] for pos in POSITIONS]))
+    frames = {pos: frames[pos][todo].tolist() for pos in POSITIONS}
+    free = {pos: free[pos][todo].tolist() for pos in POSITIONS}
+    grid = _LabelGrid(
+        max((chars.max(initial=1) * c.char_width + 2 * c.pad) / c.width for c in canvases),
+        max((c.text_height + 2 * c.pad) / c.height for c in canvases),
+    )
+
+    for n, (row, k, preferred) in enumerate(
+        zip(rows[todo].tolist(), ks[todo].tolist(), curated[todo].tolist())
+    ):
+        for pos in ([preferred] if preferred else []) + [p for p in POSITIONS if p != preferred]:
+            if not free[pos][n] or grid.overlaps(frames[pos][n]):
+                continue
+            grid.add(frames[pos][n])
+            placed[series[k][0]][row] = pos
+            break
+    return _with_positions(df, placed)
+
+
+def _with_positions(df: pd.DataFrame, placed: dict[str, np.ndarray]) -> pd.DataFrame:
+    """Returns a shallow copy of df with the computed label positions (None = no label)."""
+    df = df.copy(deep=False)
+    for auto_pos_col, positions in placed.items():
+        df[auto_pos_col] = pd.Categorical(positions, categories=POSITIONS)
+    return df
@@ -0,0 +1,44 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+import numpy as np
+
+
+def decimate(x: np.ndarray, y: np.ndarray, max_points: int, keep: np.ndarray = None) -> np.ndarray:
+    """Selects a subset of a series for level-of-detail rendering.
+    The (x, log10 y) plane is divided into a grid with at most max_points cells
+    and only the first point of each occupied cell is kept.
+    Points flagged in keep (e.g. labeled chips) are always kept.
+
+    Args:
+        x (np.ndarray): x-values (year).
+        y (np.ndarray): Positive y-values (log-scaled axis).
+        max_points (int): Upper bound for the number of grid cells.
+        keep (np.ndarray): Optional boolean mask of points that must not be dropped.
+
+    Returns:
+        np.ndarray: Boolean mask of the selected points (original order is preserved).
+    """
+    n = len(x)
+    if n <= max_points:
+        return np.ones(n, dtype=bool)
+
+    side = max(int(np.sqrt(max_points)), 1)
+
+    def _bin(v: np.ndarray) -> np.ndarray:
+        lo, hi = np.nanmin(v), np.nanmax(v)
+        if hi <= lo:
+            return np.zeros(len(v), dtype=np.int64)
+        return np.minimum(((v - lo) / (hi - lo) * side).astype(np.int64), side - 1)
+
+    cell = _bin(x) * side + _bin(np.log10(y))
+    _, first = np.unique(cell, return_index=True)
+
+    mask = np.zeros(n, dtype=bool)
+    mask[first] = True
+    if keep is not None:
+        mask |= keep
+    return mask
@@ -0,0 +1,105 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from pathlib import Path
+from typing import Iterable
+import json
+import os
+import shutil
+
+from .cache import file_digest
+
+MANIFEST_NAME = "manifest.json"
+
+
+def build_manifest(files: Iterable[str]) -> dict[str, dict]:
+    """Returns SHA-256 and size of every artifact, keyed by its path (sorted).
+    The outputs are byte-reproducible (see export.METADATA and pgfplot._number), so equal
+    hashes mean unchanged figures.
+    """
+    return {
+        Path(name).as_posix(): {
+            "sha256": file_digest(Path(name)),
+            "size": os.path.getsize(name)
+        }
+        for name in sorted(set(files))
+    }
+
+
+def read_manifest(path: Path) -> dict[str, dict]:
+    """Reads a manifest written by write_manifest (empty if the file does not exist)."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def write_manifest(manifest: dict[str, dict], path: Path) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(previous: dict[str, dict], manifest: dict[str, dict]) -> tuple[list[str], list[str]]:
+    """Returns the new or changed artifacts and the artifacts that are no longer built."""
+    changed = [name for name, entry in manifest.items() if previous.get(name) != entry]
+    removed = sorted(set(previous) - set(manifest))
+    return changed, removed
+
+
+def report(changed: list[str], removed: list[str], total: int) -> None:
+    for name in changed:
+        print(f"{'[changed]':<10} {name}", flush=True)
+    for name in removed:
+        print(f"{'[removed]':<10} {name}", flush=True)
+    print(f"{len(changed)} of {total} artifacts changed, {len(removed)} removed", flush=True)
+
+
+def _is_inside(name: str, target: Path) -> bool:
+    """Checks that an artifact name is a relative path to a file inside of the target
+    (e.g. 'matrix/memory_wall.png'), also after symbolic links are resolved.
+    """
+    if Path(name).is_absolute():
+        return False
+    root = target.resolve()
+    path = (target / name).resolve()
+    return path != root and path.is_relative_to(root)
+
+
+def publish(manifest: dict[str, dict], target: Path) -> tuple[list[str], list[str]]:
+    """Updates a copy of the artifacts (e.g. a checkout of the gh-pages branch) incrementally.
+    Only new and changed artifacts are copied and artifacts of the previous manifest that are
+    no longer built are deleted; the manifest is stored in the target as well.
+
+    Args:
+        manifest (dict[str, dict]): Manifest of the current build (see build_manifest).
+        target (Path): Directory of the published artifacts.
+
+    Returns:
+        tuple[list[str], list[str]]: Copied and deleted artifacts.
+
+    Raises:
+        ValueError: An artifact of either manifest is not a relative path inside of the
+            target (e.g. '../a.tex'), nothing is copied or deleted.
+    """
+    target = Path(target)
+    previous = read_manifest(target / MANIFEST_NAME)
+    invalid = sorted({name for name in [*manifest, *previous] if not _is_inside(name, target)})
+    if invalid:
+        raise ValueError(
+            f"Artifact names must be relative paths inside of the target: {', '.join(invalid)}"
+        )
+    changed, removed = compare(previous, manifest)
+    # Artifacts that were deleted in the target are copied again.
+    changed += [name for name in manifest if name not in changed and not (target / name).is_file()]
+    for name in changed:
+        (target / name).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(name, target / name)
+    for name in removed:
+        (target / name).unlink(missing_ok=True)
+    write_manifest(manifest, target / MANIFEST_NAME)
+    return changed, removed
@@ -0,0 +1,139 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from dataclasses import asdict, dataclass, field, replace
+from itertools import product
+from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+
+from .build import BuildResult
+from .settings import PltSettings
+
+ALL = {"all": None}
+
+
+@dataclass
+class FigureMatrix:
+    """Declarative set of figures: one figure per combination of the entries of all axes.
+    Every axis maps a name to a value. Names of axes with more than one entry are appended
+    to the output name of base (e.g. 'matrix_fp32_nvidia_2015-2026.png').
+
+    Attributes:
+        base (PltSettings): Settings shared by all figures.
+        metrics (dict[str, dict]): PltSettings fields of the plotted columns (raw_data_col,
+            y_col, y_label, marker, marker_color, ...).
+        vendors (dict[str, tuple[str, ...]]): Vendor filters (None = all vendors).
+        date_ranges (dict[str, tuple[float, float]]): Ranges of years (None = all years).
+        dtypes (dict[str, tuple[str, ...]]): dtype restrictions (None = all dtypes).
+    """
+    base: PltSettings
+    metrics: dict[str, dict]
+    vendors: dict[str, tuple[str, ...]] = field(default_factory=lambda: dict(ALL))
+    date_ranges: dict[str, tuple[float, float]] = field(default_factory=lambda: dict(ALL))
+    dtypes: dict[str, tuple[str, ...]] = field(default_factory=lambda: dict(ALL))
+
+    def expand(self) -> list[PltSettings]:
+        """Returns the settings of all figures of the matrix."""
+        stem, ext = os.path.splitext(self.base.output_name)
+        axes = [self.metrics, self.vendors, self.date_ranges, self.dtypes]
+        configs = []
+        for combination in product(*(axis.items() for axis in axes)):
+            names = [name for (name, _), axis in zip(combination, axes) if len(axis) > 1]
+            (_, metric), (_, vendors), (_, date_range), (_, dtypes) = combination
+            configs.append(
+                replace(
+                    self.base,
+                    output_name="_".join([stem, *names]) + ext,
+                    vendors=vendors,
+                    date_range=date_range,
+                    dtypes=dtypes,
+                    **metric
+                )
+            )
+        return configs
+
+
+@dataclass
+class Schedule:
+    """Figures of a build after de-duplication.
+    Attributes:
+        render (list[PltSettings]): Figures that are rendered.
+        duplicates (list[tuple[PltSettings, PltSettings]]): Figures with the same output as
+            a rendered figure (figure, rendered figure). Their files are copied.
+        empty (list[PltSettings]): Figures without enough data for a regression line.
+    """
+    render: list[PltSettings] = field(default_factory=list)
+    duplicates: list[tuple[PltSettings, PltSettings]] = field(default_factory=list)
+    empty: list[PltSettings] = field(default_factory=list)
+
+
+def _names_output(settings: PltSettings) -> bool:
+    """Checks whether the output name is written into the files: the pgfplots code contains
+    it in its \\label (and in the data and externalization file names). Such figures are never
+    copied.
+    """
+    return "tex" in settings.backends
+
+
+def schedule(configs: list[PltSettings]) -> Schedule:
+    """Detects figures that would render identical files and figures without data.
+    Two figures are identical if they select the same rows of the same table and all other
+    settings except the output name are equal. The table is only loaded if a figure filters rows.
+    """
+    selections = {}
+    if any(cfg.get_row_filter() != (None, None, None) for cfg in configs):
+        from .dataset import load_dataset
+        from . import precompute
+        for cfg in configs:
+            source = load_dataset(cfg.dc_chips_path, cfg.csv_engine).df
+            key, df = precompute.select_rows(source, cfg)
+            rows = hashlib.sha256(df.index.to_numpy().tobytes()).hexdigest()
+            counts = [
+                int(precompute.column(source, key, df, c).notna().sum()) for c in cfg.raw_data_col
+            ]
+            selections[cfg.output_name] = (rows, counts)
+
+    plan = Schedule()
+    rendered = {}
+    for cfg in configs:
+        rows, counts = selections.get(cfg.output_name, (None, None))
+        if counts is not None and min(counts, default=2) < 2:
+            plan.empty.append(cfg)
+            continue
+        fields = asdict(replace(cfg, output_name="", vendors=None, dtypes=None, date_range=None))
+        signature = (rows, json.dumps(fields, sort_keys=True, default=str))
+        if signature in rendered and not _names_output(cfg):
+            plan.duplicates.append((cfg, rendered[signature]))
+        else:
+            rendered.setdefault(signature, cfg)
+            plan.render.append(cfg)
+    return plan
+
+
+def finish(plan: Schedule, results: list[BuildResult]) -> list[BuildResult]:
+    """Copies the files of the duplicates and reports the skipped figures."""
+    ok = {r.output_name for r in results if r.ok}
+    reports = []
+    for cfg in plan.empty:
+        reports.append(BuildResult(cfg.output_name, 0.0, status="empty"))
+    for cfg, twin in plan.duplicates:
+        if twin.output_name not in ok:
+            reports.append(
+                BuildResult(cfg.output_name, 0.0, f"{twin.output_name} failed", "failed")
+            )
+            continue
+        for src, dst in zip(twin.get_output_files(), cfg.get_output_files()):
+            Path(dst).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(src, dst)
+        reports.append(
+            BuildResult(cfg.output_name, 0.0, status="same", files=cfg.get_output_files())
+        )
+    for r in reports:
+        print(f"{'[' + r.status + ']':<8} {', '.join(r.files or [r.output_name])}", flush=True)
+    return reports
@@ -0,0 +1,76 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class Metric:
+    """Column that is computed from other columns of the chip table.
+    Attributes:
+        inputs (tuple[str, ...]): Columns (or other metrics) the metric is computed from.
+        formula (Callable): Vectorized function of the input columns (float64 Series).
+        label (str): Suggested legend label.
+        labels_of (str): Column whose label positions and texts are used for the metric.
+    """
+    inputs: tuple[str, ...]
+    formula: Callable
+    label: str
+    labels_of: str
+
+    def evaluate(self, column: Callable):
+        """Evaluates the metric. column(name) returns an input column of the whole table."""
+        return self.formula(*(column(name) for name in self.inputs))
+
+
+# The ridge point of the roofline model is the compute-to-bandwidth ratio:
+# GFLOP/s divided by GB/s gives the number of FLOPs per loaded byte above which a kernel
+# is compute bound.
+DERIVED_METRICS = {
+    "ridge_point_flops_per_byte":
+        Metric(
+            ("ai_dtype_peak_compute_Gflops", "mem_bw_GBs"),
+            lambda compute, bandwidth: compute / bandwidth,
+            "Ridge Point (FLOP/byte)",
+            "ai_dtype_peak_compute_Gflops",
+        ),
+    "ridge_point_fp32_flops_per_byte":
+        Metric(
+            ("fp32_peak_compute_Gflops", "mem_bw_GBs"),
+            lambda compute, bandwidth: compute / bandwidth,
+            "FP32 Ridge Point (FLOP/byte)",
+            "fp32_peak_compute_Gflops",
+        ),
+    "bytes_per_flop":
+        Metric(
+            ("ridge_point_flops_per_byte", ),
+            lambda ridge: 1 / ridge,
+            "Bandwidth per FLOP (byte/FLOP)",
+            "mem_bw_GBs",
+        ),
+    "dtype_speedup":
+        Metric(
+            ("ai_dtype_peak_compute_Gflops", "fp32_peak_compute_Gflops"),
+            lambda ai_dtype, fp32: ai_dtype / fp32,
+            "Speedup of the Fastest Datatype over FP32",
+            "ai_dtype_peak_compute_Gflops",
+        ),
+}
+
+
+def base_columns(name: str) -> set[str]:
+    """Returns the CSV columns a column or metric depends on."""
+    if name not in DERIVED_METRICS:
+        return {name}
+    return set().union(*(base_columns(i) for i in DERIVED_METRICS[name].inputs))
+
+
+def label_source(name: str) -> str:
+    """Returns the CSV column whose labels are used for a column or metric."""
+    while name in DERIVED_METRICS:
+        name = DERIVED_METRICS[name].labels_of
+    return name
@@ -5,60 +5,235 @@
 # found in the root directory of this source tree.                           #
 ##############################################################################
 
+from .lod import decimate
 from .regression import RegressionLine
 from .settings import PltSettings
+from .store import ChipStore
+from dataclasses import replace
+from typing import Iterable, TextIO
 import math
 import os
+import numpy as np
 import pandas as pd
 
 marker_dict = {"D": "diamond*", "v": "triangle*", "o": "*"}
 regression_dict = {"mediumseagreen": "densely dashed", "royalblue": "densely dotted"}
-anchor_dict = {"b": "north", "t": "south"}
+anchor_dict = {"b": "north", "t": "south", "l": "east", "r": "west"}
 
 label_cols = {"norm_mem_bw_GBs": "mem_type"}
 
+# Years have four integer digits: seven significant digits keep three decimals.
+YEAR_DIGITS = 7
 
-def add_properties(outfile: list, properties: dict, indent: int) -> None:
-    for property, value in properties.items():
-        outfile.append((indent, f"{property}={value}," if value is not None else f"{property},"))
 
+class TexWriter:
+    """Streams indented lines of TeX code to an open file.
+    Attributes:
+        f (TextIO): The output file.
+        indent (int): Current indentation level (4 spaces per level).
+    """
+    def __init__(self, f: TextIO, indent: int = 0):
+        self.f = f
+        self.indent = indent
 
-def pgfplot(
-    df: pd.DataFrame, regression_lines: dict[str, RegressionLine], settings: PltSettings
-) -> None:
-    """Create a pgfplots-based figure including regression lines.
+    def line(self, text: str = "") -> None:
+        """Writes one line at the current indentation. Empty lines are not indented."""
+        self.f.write(f"{self.indent * 4 * ' '}{text}\n" if text else "\n")
 
-    Args:
-        df (pd.DataFrame): The preprocessed DataFrame.
-        regression_lines (dict[str, RegressionLine]): Dictionary of regression lines keyed by column name.
-        settings (PltSettings): Plotting settings.
+    def lines(self, texts: Iterable[str]) -> None:
+        """Writes many lines at the current indentation with a single call."""
+        pad = self.indent * 4 * " "
+        self.f.writelines(f"{pad}{text}\n" for text in texts)
+
+
+def _number(value: float, digits: int) -> str:
+    """Canonical text of a number: digits significant digits without trailing zeros.
+    Values that only differ in the last bits (e.g. fits with another BLAS) give the same text.
     """
-    outfile = []
-    indent = 0
+    return f"{value:.{digits}g}"
 
-    outfile.append((indent, r"% \usepackage{tikz}"))
-    outfile.append((indent, r"% \usepackage{pgfplots}"))
-    outfile.append((indent, r"% \pgfplotsset{compat=1.14}"))
-    outfile.append((0, ""))
 
-    outfile.append((indent, r"\begin{figure}"))
-    indent += 1
+def _points(x: np.ndarray, y: np.ndarray, digits: int) -> Iterable[str]:
+    """Yields the canonical '(x, y)' coordinates of years x and values y (see _number)."""
+    point = f"({{:.{YEAR_DIGITS}g}}, {{:.{digits}g}})"
+    return (point.format(xi, yi) for xi, yi in zip(x.tolist(), y.tolist()))
 
-    outfile.append((indent, r"\centering"))
-    outfile.append((indent, r"\begin{tikzpicture}"))
-    indent += 1
 
-    outfile.append(
-        (
-            indent,
-            r"\tikzstyle{lbl} = [font=\tiny, outer sep=1pt, fill=white, draw=black, inner sep=1pt, rounded corners=1pt]"
-        )
+def add_properties(out: TexWriter, properties: dict) -> None:
+    out.lines(
+        f"{property}={value}," if value is not None else f"{property},"
+        for property, value in properties.items()
     )
 
-    outfile.append((indent, r"\begin{axis}["))
-    indent += 1
 
-    axis_properties = {
+def _series(df: pd.DataFrame | ChipStore,
+            y_col: str,
+            max_points: int = None,
+            keep_col: str = None) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the x and y values of all rows with a value in y_col.
+    Series with more than max_points values are decimated, rows with a value in keep_col
+    (label positions) are always kept.
+    """
+    y = np.asarray(df[y_col])
+    mask = ~np.isnan(y)
+    x, y = np.asarray(df["date_num"])[mask], y[mask]
+    if max_points is not None and len(x) > max_points:
+        keep = pd.notna(np.asarray(df[keep_col]))[mask] if keep_col in df.columns else None
+        selected = decimate(x, y, max_points, keep)
+        x, y = x[selected], y[selected]
+    return x, y
+
+
+def _coordinates(
+    df: pd.DataFrame | ChipStore,
+    y_col: str,
+    digits: int,
+    max_points: int = None,
+    keep_col: str = None
+) -> Iterable[str]:
+    """Yields the '(x, y)' coordinates of all rows with a value in y_col."""
+    x, y = _series(df, y_col, max_points, keep_col)
+    return _points(x, y, digits)
+
+
+def _write_table(path: str, x: np.ndarray, y: np.ndarray, precision: int) -> None:
+    """Writes a two-column data file that can be read with 'addplot table'."""
+    # Years get a fixed number of decimals, the (log-scaled) values significant digits.
+    row = f"{{:.3f}} {{:.{precision}g}}\n"
+    with open(path, "w") as f:
+        f.write("x y\n")
+        f.writelines(row.format(xi, yi) for xi, yi in zip(x.tolist(), y.tolist()))
+
+
+def _write_confidence_band(
+    out: TexWriter, regression_line: RegressionLine, y_col: str, x: np.ndarray,
+    settings: PltSettings
+) -> None:
+    """Writes the bootstrap confidence band of a regression line as a closed, filled path."""
+    lo, hi = regression_line.band(x)
+    # Upper bound from left to right, lower bound from right to left.
+    x, y = np.concatenate([x, x[::-1]]), np.concatenate([hi, lo[::-1]])
+
+    out.line("% Confidence band")
+    out.line(r"\addplot [")
+    out.indent += 1
+    add_properties(out, {"forget plot": None, "draw": "none", "fill": "gray", "fill opacity": 0.2})
+    out.indent -= 1
+    if settings.pgf_external_data:
+        data_name = settings.get_data_name(y_col, "_ci")
+        _write_table(data_name, x, y, settings.pgf_precision)
+        out.line(rf"] table [x=x, y=y] {{{os.path.basename(data_name)}}} -- cycle;")
+    else:
+        out.line(r"] coordinates {")
+        out.indent += 1
+        out.lines(_points(x, y, settings.pgf_precision))
+        out.indent -= 1
+        out.line(r"} -- cycle;")
+    out.line()
+
+
+def _label_nodes(
+    df: pd.DataFrame | ChipStore, y_col: str, label_pos_col: str, label_text_col: str, digits: int
+) -> Iterable[str]:
+    """Yields a label node for all rows with a label position and a value in y_col."""
+    if label_pos_col not in df.columns:
+        return iter(())
+    positions, y = np.asarray(df[label_pos_col]), np.asarray(df[y_col])
+    mask = pd.notna(positions) & ~np.isnan(y)
+    x = np.asarray(df["date_num"])[mask].tolist()
+    y = y[mask].tolist()
+    anchors = [anchor_dict.get(pos, "south") for pos in positions[mask]]
+    texts = np.asarray(df[label_text_col])[mask].tolist()
+    return (
+        rf"\node[lbl, anchor={anchor}] at (axis cs:{_number(xi, YEAR_DIGITS)}, {_number(yi, digits)}) {{{text}}};"
+        for anchor, xi, yi, text in zip(anchors, x, y, texts)
+    )
+
+
+def _write_regression_line(
+    out: TexWriter, piece: RegressionLine, y_col: str, marker_color: str, xmin: int, xmax: int,
+    segment: int, settings: PltSettings
+) -> None:
+    """Writes a regression line (or one segment of a piecewise fit) with its legend entry.
+    Segments are restricted to their domain and their legend entry names the covered years.
+    """
+    out.line("% Regression line")
+    out.line(r"\addplot [")
+    out.indent += 1
+
+    lo = xmin if piece.x_min is None else round(max(piece.x_min, xmin), 3)
+    hi = xmax if piece.x_max is None else round(min(piece.x_max, xmax), 3)
+    line_type = regression_dict.get(marker_color, "dotted")
+
+    if settings.pgf_external_data:
+        # Sample the regression line in Python instead of TeX.
+        suffix = "_regression" if segment is None else f"_regression_{segment}"
+        data_name = settings.get_data_name(y_col, suffix)
+        x = np.linspace(lo, hi, settings.pgf_regression_samples)
+        y = piece.A * 10**(piece.b * (x - 2000))
+        _write_table(data_name, x, y, settings.pgf_precision)
+
+        add_properties(out, {line_type: None})
+        out.indent -= 1
+        out.line(rf"] table [x=x, y=y] {{{os.path.basename(data_name)}}};")
+    else:
+        plot_properties = {
+            line_type: None,
+            "domain": f"{_number(lo, YEAR_DIGITS)}:{_number(hi, YEAR_DIGITS)}",
+            "samples": settings.pgf_regression_samples
+        }
+        add_properties(out, plot_properties)
+
+        out.indent -= 1
+        A, b = _number(piece.A, settings.pgf_precision), _number(piece.b, settings.pgf_precision)
+        out.line(rf"] {{ {A} * 10^({b} * (x - 2000))}};")
+    years = "" if segment is None else f"{lo:.0f}--{hi:.0f}: "
+    ci = ""
+    if piece.factor_2y_ci is not None:
+        ci_lo, ci_hi = piece.factor_2y_ci
+        ci = rf", {piece.ci_level * 100:.0f}\,\% CI {ci_lo:.1f}--{ci_hi:.1f}"
+    out.line(
+        rf"\addlegendentry{{{years}{piece.factor_20y:.0f}\,$\times$/20\,yrs ({piece.factor_2y:.1f}\,$\times$/2\,yrs{ci})}}"
+    )
+    out.line()
+
+
+def pgfplot(
+    df: pd.DataFrame | ChipStore, regression_lines: dict[str, RegressionLine], settings: PltSettings
+) -> None:
+    """Create a pgfplots-based figure including regression lines.
+    The coordinates and label nodes are built column-wise and streamed to the output file.
+
+    Args:
+        df (pd.DataFrame | ChipStore): The preprocessed table.
+        regression_lines (dict[str, RegressionLine]): Dictionary of regression lines keyed by column name.
+        settings (PltSettings): Plotting settings.
+    """
+    with open(settings.get_tex_name(), "w") as f:
+        _write_figure(TexWriter(f), df, regression_lines, settings)
+
+
+def _write_header(out: TexWriter, settings: PltSettings, libraries: list[str] = ()) -> None:
+    """Writes the required packages and libraries as comments."""
+    out.line(r"% \usepackage{tikz}")
+    out.line(r"% \usepackage{pgfplots}")
+    out.line(r"% \pgfplotsset{compat=1.14}")
+    if settings.pgf_external_data:
+        out.line(r"% \pgfplotsset{table/search path={<directory of this file>}}")
+    for library in libraries:
+        out.line(rf"% \usepgfplotslibrary{{{library}}}")
+    if settings.pgf_externalize:
+        out.line(r"% \usetikzlibrary{external}")
+        out.line(r"% \tikzexternalize")
+    out.line()
+
+
+def _axis_properties(df: pd.DataFrame | ChipStore, settings: PltSettings) -> dict:
+    """Returns the options of the axis (of all panels of a faceted figure)."""
+    # Years of the chips with a value in any plotted column.
+    has_value = np.logical_or.reduce([~np.isnan(np.asarray(df[c])) for c in settings.y_col])
+    years = np.asarray(df["date_num"])[has_value]
+    return {
         "set layers":
             None,
         "width":
@@ -74,13 +249,13 @@ def pgfplot(
         "log basis y":
             "10",
         "ymin":
-            str(settings.ylim[0]),
+            _number(settings.ylim[0], settings.pgf_precision),
         "ymax":
-            str(settings.ylim[1]),
+            _number(settings.ylim[1], settings.pgf_precision),
         "xmin":
-            math.floor(df.loc[df[settings.y_col].notna().any(axis=1)]["date_num"].min()) - 1,
+            math.floor(np.nanmin(years)) - 1,
         "xmax":
-            math.ceil(df.loc[df[settings.y_col].notna().any(axis=1)]["date_num"].max()) + 1,
+            math.ceil(np.nanmax(years)) + 1,
         "grid":
             "major",
         "minor grid style":
@@ -96,22 +271,23 @@ def pgfplot(
         "legend style":
             r"{font=\scriptsize}",
     }
-    add_properties(outfile, axis_properties, indent)
 
-    indent -= 1
-    outfile.append((indent, r"]"))
-    indent += 1
 
+def _write_series(
+    out: TexWriter, df: pd.DataFrame | ChipStore, regression_lines: dict[str, RegressionLine],
+    settings: PltSettings
+) -> None:
+    """Writes the points, regression lines and labels of all series into the current axis."""
     for raw_data_col, y_col, y_label, marker, marker_color in zip(
         settings.raw_data_col, settings.y_col, settings.y_label, settings.marker,
         settings.marker_color
     ):
         # yapf: disable
-        outfile.append((indent, rf"% {'-' * 10} {y_label}"))
+        out.line(rf"% {'-' * 10} {y_label}")
         # yapf: enable
 
-        outfile.append((indent, r"\addplot ["))
-        indent += 1
+        out.line(r"\addplot [")
+        out.indent += 1
 
         plot_properties = {
             "only marks": None,
@@ -119,82 +295,163 @@ def pgfplot(
             "draw": "none",
             "fill": "gray!75"
         }
-        add_properties(outfile, plot_properties, indent)
-
-        indent -= 1
-        outfile.append((indent, r"] coordinates {"))
-        indent += 1
-
-        for _, row in df.iterrows():
-            if pd.isna(row[y_col]):
-                continue
-            outfile.append((indent, f"({row['date_num']}, {row[y_col]})"))
+        add_properties(out, plot_properties)
+
+        out.indent -= 1
+        _, label_text_col = settings.get_label_cols(raw_data_col)
+        label_pos_col = settings.get_label_pos_col(raw_data_col)
+        if settings.pgf_external_data:
+            data_name = settings.get_data_name(y_col)
+            x, y = _series(df, y_col, settings.lod_threshold, label_pos_col)
+            _write_table(data_name, x, y, settings.pgf_precision)
+            out.line(rf"] table [x=x, y=y] {{{os.path.basename(data_name)}}};")
+        else:
+            out.line(r"] coordinates {")
+            out.indent += 1
+
+            out.lines(
+                _coordinates(
+                    df, y_col, settings.pgf_precision, settings.lod_threshold, label_pos_col
+                )
+            )
 
-        indent -= 1
-        outfile.append((indent, r"};"))
+            out.indent -= 1
+            out.line(r"};")
 
-        outfile.append((indent, rf"\addlegendentry{{{y_label}}}"))
-        outfile.append((0, ""))
+        out.line(rf"\addlegendentry{{{y_label}}}")
+        out.line()
 
         if y_col in regression_lines:
-            outfile.append((indent, "% Regression line"))
-            outfile.append((indent, r"\addplot ["))
-            indent += 1
-
-            xmin = math.floor(df["date_num"].min())
-            xmax = math.ceil(df["date_num"].max())
-            line_type = regression_dict.get(marker_color, "dotted")
-
-            plot_properties = {line_type: None, "domain": f"{xmin}:{xmax}", "samples": 200}
-            add_properties(outfile, plot_properties, indent)
-
-            indent -= 1
-            outfile.append(
-                (
-                    indent,
-                    rf"] {{ {regression_lines[y_col].A} * 10^({regression_lines[y_col].b} * (x - 2000))}};"
+            xmin = math.floor(np.nanmin(df["date_num"]))
+            xmax = math.ceil(np.nanmax(df["date_num"]))
+            pieces = regression_lines[y_col].pieces()
+            for k, piece in enumerate(pieces):
+                _write_regression_line(
+                    out, piece, y_col, marker_color, xmin, xmax, k if len(pieces) > 1 else None,
+                    settings
                 )
-            )
-            outfile.append(
-                (
-                    indent,
-                    rf"\addlegendentry{{{regression_lines[y_col].factor_20y:.0f}\,$\times$/20\,yrs ({regression_lines[y_col].factor_2y:.1f}\,$\times$/2\,yrs)}}"
+
+            if regression_lines[y_col].boot_b is not None:
+                _write_confidence_band(
+                    out, regression_lines[y_col], y_col,
+                    np.linspace(xmin, xmax, settings.pgf_regression_samples), settings
                 )
-            )
-            outfile.append((0, ""))
 
-        outfile.append((indent, "% Data labels"))
+        out.line("% Data labels")
 
-        outfile.append((indent, r"\begin{pgfonlayer}{axis descriptions}"))
-        indent += 1
+        out.line(r"\begin{pgfonlayer}{axis descriptions}")
+        out.indent += 1
 
-        label_pos_col, label_text_col = settings.get_label_cols(raw_data_col)
-        for _, row in df.iterrows():
-            if label_pos_col not in row or pd.isna(row[label_pos_col]) or pd.isna(row[y_col]):
-                continue
+        out.lines(_label_nodes(df, y_col, label_pos_col, label_text_col, settings.pgf_precision))
 
-            outfile.append(
-                (
-                    indent,
-                    rf"\node[lbl, anchor={anchor_dict.get(row[label_pos_col], 'south')}] at (axis cs:{row['date_num']}, {row[y_col]}) {{{row[label_text_col]}}};"
-                )
-            )
-        indent -= 1
-        outfile.append((indent, r"\end{pgfonlayer}"))
-        outfile.append((0, ""))
+        out.indent -= 1
+        out.line(r"\end{pgfonlayer}")
+        out.line()
+
+
+def _begin_figure(out: TexWriter, settings: PltSettings) -> None:
+    out.line(r"\begin{figure}")
+    out.indent += 1
+
+    out.line(r"\centering")
+    if settings.pgf_externalize:
+        out.line(
+            rf"\tikzsetnextfilename{{{os.path.splitext(os.path.basename(settings.output_name))[0]}}}"
+        )
+    out.line(r"\begin{tikzpicture}")
+    out.indent += 1
 
-    indent -= 1
-    outfile.append((indent, r"\end{axis}"))
+    out.line(
+        r"\tikzstyle{lbl} = [font=\tiny, outer sep=1pt, fill=white, draw=black, inner sep=1pt, rounded corners=1pt]"
+    )
+
+
+def _end_figure(out: TexWriter, settings: PltSettings) -> None:
+    out.indent -= 1
+    out.line(r"\end{tikzpicture}")
+
+    out.line()
+    out.line(rf"\caption{{{settings.title}}}")
+    out.line(rf"\label{{fig:{os.path.splitext(settings.output_name)[0]}}}")
+
+    out.indent -= 1
+    out.line(r"\end{figure}")
+
+
+def pgfplot_facets(df: pd.DataFrame, panels: list, settings: PltSettings) -> None:
+    """Create a pgfplots figure with a panel per facet in one 'groupplot' (small multiples).
+    The panels share the axis limits. The data is always written inline.
+
+    Args:
+        df (pd.DataFrame): The preprocessed DataFrame (all panels).
+        panels (list[Panel]): The panels of the figure (see facets.facet_panels).
+        settings (PltSettings): Plotting settings.
+    """
+    settings = replace(settings, pgf_external_data=False)
+    with open(settings.get_tex_name(), "w") as f:
+        _write_facets(TexWriter(f), df, panels, settings)
+
+
+def _write_figure(
+    out: TexWriter, df: pd.DataFrame | ChipStore, regression_lines: dict[str, RegressionLine],
+    settings: PltSettings
+) -> None:
+    _write_header(out, settings)
+    _begin_figure(out, settings)
+
+    out.line(r"\begin{axis}[")
+    out.indent += 1
+
+    add_properties(out, _axis_properties(df, settings))
+
+    out.indent -= 1
+    out.line(r"]")
+    out.indent += 1
+
+    _write_series(out, df, regression_lines, settings)
+
+    out.indent -= 1
+    out.line(r"\end{axis}")
+
+    _end_figure(out, settings)
+
+
+def _write_facets(out: TexWriter, df: pd.DataFrame, panels: list, settings: PltSettings) -> None:
+    n_cols = min(settings.facet_columns, len(panels))
+    n_rows = -(-len(panels) // n_cols)
+    _write_header(out, settings, ["groupplots"])
+    _begin_figure(out, settings)
+
+    out.line(r"\begin{groupplot}[")
+    out.indent += 1
+
+    group_style = [f"group size={n_cols} by {n_rows}", "horizontal sep=1.2cm", "vertical sep=1.8cm"]
+    group_style.append("ylabels at=edge left, yticklabels at=edge left")
+    if len(panels) % n_cols == 0:
+        # With an incomplete last row, every panel keeps its x-axis labels.
+        group_style.append("xlabels at=edge bottom, xticklabels at=edge bottom")
+    axis_properties = _axis_properties(df, settings)
+    axis_properties.update(
+        {
+            "group style": f"{{{', '.join(group_style)}}}",
+            "width": f"{(15.4 - 1.2 * (n_cols - 1)) / n_cols:.2f}cm",
+            "height": "5cm",
+            "legend style": r"{font=\tiny}",
+        }
+    )
+    add_properties(out, axis_properties)
 
-    indent -= 1
-    outfile.append((indent, r"\end{tikzpicture}"))
+    out.indent -= 1
+    out.line(r"]")
+    out.indent += 1
 
-    outfile.append((0, ""))
-    outfile.append((indent, rf"\caption{{{settings.title}}}"))
-    outfile.append((indent, rf"\label{{fig:{os.path.splitext(settings.output_name)[0]}}}"))
+    for panel in panels:
+        out.line(rf"\nextgroupplot[title={{{panel.name}}}]")
+        out.indent += 1
+        _write_series(out, panel.df, panel.regression_lines, settings)
+        out.indent -= 1
 
-    indent -= 1
-    outfile.append((indent, r"\end{figure}"))
+    out.indent -= 1
+    out.line(r"\end{groupplot}")
 
-    with open(f"{os.path.splitext(settings.output_name)[0]}.tex", "w") as f:
-        f.writelines([f"{i * 4 * ' '}{line}\n" for i, line in outfile])
+    _end_figure(out, settings)
@@ -4,45 +4,116 @@
 # This work is licensed under the terms described in the LICENSE file        #
 # found in the root directory of this source tree.                           #
 ##############################################################################
+from matplotlib.colors import LinearSegmentedColormap
+import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
+import numpy as np
 
-from .regression import *
-from .settings import *
+from .export import save_figure
+from .profiling import stage
+from .regression import RegressionLine
+from .settings import PltSettings
+import pandas as pd
 
 
-def plot(
-    df: pd.DataFrame, regression_lines: dict[str, RegressionLine], settings: PltSettings
+def _scatter_lod(
+    x: pd.Series, y: pd.Series, flagged: np.ndarray, y_label: str, marker: str, marker_color: str,
+    settings: PltSettings
 ) -> None:
-    """Create the pyplot figure including regression lines.
+    """Level-of-detail rendering of a dense series.
+    The series is either drawn as a rasterized scatter layer or binned in log-space (hexbin).
+    Flagged (labeled) points are drawn as vector markers on top.
+    """
+    if settings.lod_mode == "density":
+        plt.hexbin(
+            mdates.date2num(x),
+            y,
+            yscale="log",
+            gridsize=settings.lod_gridsize,
+            bins="log",
+            mincnt=1,
+            linewidths=0,
+            rasterized=True,
+            cmap=LinearSegmentedColormap.from_list(marker_color, ["white", marker_color]),
+            label=y_label,
+        )
+    else:
+        plt.scatter(
+            x,
+            y,
+            label=y_label,
+            marker=marker,
+            facecolors="none",
+            edgecolors=marker_color,
+            rasterized=True,
+        )
+    plt.scatter(
+        x[flagged],
+        y[flagged],
+        marker=marker,
+        facecolors="none",
+        edgecolors=marker_color,
+        zorder=3,
+    )
+
+
+def label_placement(l_pos: str, x, y: float, settings: PltSettings) -> dict:
+    """Returns the text position and alignment (plt.annotate arguments) of a point label.
 
     Args:
-        df (pd.DataFrame): The preprocessed DataFrame.
-        regression_lines (dict[str, RegressionLine]): Dictionary of regression lines keyed by column name.
+        l_pos (str): Label position: "t" (top), "b" (bottom), "l" (left) or "r" (right).
+        x: x-coordinate of the point.
+        y (float): y-coordinate of the point.
         settings (PltSettings): Plotting settings.
     """
-    plt.figure(figsize=(12, 8))
-    plt.rcParams["font.family"] = settings.font_family
+    if l_pos in ("l", "r"):
+        # Beside the point (automatic label placement).
+        return dict(
+            xytext=(3 if l_pos == "r" else -3, 0),
+            textcoords="offset points",
+            ha="left" if l_pos == "r" else "right",
+            va="center"
+        )
+    offset = settings.text_offsets if l_pos == "t" else -settings.text_offsets
+    return dict(
+        xytext=(x, y * (1 + offset)),
+        textcoords="data",
+        ha="center",
+        va="bottom" if l_pos == "t" else "top"
+    )
 
+
+def _draw_series(df: pd.DataFrame, settings: PltSettings) -> None:
+    """Draws the points and point labels of all series into the current axes."""
     for d_col, y_col, y_label, marker, marker_color in zip(
         settings.raw_data_col, settings.y_col, settings.y_label, settings.marker,
         settings.marker_color
     ):
         mask = df[y_col].notna() & df["date_num"].notna()
-        x = df.loc[mask, "date_pd"],
-        y = df.loc[mask, y_col]
-        plt.scatter(
-            x,
-            y,
-            label=y_label,
-            marker=marker,
-            facecolors="none",
-            edgecolors=marker_color,
-        )
+        if settings.lod_threshold is not None and mask.sum() > settings.lod_threshold:
+            label_pos_col = settings.get_label_pos_col(d_col)
+            flagged = df.loc[mask, label_pos_col].notna().to_numpy()
+            _scatter_lod(
+                df.loc[mask, "date_pd"], df.loc[mask, y_col], flagged, y_label, marker,
+                marker_color, settings
+            )
+        else:
+            x = df.loc[mask, "date_pd"],
+            y = df.loc[mask, y_col]
+            plt.scatter(
+                x,
+                y,
+                label=y_label,
+                marker=marker,
+                facecolors="none",
+                edgecolors=marker_color,
+            )
 
         def _plot_point_labels():
             """Plot optional point labels if available in the DataFrame."""
 
-            label_pos_col, label_text_col = settings.get_label_cols(d_col)
+            _, label_text_col = settings.get_label_cols(d_col)
+            label_pos_col = settings.get_label_pos_col(d_col)
             label_col = df.loc[mask, label_text_col]
 
             assert label_pos_col in df.columns, f"Column '{label_pos_col}' not found in DataFrame."
@@ -56,14 +127,9 @@ def plot(
                 if pd.isna(l_pos):
                     continue
 
-                yi_text = yi * (1 + settings.text_offsets
-                               ) if l_pos == "t" else yi * (1 - settings.text_offsets)
                 plt.annotate(
                     l_name, (xi, yi),
-                    xytext=(xi, yi_text),
-                    textcoords="data",
-                    ha="center",
-                    va="bottom" if l_pos == "t" else "top",
+                    **label_placement(l_pos, xi, yi, settings),
                     fontsize=settings.annotation_fontsize,
                     color=marker_color,
                     bbox=dict(
@@ -77,19 +143,72 @@ def plot(
 
         _plot_point_labels()
 
-    for (y_col, reg_line), marker_color in zip(regression_lines.items(), settings.marker_color):
-        A = reg_line.A
-        b = reg_line.b
-        y_model = A * 10**(b * (df["date_num"] - 2000))
-        label = fr"{int(reg_line.factor_20y):d}$\times$/20 years ({reg_line.factor_2y:.1f}$\times$/2 years)"
-        plt.plot(
-            df["date_pd"],
-            y_model,
-            linestyle="--",
-            linewidth=settings.regression_line_width,
-            color=marker_color,
-            label=label
-        )
+
+def _draw_regression_lines(
+    df: pd.DataFrame, regression_lines: dict[str, RegressionLine], settings: PltSettings
+) -> None:
+    """Draws the regression lines (and confidence bands) into the current axes."""
+    line_df = df
+    if settings.lod_threshold is not None and len(df) > settings.lod_threshold:
+        # The lines are straight in log-space, a few samples are sufficient.
+        line_df = df.iloc[np.unique(np.linspace(0, len(df) - 1, 200).astype(int))]
+
+    for y_col, marker_color in zip(settings.y_col, settings.marker_color):
+        if y_col not in regression_lines:
+            continue
+        reg_line = regression_lines[y_col]
+        pieces = reg_line.pieces()
+        for piece in pieces:
+            piece_df = line_df
+            if len(pieces) > 1:
+                # Restrict the segment to its domain.
+                years = line_df["date_num"]
+                lo = years.min() if piece.x_min is None else piece.x_min
+                hi = years.max() if piece.x_max is None else piece.x_max
+                piece_df = line_df[(years >= lo) & (years <= hi)]
+            A = piece.A
+            b = piece.b
+            y_model = A * 10**(b * (piece_df["date_num"] - 2000))
+            label = fr"{int(piece.factor_20y):d}$\times$/20 years ({piece.factor_2y:.1f}$\times$/2 years)"
+            if len(pieces) > 1:
+                label = f"{lo:.0f}–{hi:.0f}: {label}"
+            if piece.factor_2y_ci is not None:
+                ci_lo, ci_hi = piece.factor_2y_ci
+                label = label[:-1] + f", {piece.ci_level:.0%} CI {ci_lo:.1f}–{ci_hi:.1f})"
+                plt.fill_between(
+                    piece_df["date_pd"],
+                    *piece.band(piece_df["date_num"].to_numpy()),
+                    color=marker_color,
+                    alpha=0.15,
+                    linewidth=0,
+                )
+            plt.plot(
+                piece_df["date_pd"],
+                y_model,
+                linestyle="--",
+                linewidth=settings.regression_line_width,
+                color=marker_color,
+                label=label
+            )
+
+
+def plot(
+    df: pd.DataFrame, regression_lines: dict[str, RegressionLine], settings: PltSettings
+) -> None:
+    """Create the pyplot figure including regression lines.
+    The figure is laid out once and saved to all formats and resolutions of the settings
+    (see save_figure).
+
+    Args:
+        df (pd.DataFrame): The preprocessed DataFrame.
+        regression_lines (dict[str, RegressionLine]): Dictionary of regression lines keyed by column name.
+        settings (PltSettings): Plotting settings.
+    """
+    plt.figure(figsize=(12, 8))
+    plt.rcParams["font.family"] = settings.font_family
+
+    _draw_series(df, settings)
+    _draw_regression_lines(df, regression_lines, settings)
 
     plt.xlabel("Year", fontsize=settings.label_fontsize)
     plt.ylabel("Normalized Scaling", fontsize=settings.label_fontsize)
@@ -102,6 +221,59 @@ def plot(
         plt.ylim(*settings.ylim)
     plt.grid(True)
 
-    plt.tight_layout()
-    plt.savefig(settings.output_name)
+    with stage("layout"):
+        plt.tight_layout()
+    with stage("savefig"):
+        save_figure(plt.gcf(), settings)
     plt.close()
+
+
+def plot_facets(panels: list, settings: PltSettings) -> None:
+    """Create one pyplot figure with a panel per facet (small multiples).
+    All panels share the log-scaled y-axis and the x-axis, the figure is laid out and saved
+    once (see save_figure).
+
+    Args:
+        panels (list[Panel]): The panels of the figure (see facets.facet_panels).
+        settings (PltSettings): Plotting settings.
+    """
+    plt.rcParams["font.family"] = settings.font_family
+    n_cols = min(settings.facet_columns, len(panels))
+    n_rows = -(-len(panels) // n_cols)
+    fig, axes = plt.subplots(
+        n_rows,
+        n_cols,
+        figsize=(6 * n_cols, 4.5 * n_rows),
+        sharex=True,
+        sharey=True,
+        squeeze=False,
+    )
+    for ax, panel in zip(axes.flat, panels):
+        plt.sca(ax)
+        _draw_series(panel.df, settings)
+        _draw_regression_lines(panel.df, panel.regression_lines, settings)
+        ax.set_title(panel.name, fontsize=settings.label_fontsize)
+        ax.legend(fontsize=settings.annotation_fontsize, loc="upper left")
+        ax.grid(True)
+        ax.tick_params(axis="both", which="major", labelsize=settings.tick_fontsize)
+    for ax in axes.flat[len(panels):]:
+        ax.set_visible(False)
+    # The lowest panel of every column shows the x-axis (the last row may be incomplete).
+    for column in range(n_cols):
+        ax = axes[(len(panels) - 1 - column) // n_cols, column]
+        ax.xaxis.set_tick_params(labelbottom=True)
+        ax.set_xlabel("Year", fontsize=settings.label_fontsize)
+    for ax in axes[:, 0]:
+        ax.set_ylabel("Normalized Scaling", fontsize=settings.label_fontsize)
+    # The axes are shared: scale and limits apply to all panels.
+    axes[0, 0].set_yscale("log", base=10)
+    if settings.ylim is not None:
+        axes[0, 0].set_ylim(*settings.ylim)
+    if settings.title != None:
+        fig.suptitle(settings.title, fontsize=settings.title_fontsize)
+
+    with stage("layout"):
+        fig.tight_layout()
+    with stage("savefig"):
+        save_figure(fig, settings)
+    plt.close(fig)
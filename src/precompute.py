@@ -0,0 +1,219 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Callable, Hashable
+import pandas as pd
+
+from . import facets
+from .facets import Panel
+from .metrics import DERIVED_METRICS
+from .preprocess import baseline_row, derive_column, normalize_column, preprocess_data
+from .schema import as_float64
+from .regression import RegressionLine, calculate_regression_line
+from .settings import PltSettings
+from .window import TimeIndex
+
+# Number of selected frames (and their columns and regression lines) kept per process.
+MAX_FRAMES = 16
+
+_frames: OrderedDict = OrderedDict()
+_derived: OrderedDict = OrderedDict()
+_columns: OrderedDict = OrderedDict()
+_lines: OrderedDict = OrderedDict()
+
+
+def _memo(cache: OrderedDict, key: Hashable, compute: Callable, maxsize: int):
+    """Returns cache[key], computes and inserts it if missing (least recently used eviction)."""
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+    value = cache[key] = compute()
+    if len(cache) > maxsize:
+        cache.popitem(last=False)
+    return value
+
+
+def _memo_table(
+    cache: OrderedDict, source: pd.DataFrame, key: Hashable, compute: Callable, maxsize: int
+):
+    """_memo for results of a chip table whose key contains id(source). The entry keeps a
+    reference to the table, so the id is not reused by another table while it is cached.
+    """
+    _, value = _memo(cache, key, lambda: (source, compute()), maxsize)
+    return value
+
+
+def clear() -> None:
+    """Drops all intermediate results."""
+    _frames.clear()
+    _derived.clear()
+    _columns.clear()
+    _lines.clear()
+
+
+def _no_columns(settings: PltSettings) -> PltSettings:
+    """Settings of the row selection only (no normalized columns)."""
+    return replace(
+        settings, raw_data_col=[], y_col=[], y_label=[], marker=[], marker_color=[], baseline=None
+    )
+
+
+def select_rows(source: pd.DataFrame, settings: PltSettings) -> tuple[Hashable, pd.DataFrame]:
+    """Returns the sorted rows of the figure (see filter_rows) and a key that identifies them.
+    Figures with the same row selection of the same table share the result.
+    """
+    key = (id(source), settings.get_row_filter())
+    df = _memo_table(
+        _frames, source, key,
+        lambda: preprocess_data(source.copy(deep=False), _no_columns(settings)), MAX_FRAMES
+    )
+    return key, df
+
+
+def sorted_table(source: pd.DataFrame, settings: PltSettings) -> tuple[Hashable, pd.DataFrame]:
+    """Returns all rows of the chip table sorted by date (the row selection without filters)."""
+    return select_rows(source, replace(settings, vendors=None, dtypes=None, date_range=None))
+
+
+def time_index(source: pd.DataFrame, settings: PltSettings, name: str) -> TimeIndex:
+    """Returns the time index (see window.py) of a column or derived metric over all rows of
+    the chip table. It is built once per table and column and shared by all date ranges.
+    """
+    key, table = sorted_table(source, settings)
+    return _memo_table(
+        _columns, source, (key, name, "index"),
+        lambda: TimeIndex(table["date_num"], as_float64(column(source, key, table, name))),
+        8 * MAX_FRAMES
+    )
+
+
+def baseline(source: pd.DataFrame, settings: PltSettings) -> int:
+    """Returns the row of the baseline chip in the sorted chip table (see sorted_table),
+    None without a baseline chip.
+    """
+    key, table = sorted_table(source, settings)
+    return _memo_table(
+        _columns, source, (key, "baseline", settings.baseline),
+        lambda: baseline_row(table, settings), 8 * MAX_FRAMES
+    )
+
+
+def table_column(source: pd.DataFrame, name: str) -> pd.Series:
+    """Returns a column of the chip table. Derived metrics (see metrics.py) are evaluated
+    once per table over all rows and shared by all metrics that depend on them.
+    """
+    if name not in DERIVED_METRICS:
+        return as_float64(source[name])
+    return _memo_table(
+        _derived, source, (id(source), name),
+        lambda: derive_column(source, name, lambda dep: table_column(source, dep)), 8 * MAX_FRAMES
+    )
+
+
+def column(source: pd.DataFrame, key: Hashable, selected: pd.DataFrame, name: str) -> pd.Series:
+    """Returns a column (or derived metric) of the selected rows (see select_rows)."""
+    if name in selected.columns:
+        return selected[name]
+    return _memo_table(
+        _columns, source, (key, name, "raw"),
+        lambda: table_column(source, name).loc[selected.index], 8 * MAX_FRAMES
+    )
+
+
+def preprocess(source: pd.DataFrame, settings: PltSettings) -> tuple[Hashable, pd.DataFrame]:
+    """Memoized preprocess_data: the row selection and every normalized column are computed
+    once per process and shared by all figures that use them. Derived metrics are added
+    as raw columns (and normalized like all other columns). The baseline of a column is
+    looked up in its time index; rows selected by a date range alone are a slice of it.
+
+    Args:
+        source (pd.DataFrame): The chip table.
+        settings (PltSettings): Plotting settings.
+
+    Returns:
+        tuple[Hashable, pd.DataFrame]: Key of the row selection (see regression_lines) and
+            a shallow copy of the selected rows with the normalized columns of the figure.
+    """
+    key, selected = select_rows(source, settings)
+    df = selected.copy(deep=False)
+    for c in dict.fromkeys([*settings.raw_data_col, *settings.y_col]):
+        if c in DERIVED_METRICS:
+            df[c] = column(source, key, selected, c)
+    vendors, dtypes, date_range = settings.get_row_filter()
+    row = baseline(source, settings)
+    for c in settings.raw_data_col:
+        index = time_index(source, settings, c)
+        if row is not None and not index.values[row] > 0:
+            raise ValueError(f"Baseline chip {settings.baseline} has no value in column {c}")
+        if vendors is None and dtypes is None:
+            rows = slice(None) if date_range is None else index.window(*date_range)
+            compute = lambda: index.normalize(rows, row)
+        else:
+            compute = lambda: normalize_column(df[c], None if row is None else index.values[row])
+        df[f"norm_{c}"] = _memo_table(
+            _columns, source, (key, c, settings.baseline), compute, 8 * MAX_FRAMES
+        )
+    return key, df
+
+
+def _regression_line(
+    source: pd.DataFrame, df: pd.DataFrame, y_col: str, settings: PltSettings
+) -> RegressionLine:
+    """Least-squares lines of a date range (without vendor and dtype filters) are read from
+    the prefix sums of the time index in O(1), all other lines are fitted on df.
+    """
+    vendors, dtypes, date_range = settings.get_row_filter()
+    normalized = {f"norm_{c}": c for c in settings.raw_data_col}
+    name = normalized.get(y_col, y_col)
+    if (
+        date_range is None or vendors is not None or dtypes is not None
+        or settings.regression_type != "ols" or settings.bootstrap_resamples > 0
+        or name not in DERIVED_METRICS and name not in source.columns
+    ):
+        return calculate_regression_line(df, y_col, settings)
+    index = time_index(source, settings, name)
+    rows = index.window(*date_range)
+    row = None
+    if y_col in normalized:
+        row = baseline(source, settings)
+        row = index.first(rows) if row is None else row
+    coefficients = index.fit(rows, row)
+    if coefficients is None:
+        # Too few points: the regression raises the usual error.
+        return calculate_regression_line(df, y_col, settings)
+    logA, b = coefficients
+    return RegressionLine(logA=float(logA), b=float(b))
+
+
+def regression_lines(source: pd.DataFrame, key: Hashable, df: pd.DataFrame,
+                     settings: PltSettings) -> dict[str, RegressionLine]:
+    """Memoized calulate_regression_lines: every line is fitted once per row selection,
+    column, baseline and regression settings.
+    """
+    return {
+        y_col:
+            _memo_table(
+                _lines, source, (key, y_col, settings.baseline, settings.get_fit_key()),
+                lambda: _regression_line(source, df, y_col, settings), 8 * MAX_FRAMES
+            )
+        for y_col in settings.y_col
+    }
+
+
+def facet_panels(source: pd.DataFrame, key: Hashable, df: pd.DataFrame,
+                 settings: PltSettings) -> list[Panel]:
+    """Memoized facets.facet_panels: the panels of a row selection are grouped and fitted
+    once per facet and regression settings.
+    """
+    facet_key = (
+        settings.facet_col, settings.facet_values, tuple(settings.y_col), settings.baseline
+    )
+    return _memo_table(
+        _lines, source, (key, facet_key, settings.get_fit_key()),
+        lambda: facets.facet_panels(df, settings), 8 * MAX_FRAMES
+    )
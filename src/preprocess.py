@@ -4,37 +4,143 @@
 # This work is licensed under the terms described in the LICENSE file        #
 # found in the root directory of this source tree.                           #
 ##############################################################################
+from .metrics import DERIVED_METRICS
+from .schema import as_float64
 from .settings import PltSettings
+from .store import ChipStore
+from .window import window_rows
+import numpy as np
 import pandas as pd
 
 
-def preprocess_data(df: pd.DataFrame, settings: PltSettings) -> pd.DataFrame:
+def filter_rows(df: pd.DataFrame | ChipStore, settings: PltSettings) -> pd.DataFrame | ChipStore:
+    """Selects the chips of the vendors, dtypes and date range in settings.
+    The table must be sorted by date_num: the date range is found by binary search and
+    selected as a slice (see window_rows). Returns the table itself if no filter is set.
+    """
+    vendors, dtypes, date_range = settings.get_row_filter()
+    store = isinstance(df, ChipStore)
+    if date_range is not None:
+        rows = window_rows(np.asarray(df["date_num"]), *date_range)
+        df = df.take(rows) if store else df.iloc[rows]
+    if vendors is None and dtypes is None:
+        return df
+    mask = np.ones(len(df), dtype=bool)
+    for column, wanted in (("vendor", vendors), ("dtype", dtypes)):
+        if wanted is not None:
+            mask &= df.isin(column, wanted) if store else df[column].isin(wanted).to_numpy()
+    return df.take(np.flatnonzero(mask)) if store else df[mask]
+
+
+def derive_column(df: pd.DataFrame | ChipStore, name: str, column=None) -> pd.Series | np.ndarray:
+    """Evaluates a column or derived metric (see metrics.py) over all rows of df.
+    column(name) returns the inputs (default: evaluated recursively), so callers can share them.
+    """
+    if name not in DERIVED_METRICS:
+        return as_float64(df[name])
+    column = column or (lambda dep: derive_column(df, dep))
+    return DERIVED_METRICS[name].evaluate(column)
+
+
+def normalize_column(
+    values: pd.Series | np.ndarray, baseline: float = None
+) -> pd.Series | np.ndarray:
+    """Normalizes a column to the baseline value (default: its first data point, NaN if the
+    column has none).
+    """
+    values = as_float64(values)
+    if baseline is None:
+        points = np.flatnonzero(np.asarray(values) > 0)
+        baseline = np.asarray(values)[points[0]] if len(points) else np.nan
+    return values / baseline
+
+
+def baseline_row(df: pd.DataFrame | ChipStore, settings: PltSettings) -> int:
+    """Returns the position of the baseline chip of settings in df (None = no baseline chip)."""
+    if settings.baseline is None:
+        return None
+    rows = np.flatnonzero(np.asarray(df["name"]) == settings.baseline)
+    if not len(rows):
+        raise ValueError(f"Unknown baseline chip: {settings.baseline}")
+    return int(rows[0])
+
+
+def baseline_values(df: pd.DataFrame | ChipStore, settings: PltSettings) -> dict[str, float]:
+    """Returns the values of the baseline chip in the raw_data_col columns (None entries
+    normalize to the first data point of the selected rows, see normalize_column).
+    df must contain the baseline chip, i.e. the table before filter_rows.
+    """
+    row = baseline_row(df, settings)
+    if row is None:
+        return {c: None for c in settings.raw_data_col}
+    chip = df.take([row]) if isinstance(df, ChipStore) else df.iloc[[row]]
+    values = {c: float(np.asarray(derive_column(chip, c))[0]) for c in settings.raw_data_col}
+    for c, value in values.items():
+        if not value > 0:
+            raise ValueError(f"Baseline chip {settings.baseline} has no value in column {c}")
+    return values
+
+
+def _preprocess_store(store: ChipStore, settings: PltSettings) -> ChipStore:
+    """preprocess_data on a ChipStore: the same steps on the arrays, without pandas."""
+    years = store["date_num"]
+    if np.any(years[1:] < years[:-1]):
+        store = store.take(np.argsort(years, kind="stable"))
+    baselines = baseline_values(store, settings)
+    store = filter_rows(store, settings)
+    derived = [
+        c for c in dict.fromkeys([*settings.raw_data_col, *settings.y_col])
+        if c in DERIVED_METRICS and c not in store.columns
+    ]
+    store = store.with_columns({c: derive_column(store, c) for c in derived})
+    normalized = {
+        f"norm_{c}": normalize_column(store[c], baselines[c])
+        for c in settings.raw_data_col
+    }
+    return store.with_columns(normalized)
+
+
+def preprocess_data(
+    df: pd.DataFrame | ChipStore, settings: PltSettings
+) -> pd.DataFrame | ChipStore:
     assert len(settings.raw_data_col) == len(settings.y_col) == len(settings.y_label
                                                                    ) == len(settings.marker)
     """Preprocesses the original dataframe.
-    Sorts columns by date.
-    Normalizes columns to their first data point.
+    Sorts columns by date (skipped if the frame is already sorted, e.g. a ChipDataset view).
+    Selects the rows of the figure (see filter_rows).
+    Adds the derived metrics among raw_data_col and y_col (see metrics.py).
+    Normalizes columns to the baseline chip of settings (default: the first selected chip
+    with a data point in the column).
+    A ChipStore is processed on its arrays and returned as a ChipStore.
 
     Returns:
-        df (pd.DataFrame): Preprocessed DataFrame.
+        df (pd.DataFrame | ChipStore): Preprocessed table.
     """
     def _sort_by_date(df: pd.DataFrame) -> pd.DataFrame:
         """Sorts the DataFrame by the 'date_num' column in ascending order."""
-        return df.sort_values(by="date_num", ascending=True)
+        return df.sort_values(by="date_num", ascending=True, kind="stable")
 
-    def _normalize_columns(df: pd.DataFrame, columns: list[str]) -> None:
-        """Normalizes specified columns to their first value.
+    def _normalize_columns(df: pd.DataFrame, baselines: dict[str, float]) -> None:
+        """Normalizes specified columns to their baseline values (see normalize_column).
         Adds new columns with 'norm_' prefix.
 
         Args:
             df (pd.DataFrame): Input DataFrame.
-            columns (list[str]): List of column names to normalize.
+            baselines (dict[str, float]): Baseline value of every column to normalize.
         """
-        for c in columns:
-            first_val = df[c].iloc[0]
-            df[f"norm_{c}"] = df[c] / first_val
+        for c, baseline in baselines.items():
+            df[f"norm_{c}"] = normalize_column(df[c], baseline)
 
-    df = _sort_by_date(df)
-    df["date_pd"] = pd.to_datetime(df["date_de"], format="%d.%m.%Y")
-    _normalize_columns(df, settings.raw_data_col)
+    if isinstance(df, ChipStore):
+        return _preprocess_store(df, settings)
+    if not df["date_num"].is_monotonic_increasing:
+        df = _sort_by_date(df)
+    if "date_pd" not in df.columns:
+        df["date_pd"] = pd.to_datetime(df["date_de"], format="%d.%m.%Y")
+    baselines = baseline_values(df, settings)
+    df = filter_rows(df, settings)
+    for c in dict.fromkeys([*settings.raw_data_col, *settings.y_col]):
+        if c in DERIVED_METRICS and c not in df.columns:
+            df[c] = derive_column(df, c)
+    _normalize_columns(df, baselines)
     return df
@@ -0,0 +1,133 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+
+
+@dataclass
+class StageRecord:
+    """Measurements of one pipeline stage of one figure.
+    Attributes:
+        config (str): Output name of the figure.
+        stage (str): Stage name, nested stages are joined with '/' (e.g. 'plot/savefig').
+        wall_s (float): Wall time in seconds.
+        cpu_s (float): CPU time of the process in seconds.
+        peak_bytes (int): Peak of the memory allocated during the stage (tracemalloc).
+    """
+    config: str
+    stage: str
+    wall_s: float
+    cpu_s: float
+    peak_bytes: int
+
+
+class Profiler:
+    """Records wall time, CPU time and peak memory of the stages of one figure.
+    Attributes:
+        config (str): Output name of the figure.
+        cprofile_stage (str): Stage that is additionally profiled with cProfile.
+            The statistics are written to '<output name>.<stage>.prof' (nested stages are
+            joined with '.', e.g. 'figure.plot.savefig.prof').
+        records (list[StageRecord]): Finished stages.
+    """
+    def __init__(self, config: str, cprofile_stage: str = None):
+        self.config = config
+        self.cprofile_stage = cprofile_stage
+        self.records = []
+        self._names = []
+        self._peaks = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if self._peaks:
+            # Resetting the peak for the nested stage must not lose the peak of the parent.
+            self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        start_mem = tracemalloc.get_traced_memory()[0]
+        self._names.append(name)
+        self._peaks.append(0)
+        full_name = "/".join(self._names)
+        # Keep the records in the order in which the stages were started.
+        index = len(self.records)
+
+        prof = cProfile.Profile() if full_name == self.cprofile_stage else None
+        wall, cpu = time.perf_counter(), time.process_time()
+        if prof is not None:
+            prof.enable()
+        try:
+            yield
+        finally:
+            if prof is not None:
+                prof.disable()
+                # The full stage path ('plot/savefig' -> 'plot.savefig'), so nested stages
+                # with the same name do not overwrite each other.
+                stage_name = full_name.replace("/", ".")
+                prof.dump_stats(f"{os.path.splitext(self.config)[0]}.{stage_name}.prof")
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+            self._names.pop()
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            record = StageRecord(self.config, full_name, wall, cpu, max(peak - start_mem, 0))
+            self.records.insert(index, record)
+
+
+# Profiler of the figure that is currently rendered in this process.
+_active: Profiler = None
+
+
+def start(config: str, cprofile_stage: str = None) -> None:
+    """Starts profiling the stages of a figure in this process."""
+    global _active
+    _active = Profiler(config, cprofile_stage)
+    tracemalloc.start()
+
+
+def stop() -> list[StageRecord]:
+    """Stops profiling and returns the recorded stages."""
+    global _active
+    records, _active = _active.records, None
+    tracemalloc.stop()
+    return records
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Marks a pipeline stage. Does nothing unless profiling was started."""
+    if _active is None:
+        yield
+    else:
+        with _active.stage(name):
+            yield
+
+
+def write_report(records: list[StageRecord], path: Path) -> None:
+    """Writes all records as JSON, grouped by figure."""
+    report = {}
+    for r in records:
+        report.setdefault(r.config, []).append(asdict(r))
+    with open(path, "w") as f:
+        json.dump({"configs": report}, f, indent=2)
+
+
+def print_summary(records: list[StageRecord]) -> None:
+    """Prints the wall time, CPU time and peak memory per stage summed over all figures."""
+    totals = {}
+    for r in records:
+        count, wall, cpu, peak = totals.get(r.stage, (0, 0.0, 0.0, 0))
+        totals[r.stage] = (count + 1, wall + r.wall_s, cpu + r.cpu_s, max(peak, r.peak_bytes))
+
+    print(f"{'stage':<20} {'figures':>8} {'wall (s)':>10} {'cpu (s)':>10} {'peak (MB)':>10}")
+    for name, (count, wall, cpu, peak) in totals.items():
+        print(f"{name:<20} {count:>8} {wall:>10.3f} {cpu:>10.3f} {peak / 2**20:>10.1f}")
@@ -4,11 +4,13 @@
 # This work is licensed under the terms described in the LICENSE file        #
 # found in the root directory of this source tree.                           #
 ##############################################################################
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import zlib
 import pandas as pd
 import numpy as np
 
-from .settings import *
+from .settings import PltSettings
+from .store import ChipStore
 
 
 @dataclass
@@ -21,6 +23,15 @@ class RegressionLine:
         logA (float): log10 of coefficient A.
         factor_20y (float): Growth factor over 20 years.
         factor_2y (float): Growth factor over 2 years.
+        boot_logA (np.ndarray): logA of bootstrap resamples (optional).
+        boot_b (np.ndarray): b of bootstrap resamples (optional).
+        ci_level (float): Level of the bootstrap confidence intervals.
+        b_ci, factor_20y_ci, factor_2y_ci (tuple[float, float]): Bootstrap confidence
+            intervals (percentile method), None without bootstrap resamples.
+        x_min, x_max (float): Domain of the line in years (None = unbounded). Used for the
+            segments of a piecewise fit.
+        segments (list[RegressionLine]): All segments of a piecewise fit (optional).
+            The line itself then describes the last (most recent) segment.
 
     Non log-space equation:
         y = A * 10^{b * (x - 2000)}
@@ -30,6 +41,12 @@ class RegressionLine:
     """
     logA: float
     b: float
+    boot_logA: np.ndarray = field(default=None, repr=False, compare=False)
+    boot_b: np.ndarray = field(default=None, repr=False, compare=False)
+    ci_level: float = 0.95
+    x_min: float = None
+    x_max: float = None
+    segments: list["RegressionLine"] = field(default=None, repr=False, compare=False)
 
     def __post_init__(self):
         if self.logA is None or self.b is None:
@@ -42,34 +59,433 @@ class RegressionLine:
         self.factor_20y = 10**(20 * self.b)
         self.factor_2y = 10**(2 * self.b)
 
+        # Confidence intervals
+        self.b_ci = self.factor_20y_ci = self.factor_2y_ci = None
+        if self.boot_b is not None:
+            lo, hi = np.nanquantile(self.boot_b, self._quantiles())
+            self.b_ci = (lo, hi)
+            self.factor_20y_ci = (10**(20 * lo), 10**(20 * hi))
+            self.factor_2y_ci = (10**(2 * lo), 10**(2 * hi))
+
+    def _quantiles(self) -> tuple[float, float]:
+        return (1 - self.ci_level) / 2, (1 + self.ci_level) / 2
+
+    def pieces(self) -> list["RegressionLine"]:
+        """Returns the segments of a piecewise fit or the line itself."""
+        return self.segments if self.segments else [self]
+
+    def band(self, x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Pointwise bootstrap confidence band of the line in linear space.
+
+        Args:
+            x (np.ndarray): x-values (year).
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Lower and upper bound for each x-value.
+        """
+        log_y = self.boot_logA[:, None] + self.boot_b[:, None] * (np.asarray(x)[None, :] - 2000)
+        lo, hi = np.nanquantile(log_y, self._quantiles(), axis=0)
+        return 10**lo, 10**hi
 
-def calulate_regression_lines(df: pd.DataFrame, settings: PltSettings) -> dict[str, RegressionLine]:
-    """Calculates regression lines for each y-column specified in settings.
+
+def bootstrap_fits(
+    x: np.ndarray,
+    y: np.ndarray,
+    n_resamples: int,
+    rng: np.random.Generator,
+    chunk_elements: int = 2**22
+) -> tuple[np.ndarray, np.ndarray]:
+    """Fits a line to each of n_resamples bootstrap resamples of the points (x, y).
+    All resamples are solved at once with the closed-form least-squares solution
+    on a matrix of resample indices (processed in chunks of about chunk_elements entries).
 
     Args:
-        df (pd.DataFrame): Input DataFrame containing the data.
-        settings (PltSettings): Plotting settings including columns to use.
+        x (np.ndarray): x-values.
+        y (np.ndarray): y-values.
+        n_resamples (int): Number of bootstrap resamples.
+        rng (np.random.Generator): Random number generator.
+        chunk_elements (int): Upper bound for the size of the index matrix per chunk.
 
     Returns:
-        dict[str, RegressionLine]: Regression lines for each y-column.
+        tuple[np.ndarray, np.ndarray]: Intercepts and slopes of all resamples
+        (NaN for degenerate resamples with a single distinct x-value).
+    """
+    n = len(x)
+    intercepts, slopes = [], []
+    chunk = max(chunk_elements // max(n, 1), 1)
+    for start in range(0, n_resamples, chunk):
+        idx = rng.integers(0, n, size=(min(chunk, n_resamples - start), n))
+        xs, ys = x[idx], y[idx]
+        sx, sy = xs.sum(axis=1), ys.sum(axis=1)
+        sxx, sxy = (xs * xs).sum(axis=1), (xs * ys).sum(axis=1)
+        denom = n * sxx - sx * sx
+        with np.errstate(divide="ignore", invalid="ignore"):
+            b = np.where(denom > 0, (n * sxy - sx * sy) / denom, np.nan)
+        slopes.append(b)
+        intercepts.append((sy - b * sx) / n)
+    return np.concatenate(intercepts), np.concatenate(slopes)
+
+
+def _ols(x: np.ndarray, y: np.ndarray, w: np.ndarray = None) -> tuple[float, float]:
+    """Closed-form (weighted) least-squares fit. Returns intercept and slope."""
+    w = np.ones_like(x) if w is None else w
+    sw, sx, sy = w.sum(), (w * x).sum(), (w * y).sum()
+    sxx, sxy = (w * x * x).sum(), (w * x * y).sum()
+    b = (sw * sxy - sx * sy) / (sw * sxx - sx * sx)
+    return (sy - b * sx) / sw, b
+
+
+def _count_inversions(v: np.ndarray) -> int:
+    """Counts the pairs i < j with v[j] < v[i] (bottom-up merge sort, O(n log n)).
+    Every level merges all pairs of neighboring sorted blocks at once: the blocks are
+    made globally comparable by prefixing the ranks with the index of the block pair.
+    """
+    n = len(v)
+    keys = np.unique(v, return_inverse=True)[1].astype(np.int64).ravel()
+    pos = np.arange(n)
+    count = 0
+    width = 1
+    while width < n:
+        block = pos // width
+        pair = block // 2
+        right = block % 2 == 1
+        k = pair * (n + 1) + keys
+        left_keys = k[~right]
+        # Number of elements of the left block that are greater than each right element.
+        left_end = np.searchsorted(left_keys, (pair[right] + 1) * (n + 1))
+        count += int((left_end - np.searchsorted(left_keys, k[right], side="right")).sum())
+        keys = np.sort(k, kind="stable") - (pos // (2 * width)) * (n + 1)
+        width *= 2
+    return count
+
+
+def theil_sen(
+    x: np.ndarray,
+    y: np.ndarray,
+    rtol: float = 1e-10,
+    exact_max_pairs: int = 2**21,
+    seed: int = 0
+) -> tuple[float, float]:
+    """Theil-Sen estimator (median of all pairwise slopes).
+    Small inputs enumerate the pairs. For large inputs the median slope is searched over the
+    slope value t without materializing the O(n^2) pairs: the number of pairwise slopes below t
+    equals the number of inversions of y - t * x in x-order, which is counted in O(n log n).
+    The search pivots are taken from a random sample of pairwise slopes and fall back to
+    bisection. Pairs with equal x are ignored.
+
+    Returns:
+        tuple[float, float]: Intercept (median of y - b * x) and slope b.
+    """
+    order = np.argsort(x, kind="stable")
+    x, y = x[order], y[order]
+    ux, group_start, group_size = np.unique(x, return_index=True, return_counts=True)
+    n = len(x)
+    n_pairs = n * (n - 1) // 2 - int((group_size * (group_size - 1) // 2).sum())
+    if n_pairs == 0:
+        raise ValueError("Theil-Sen needs at least two distinct x-values")
+
+    if n * (n - 1) // 2 <= exact_max_pairs:
+        i, j = np.triu_indices(n, k=1)
+        distinct = x[i] != x[j]
+        i, j = i[distinct], j[distinct]
+        b = float(np.median((y[j] - y[i]) / (x[j] - x[i])))
+        return float(np.median(y - b * x)), b
+
+    # The extreme pairwise slopes are found between neighboring x-values.
+    y_min, y_max = np.minimum.reduceat(y, group_start), np.maximum.reduceat(y, group_start)
+    dx = np.diff(ux)
+    lo = float(((y_min[1:] - y_max[:-1]) / dx).min())
+    hi = float(((y_max[1:] - y_min[:-1]) / dx).max())
+
+    rng = np.random.default_rng(seed)
+    i, j = rng.integers(0, n, size=(2, 16 * n))
+    distinct = x[i] != x[j]
+    i, j = i[distinct], j[distinct]
+    pivots = np.sort((y[j] - y[i]) / (x[j] - x[i]))
+
+    def _slopes_below(t: float) -> int:
+        v = y - t * x
+        # Within groups of equal x, ascending v never forms an inversion.
+        return _count_inversions(v[np.lexsort((v, x))])
+
+    def _kth_slope(k: int, lo: float, hi: float) -> float:
+        """k-th smallest pairwise slope (1-based), lo <= slope <= hi."""
+        below_lo, below_hi = 0, n_pairs
+        while hi - lo > rtol * max(abs(lo), abs(hi), 1.0):
+            inside = pivots[np.searchsorted(pivots, lo, "right"):np.searchsorted(pivots, hi)]
+            if len(inside):
+                # Interpolate the rank of the k-th slope within the sampled slopes.
+                fraction = (k - below_lo) / max(below_hi - below_lo, 1)
+                mid = float(inside[min(int(fraction * len(inside)), len(inside) - 1)])
+            else:
+                mid = (lo + hi) / 2
+                if mid in (lo, hi):
+                    break
+            below = _slopes_below(mid)
+            if below >= k:
+                hi, below_hi = mid, below
+            else:
+                lo, below_lo = mid, below
+        return (lo + hi) / 2
+
+    k = (n_pairs + 1) // 2
+    b = _kth_slope(k, lo, hi)
+    if n_pairs % 2 == 0:
+        b = (b + _kth_slope(k + 1, lo, hi)) / 2
+    return float(np.median(y - b * x)), b
+
+
+def huber(
+    x: np.ndarray,
+    y: np.ndarray,
+    delta: float = 1.345,
+    max_iter: int = 100,
+    tol: float = 1e-10
+) -> tuple[float, float]:
+    """Huber M-estimator computed with iteratively reweighted least squares.
+    Residuals larger than delta times the robust scale (MAD) are down-weighted.
+
+    Returns:
+        tuple[float, float]: Intercept and slope.
+    """
+    a, b = _ols(x, y)
+    for _ in range(max_iter):
+        r = y - (a + b * x)
+        scale = 1.4826 * np.median(np.abs(r - np.median(r)))
+        if scale == 0:
+            break
+        u = np.abs(r) / (delta * scale)
+        w = np.where(u <= 1, 1.0, 1.0 / np.maximum(u, 1e-300))
+        a_new, b_new = _ols(x, y, w)
+        converged = abs(a_new - a) + abs(b_new - b) < tol
+        a, b = a_new, b_new
+        if converged:
+            break
+    return a, b
+
+
+def segmented_fit(
+    x: np.ndarray,
+    y: np.ndarray,
+    n_segments: int,
+    min_points: int = 5,
+    max_candidates: int = 1000
+) -> list[tuple[float, float, int, int]]:
+    """Piecewise least-squares fit with n_segments contiguous segments along the sorted x.
+    The breakpoints minimize the total squared error. The error of every candidate segment
+    is computed in O(1) from prefix sums (one vectorized cost matrix) and the breakpoints are
+    found by dynamic programming over the candidates. Breakpoints are only placed between
+    distinct x-values (thinned out to max_candidates positions for large inputs).
+
+    Returns:
+        list[tuple[float, float, int, int]]: Intercept, slope, first and last index
+        (exclusive) of each segment in the sorted data.
     """
+    order = np.argsort(x, kind="stable")
+    x, y = x[order], y[order]
+    n = len(x)
+
+    # Candidate boundaries (0 and n included).
+    bounds = np.flatnonzero(np.diff(x) > 0) + 1
+    if len(bounds) > max_candidates:
+        bounds = bounds[np.linspace(0, len(bounds) - 1, max_candidates).astype(int)]
+    bounds = np.concatenate([[0], bounds, [n]])
+
+    def _prefix(v: np.ndarray) -> np.ndarray:
+        return np.concatenate([[0.0], np.cumsum(v)])[bounds]
+
+    s1, sx, sy = bounds.astype(float), _prefix(x), _prefix(y)
+    sxx, sxy, syy = _prefix(x * x), _prefix(x * y), _prefix(y * y)
+
+    # Squared error of the least-squares line through the points bounds[i]:bounds[j].
+    def _diff(p: np.ndarray) -> np.ndarray:
+        return p[None, :] - p[:, None]
+
+    cnt, dsx, dsy, dsxx, dsxy, dsyy = map(_diff, (s1, sx, sy, sxx, sxy, syy))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vxx = dsxx - dsx * dsx / cnt
+        vxy = dsxy - dsx * dsy / cnt
+        vyy = dsyy - dsy * dsy / cnt
+        cost = np.where((cnt >= max(min_points, 2)) & (vxx > 0), vyy - vxy * vxy / vxx, np.inf)
+
+    m = len(bounds)
+    best = cost[0]
+    choice = []
+    for _ in range(1, n_segments):
+        total = best[:, None] + cost
+        choice.append(np.argmin(total, axis=0))
+        best = total[choice[-1], np.arange(m)]
+    if not np.isfinite(best[-1]):
+        raise ValueError(
+            f"Cannot split {n} points into {n_segments} segments with at least "
+            f"{min_points} points each"
+        )
+
+    # Backtrack the breakpoints.
+    ends = [m - 1]
+    for c in reversed(choice):
+        ends.append(c[ends[-1]])
+    ends = [0] + ends[::-1]
+
+    segments = []
+    for i, j in zip(ends[:-1], ends[1:]):
+        lo, hi = bounds[i], bounds[j]
+        a, b = _ols(x[lo:hi], y[lo:hi])
+        segments.append((a, b, lo, hi))
+    return segments
+
+
+def fit_regression_line(x: np.ndarray, y: np.ndarray, settings: PltSettings) -> RegressionLine:
+    """Fits a line in log10 space with the estimator selected in settings.regression_type.
+
+    Args:
+        x (np.ndarray): Years minus 2000.
+        y (np.ndarray): log10 of the values.
+        settings (PltSettings): Plotting settings.
+
+    Returns:
+        RegressionLine: The fitted line (the last segment with all segments for piecewise fits).
+    """
+    if settings.regression_type == "theil_sen":
+        logA, b = theil_sen(x, y)
+    elif settings.regression_type == "huber":
+        logA, b = huber(x, y, settings.huber_delta)
+    elif settings.regression_type == "segmented":
+        fits = segmented_fit(x, y, settings.regression_segments, settings.min_segment_points)
+        x_sorted = np.sort(x) + 2000
+        segments = []
+        for k, (logA, b, lo, hi) in enumerate(fits):
+            # Neighboring segments meet halfway between their outermost points.
+            x_min = None if k == 0 else (x_sorted[lo - 1] + x_sorted[lo]) / 2
+            x_max = None if k == len(fits) - 1 else (x_sorted[hi - 1] + x_sorted[hi]) / 2
+            segments.append(RegressionLine(logA=logA, b=b, x_min=x_min, x_max=x_max))
+        last = segments[-1]
+        return RegressionLine(logA=last.logA, b=last.b, x_min=last.x_min, segments=segments)
+    else:
+        b, logA = np.polyfit(x, y, deg=1)
+    return RegressionLine(logA=logA, b=b)
+
+
+def _log_points(df: pd.DataFrame | ChipStore,
+                y_col: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns the years minus 2000, the log10 values of y_col and the mask of valid points."""
     # Shift date by 2000 for better numerical stability.
-    x_col = "date_num_minus2000"
-    df[x_col] = df["date_num"] - 2000
+    x = np.asarray(df["date_num"], dtype=float) - 2000
+    with np.errstate(divide="ignore", invalid="ignore"):
+        y = np.log10(np.asarray(df[y_col], dtype=float))
+    return x, y, ~np.isnan(x) & ~np.isnan(y)
+
 
-    regression_lines = {}
+def _fit_with_ci(x: np.ndarray, y: np.ndarray, y_col: str, settings: PltSettings) -> RegressionLine:
+    """Fits a line to valid log-space points and adds the bootstrap resamples (if enabled)."""
+    line = fit_regression_line(x, y, settings)
+    if settings.bootstrap_resamples > 0:
+        rng = np.random.default_rng([settings.bootstrap_seed, zlib.crc32(y_col.encode())])
+        boot_logA, boot_b = bootstrap_fits(x, y, settings.bootstrap_resamples, rng)
+        line = RegressionLine(
+            logA=line.logA,
+            b=line.b,
+            boot_logA=boot_logA,
+            boot_b=boot_b,
+            ci_level=settings.ci_level
+        )
+    return line
+
+
+def calculate_regression_line(
+    df: pd.DataFrame | ChipStore, y_col: str, settings: PltSettings
+) -> RegressionLine:
+    """Calculates the regression line of one y-column in log10 space.
+    The bootstrap resamples are drawn from a generator seeded with the bootstrap seed and
+    the column name, so the line does not depend on the other columns of the figure.
+
+    Args:
+        df (pd.DataFrame | ChipStore): Input table containing the data.
+        y_col (str): Column to fit.
+        settings (PltSettings): Plotting settings.
+
+    Returns:
+        RegressionLine: The regression line.
+    """
+    x, y, mask = _log_points(df, y_col)
+    # Linear regression in log10 space.
+    return _fit_with_ci(x[mask], y[mask], y_col, settings)
+
+
+def fit_groups(x: np.ndarray, y: np.ndarray, codes: np.ndarray,
+               n_groups: int) -> tuple[np.ndarray, np.ndarray]:
+    """Least-squares fits of all groups at once from per-group sums (one pass over the points).
+
+    Args:
+        x (np.ndarray): x-values.
+        y (np.ndarray): y-values.
+        codes (np.ndarray): Group of every point (0 <= code < n_groups).
+        n_groups (int): Number of groups.
 
-    # Calculate regression lines in log10 space.
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Intercepts and slopes of all groups
+        (NaN for groups with fewer than two distinct x-values).
+    """
+    n = np.bincount(codes, minlength=n_groups).astype(float)
+    sx, sy = np.bincount(codes, x, n_groups), np.bincount(codes, y, n_groups)
+    sxx, sxy = np.bincount(codes, x * x, n_groups), np.bincount(codes, x * y, n_groups)
+    denom = n * sxx - sx * sx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Relative threshold: a single distinct x-value leaves only rounding errors.
+        b = np.where(denom > 1e-12 * n * sxx, (n * sxy - sx * sy) / denom, np.nan)
+        return (sy - b * sx) / n, b
+
+
+def calculate_group_regression_lines(
+    df: pd.DataFrame, codes: np.ndarray, n_groups: int, settings: PltSettings
+) -> list[dict[str, RegressionLine]]:
+    """Calculates the regression lines of every y-column for every group of rows.
+    Least-squares lines of all groups are fitted together (see fit_groups), the other
+    estimators and bootstrap intervals per group. Groups without a line (fewer than two
+    distinct years) are missing in their dict.
+
+    Args:
+        df (pd.DataFrame): Input DataFrame containing the data.
+        codes (np.ndarray): Group of every row (-1 = no group).
+        n_groups (int): Number of groups.
+        settings (PltSettings): Plotting settings including columns to use.
+
+    Returns:
+        list[dict[str, RegressionLine]]: Regression lines for each group and y-column.
+    """
+    lines = [{} for _ in range(n_groups)]
     for y_col in settings.y_col:
-        # log10(y)
-        log10_col_name = f"{y_col}_log10"
-        df[log10_col_name] = np.log10(df[y_col])
-
-        # Linear regression in log10 space.
-        mask = df[x_col].notna() & df[log10_col_name].notna()
-        x = df.loc[mask, x_col].to_numpy(dtype=float)
-        y = df.loc[mask, log10_col_name].to_numpy(dtype=float)
-        b, logA = np.polyfit(x, y, deg=1)
-        regression_lines[y_col] = RegressionLine(logA=logA, b=b)
+        x, y, mask = _log_points(df, y_col)
+        mask &= codes >= 0
+        x, y, group = x[mask], y[mask], codes[mask]
+        if settings.regression_type == "ols" and settings.bootstrap_resamples == 0:
+            logA, b = fit_groups(x, y, group, n_groups)
+            for k in np.flatnonzero(~np.isnan(b)):
+                lines[k][y_col] = RegressionLine(logA=float(logA[k]), b=float(b[k]))
+            continue
+        order = np.argsort(group, kind="stable")
+        bounds = np.searchsorted(group[order], np.arange(n_groups + 1))
+        for k in range(n_groups):
+            rows = order[bounds[k]:bounds[k + 1]]
+            if len(np.unique(x[rows])) < 2:
+                continue
+            try:
+                lines[k][y_col] = _fit_with_ci(x[rows], y[rows], y_col, settings)
+            except ValueError:
+                # E.g. too few points for the segments of a piecewise fit.
+                continue
+    return lines
+
+
+def calulate_regression_lines(df: pd.DataFrame | ChipStore,
+                              settings: PltSettings) -> dict[str, RegressionLine]:
+    """Calculates regression lines for each y-column specified in settings.
+
+    Args:
+        df (pd.DataFrame | ChipStore): Input table containing the data.
+        settings (PltSettings): Plotting settings including columns to use.
 
-    return regression_lines
+    Returns:
+        dict[str, RegressionLine]: Regression lines for each y-column.
+    """
+    return {y_col: calculate_regression_line(df, y_col, settings) for y_col in settings.y_col}
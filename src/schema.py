@@ -0,0 +1,204 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class Column:
+    """Declared type of one CSV column.
+    Attributes:
+        name (str): Column name.
+        kind (str): "str" (free text), "category" (repeated values, e.g. labels and enums),
+            "float" (measured value) or "date" (text date, parsed into the column parse_to).
+        required (bool): Every row must have a value.
+        choices (tuple[str, ...]): Allowed values of a category column (None = any).
+        decimals (int): Decimals of a float column in the CSV. The column is stored as
+            float32 if all values can be restored exactly by rounding to these decimals
+            (see as_float64), otherwise as float64. None always stores float64.
+        date_format (str): Format of a date column.
+        parse_to (str): Name of the datetime column that is added for a date column.
+    """
+    name: str
+    kind: str
+    required: bool = False
+    choices: tuple[str, ...] = None
+    decimals: int = None
+    date_format: str = None
+    parse_to: str = None
+
+
+LABEL_POSITIONS = ("t", "b")
+
+CHIP_SCHEMA = (
+    Column("full_name", "str"),
+    Column("name", "str", required=True),
+    Column("date_de", "date", required=True, date_format="%d.%m.%Y", parse_to="date_pd"),
+    Column("date_num", "float", required=True),
+    Column("mem_type", "category"),
+    Column("mem_type_labels", "category", choices=LABEL_POSITIONS),
+    Column("mem_bw_GBs", "float", decimals=2),
+    Column("mem_bw_GBs_labels", "category", choices=LABEL_POSITIONS),
+    Column("fp32_peak_compute_Gflops", "float", decimals=2),
+    Column("fp32_peak_compute_Gflops_labels", "category", choices=LABEL_POSITIONS),
+    Column("ai_dtype_peak_compute_Gflops", "float", decimals=2),
+    Column("ai_dtype_peak_compute_Gflops_labels", "category", choices=LABEL_POSITIONS),
+    Column("dtype", "category"),
+    Column("wikipedia", "str"),
+    Column("techpowerup", "str"),
+    Column("vendor", "category"),
+)
+
+_columns = {c.name: c for c in CHIP_SCHEMA}
+
+# Number of reported errors per file.
+MAX_ERRORS = 20
+
+
+class SchemaError(ValueError):
+    """The CSV file does not match the schema. Lists the offending rows."""
+    def __init__(self, path: Path, errors: list[str]):
+        self.errors = errors
+        more = f"\n  ... ({len(errors) - MAX_ERRORS} more)" if len(errors) > MAX_ERRORS else ""
+        super().__init__(
+            f"{path} does not match the chip table schema:\n  " + "\n  ".join(errors[:MAX_ERRORS]) +
+            more
+        )
+
+
+def _dtypes(schema: tuple[Column, ...]) -> dict[str, str]:
+    return {
+        c.name: {
+            "str": "str",
+            "date": "str",
+            "category": "category",
+            "float": "float64"
+        }[c.kind]
+        for c in schema
+    }
+
+
+def _invalid_numbers(path: Path, schema: tuple[Column, ...], engine: str) -> list[str]:
+    """Re-reads the file as text and lists the values that are not numbers."""
+    raw = pd.read_csv(path, dtype=str, engine=engine, encoding="utf-8-sig", keep_default_na=True)
+    errors = []
+    for c in schema:
+        if c.kind != "float" or c.name not in raw.columns:
+            continue
+        text = raw[c.name]
+        bad = text.notna() & pd.to_numeric(text, errors="coerce").isna()
+        # Line 1 is the header.
+        errors += [
+            f"line {i + 2}: {c.name}: {value!r} is not a number" for i, value in text[bad].items()
+        ]
+    return errors
+
+
+def _validate(df: pd.DataFrame, schema: tuple[Column, ...]) -> list[str]:
+    errors = []
+
+    def _rows(mask: pd.Series, message: str) -> None:
+        errors.extend(
+            (i, c.name, message.format(value=value)) for i, value in df.loc[mask, c.name].items()
+        )
+
+    for c in schema:
+        values = df[c.name]
+        missing = values.isna()
+        if c.required:
+            _rows(missing, "missing value")
+        if c.choices is not None:
+            allowed = ", ".join(c.choices)
+            _rows(~missing & ~values.isin(c.choices), f"{{value!r}} is not one of {allowed}")
+        if c.kind == "date":
+            # Many chips share a date: parse every distinct string only once.
+            codes, uniques = pd.factorize(values)
+            parsed = pd.to_datetime(uniques, format=c.date_format, errors="coerce")
+            dates = pd.Series(parsed.take(codes, allow_fill=True), index=values.index)
+            _rows(~missing & dates.isna(), f"{{value!r}} does not match {c.date_format}")
+            df[c.parse_to] = dates
+    # Line 1 is the header.
+    return [f"line {i + 2}: {name}: {message}" for i, name, message in sorted(errors)]
+
+
+def compact(df: pd.DataFrame, schema: tuple[Column, ...] = CHIP_SCHEMA) -> None:
+    """Stores float columns as float32 where as_float64 restores the exact values."""
+    for c in schema:
+        if c.kind != "float" or c.decimals is None or df[c.name].dtype == np.float32:
+            continue
+        values = df[c.name].to_numpy()
+        narrow = values.astype(np.float32)
+        if np.array_equal(np.round(narrow.astype(np.float64), c.decimals), values, equal_nan=True):
+            df[c.name] = narrow
+
+
+def as_float64(values: pd.Series | np.ndarray, name: str = None) -> pd.Series | np.ndarray:
+    """Returns a float column with the exact float64 values of the CSV file.
+    Columns that were stored as float32 (see Column.decimals) are widened and rounded
+    to their declared decimals, all other columns are returned unchanged.
+    Arrays need the column name.
+    """
+    if values.dtype != np.float32:
+        return values
+    return values.astype(np.float64).round(_columns[name or values.name].decimals)
+
+
+def read_csv_chunks(
+    path: Path,
+    schema: tuple[Column, ...] = CHIP_SCHEMA,
+    engine: str = "c",
+    chunksize: int = None
+) -> Iterator[pd.DataFrame]:
+    """Reads a chip table with the declared column types in chunks of chunksize rows.
+    Text columns with few distinct values are categoricals and date columns are parsed.
+    Missing columns, values that are not numbers, missing required values, unknown label
+    positions and malformed dates raise a SchemaError that lists the offending lines.
+    The float columns are not compacted (see compact), so that all chunks have the same types.
+
+    Args:
+        path (Path): Path to the CSV file.
+        schema (tuple[Column, ...]): Declared columns. Additional columns are kept as text.
+        engine (str): pandas parser engine ("c" or "pyarrow", requires the pyarrow package).
+            The pyarrow engine always reads the whole file at once.
+        chunksize (int): Number of rows per chunk (None = whole file).
+
+    Yields:
+        pd.DataFrame: The chunks in file order. The index is the row number in the file.
+    """
+    header = pd.read_csv(path, nrows=0, encoding="utf-8-sig").columns
+    missing = [c.name for c in schema if c.name not in header]
+    if missing:
+        raise SchemaError(path, [f"header: missing column {name!r}" for name in missing])
+
+    if engine == "pyarrow":
+        chunksize = None
+    try:
+        reader = pd.read_csv(
+            path,
+            sep=",",
+            header=0,
+            decimal=".",
+            encoding="utf-8-sig",
+            engine=engine,
+            dtype=_dtypes(schema),
+            chunksize=chunksize
+        )
+        for df in ([reader] if chunksize is None else reader):
+            errors = _validate(df, schema)
+            if errors:
+                raise SchemaError(path, errors)
+            yield df
+    except SchemaError:
+        raise
+    except ValueError:
+        errors = _invalid_numbers(path, schema, engine)
+        if not errors:
+            raise
+        raise SchemaError(path, errors) from None
@@ -0,0 +1,301 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import fields, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, get_args, get_origin
+from urllib.parse import parse_qs, urlsplit
+import hashlib
+import os
+import tempfile
+import threading
+
+from .cache import file_digest, settings_digest
+from .metrics import DERIVED_METRICS
+from .settings import PltSettings
+
+CONTENT_TYPES = {"png": "image/png", "svg": "image/svg+xml", "tex": "text/x-tex; charset=utf-8"}
+
+# Markers and colors of derived series if the base figure has fewer.
+DEFAULT_STYLES = {
+    "marker": ["o", "D", "v"],
+    "marker_color": ["royalblue", "mediumseagreen", "mediumpurple"],
+}
+
+# Fields that are set by the service: the data file, the output file and its format.
+FIXED_FIELDS = {
+    "dc_chips_path", "output_name", "backends", "export_formats", "export_dpi", "pgf_external_data"
+}
+
+
+class RequestError(ValueError):
+    """The requested figure cannot be rendered (unknown columns or no data)."""
+
+
+def _parse_value(annotation, text: str):
+    """Converts a query parameter to the type of a PltSettings field.
+    Lists and tuples are comma-separated, 'none' selects the default None.
+    """
+    if text.lower() == "none":
+        return None
+    origin = get_origin(annotation)
+    if origin in (list, tuple):
+        args = [a for a in get_args(annotation) if a is not Ellipsis]
+        items = [item.strip() for item in text.split(",") if item.strip()]
+        values = [_parse_value(args[min(i, len(args) - 1)], item) for i, item in enumerate(items)]
+        return values if origin is list else tuple(values)
+    if annotation is bool:
+        if text.lower() not in ("1", "0", "true", "false", "yes", "no"):
+            raise ValueError(f"{text!r} is not a boolean")
+        return text.lower() in ("1", "true", "yes")
+    if annotation in (int, float):
+        return annotation(text)
+    return text
+
+
+def settings_from_query(configs: list[PltSettings],
+                        query: dict[str, list[str]]) -> tuple[PltSettings, str]:
+    """Builds the settings of a requested figure.
+    The parameter 'config' selects the base figure by the stem of its output name (default:
+    the first figure), 'format' the response format (png, svg or tex) and 'dpi' the resolution
+    of png figures. All other parameters override PltSettings fields. If only raw_data_col is
+    given, the normalized columns, labels, markers and colors are derived from it and the base.
+
+    Returns:
+        tuple[PltSettings, str]: The settings and the response format.
+
+    Raises:
+        ValueError: Unknown parameters, values that cannot be converted or invalid settings.
+    """
+    params = {name: values[-1] for name, values in query.items()}
+    names = {Path(cfg.output_name).stem: cfg for cfg in configs}
+    config = params.pop("config", next(iter(names)))
+    if config not in names:
+        raise ValueError(f"Unknown config {config!r}. Available: {', '.join(names)}")
+    base = names[config]
+    fmt = params.pop("format", "png")
+    if fmt not in CONTENT_TYPES:
+        raise ValueError(f"format must be one of {', '.join(CONTENT_TYPES)}. Got: {fmt!r}")
+    dpi = params.pop("dpi", None)
+
+    types = {f.name: f.type for f in fields(PltSettings) if f.name not in FIXED_FIELDS}
+    unknown = set(params) - set(types)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+    values = {name: _parse_value(types[name], text) for name, text in params.items()}
+
+    if "raw_data_col" in values:
+        columns = values["raw_data_col"]
+        values.setdefault("y_col", [f"norm_{c}" for c in columns])
+        values.setdefault(
+            "y_label", [DERIVED_METRICS[c].label if c in DERIVED_METRICS else c for c in columns]
+        )
+        for name, fallback in DEFAULT_STYLES.items():
+            styles = getattr(base, name) or fallback
+            values.setdefault(name, [styles[i % len(styles)] for i in range(len(columns))])
+
+    settings = replace(
+        base,
+        **values,
+        dc_chips_path=Path(base.dc_chips_path).resolve(),
+        output_name=os.path.basename(base.output_name),
+        backends=("tex", ) if fmt == "tex" else ("png", ),
+        export_formats=None if fmt == "tex" else (fmt, ),
+        export_dpi=None if dpi is None else (int(dpi), ),
+        pgf_external_data=False,
+    )
+    return settings, fmt
+
+
+def _warm(paths: list[Path], engines: list[str]) -> None:
+    """Initializer of the worker processes: loads the datasets and imports the renderers."""
+    from .dataset import load_dataset
+    # Imported once per worker instead of with the first request.
+    from . import pgfplot, plot, precompute
+    for path, engine in zip(paths, engines):
+        load_dataset(path, engine)
+
+
+def _render(run: Callable[[PltSettings], str], settings: PltSettings, fmt: str) -> bytes:
+    """Renders a figure in a temporary directory of the worker process and returns the file.
+    Requests for unknown columns or baseline chips or empty selections raise a RequestError.
+    The working directory is changed (one figure per worker process at a time), so that the
+    names inside the files (e.g. the LaTeX label) are the same as in a normal build.
+    """
+    from .dataset import load_dataset
+    from .metrics import base_columns
+    from . import precompute
+    source = load_dataset(settings.dc_chips_path, settings.csv_engine).df
+    missing = [c for c in settings.raw_data_col if not base_columns(c).issubset(source.columns)]
+    if settings.facet_col is not None and settings.facet_col not in source.columns:
+        missing.append(settings.facet_col)
+    if missing:
+        raise RequestError(f"Unknown columns: {', '.join(missing)}")
+    try:
+        precompute.baseline(source, settings)
+    except ValueError as e:
+        raise RequestError(str(e)) from None
+    key, df = precompute.select_rows(source, settings)
+    counts = (precompute.column(source, key, df, c).notna().sum() for c in settings.raw_data_col)
+    if min(counts, default=2) < 2:
+        raise RequestError("The selection contains fewer than two chips per series.")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            run(settings)
+            name = settings.get_tex_name() if fmt == "tex" else settings.get_figure_targets()[0][0]
+            return Path(name).read_bytes()
+        finally:
+            os.chdir(cwd)
+
+
+class FigureService:
+    """Renders figures in a bounded process pool and keeps the results in an LRU cache.
+    Every worker process keeps the chip tables loaded and has its own pyplot state, so
+    concurrent requests are rendered in parallel. Concurrent requests for the same figure
+    share one rendering.
+
+    Attributes:
+        configs (list[PltSettings]): Base figures (see settings_from_query).
+        run (Callable[[PltSettings], str]): Renders one figure (e.g. run_plot). Must be picklable.
+        max_entries (int): Number of cached results.
+    """
+    def __init__(
+        self,
+        configs: list[PltSettings],
+        run: Callable[[PltSettings], str],
+        jobs: int = 2,
+        max_entries: int = 128
+    ):
+        self.configs = configs
+        self.run = run
+        self.max_entries = max_entries
+        self._results: OrderedDict[str, bytes] = OrderedDict()
+        self._pending: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        tables = {(Path(cfg.dc_chips_path).resolve(), cfg.csv_engine) for cfg in configs}
+        self._pool = ProcessPoolExecutor(
+            max_workers=max(jobs, 1),
+            initializer=_warm,
+            initargs=([path for path, _ in tables], [engine for _, engine in tables])
+        )
+
+    def key(self, settings: PltSettings, fmt: str) -> str:
+        """Cache key of a figure: settings, response format and content of the data files."""
+        h = hashlib.sha256(settings_digest(settings).encode())
+        h.update(fmt.encode())
+        for path in settings.get_data_files():
+            h.update(file_digest(path).encode())
+        return h.hexdigest()
+
+    def get(self, settings: PltSettings, fmt: str) -> tuple[str, bytes, bool]:
+        """Returns the cache key, the rendered file and whether it was cached."""
+        key = self.key(settings, fmt)
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return key, self._results[key], True
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pending[key] = self._pool.submit(_render, self.run, settings, fmt)
+        try:
+            data = future.result()
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+        with self._lock:
+            self._results[key] = data
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        return key, data, False
+
+    def close(self) -> None:
+        self._pool.shutdown(cancel_futures=True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "FigureServer"
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str) -> None:
+        self._send(status, f"{message}\n".encode(), "text/plain; charset=utf-8")
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != "/figure":
+            self._error(404, "Not found. Use /figure?<PltSettings fields>&format=png|svg|tex")
+            return
+        service = self.server.service
+        try:
+            settings, fmt = settings_from_query(service.configs, parse_qs(url.query))
+        except (TypeError, ValueError) as e:
+            self._error(400, str(e))
+            return
+        try:
+            key, data, cached = service.get(settings, fmt)
+        except RequestError as e:
+            self._error(400, str(e))
+            return
+        except Exception as e:
+            self._error(500, f"Rendering failed: {type(e).__name__}: {e}")
+            return
+        headers = {"ETag": f'"{key}"', "X-Cache": "hit" if cached else "miss"}
+        if self.headers.get("If-None-Match") == f'"{key}"':
+            self._send(304, b"", CONTENT_TYPES[fmt], headers)
+            return
+        self._send(200, data, CONTENT_TYPES[fmt], headers)
+
+
+class FigureServer(ThreadingHTTPServer):
+    """HTTP server of a FigureService (one thread per connection)."""
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: FigureService):
+        super().__init__(address, _Handler)
+        self.service = service
+
+
+def serve(
+    configs: list[PltSettings],
+    run: Callable[[PltSettings], str],
+    port: int = 8000,
+    host: str = "127.0.0.1",
+    jobs: int = 2,
+    max_entries: int = 128
+) -> None:
+    """Serves figures on http://host:port/figure until interrupted with Ctrl+C.
+    Example: /figure?config=memory_wall_problem&vendors=NVIDIA&date_range=2015,2026&format=svg
+
+    Args:
+        configs (list[PltSettings]): Base figures (selected with the parameter 'config').
+        run (Callable[[PltSettings], str]): Renders one figure. Must be picklable.
+        port (int): TCP port.
+        host (str): Interface to listen on (only the local machine by default).
+        jobs (int): Number of worker processes.
+        max_entries (int): Number of cached results.
+    """
+    service = FigureService(configs, run, jobs, max_entries)
+    with FigureServer((host, port), service) as server:
+        print(f"Serving figures on http://{host}:{port}/figure (Ctrl+C to stop)", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Stopped.", flush=True)
+        finally:
+            service.close()
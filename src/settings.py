@@ -6,13 +6,41 @@
 ##############################################################################
 from dataclasses import dataclass
 from pathlib import Path
+import glob
+import os
+
+from .metrics import base_columns, label_source
+
+
+def find_data_files(path: Path) -> list[Path]:
+    """Resolves the location of the chip table into a list of CSV files.
+
+    Args:
+        path (Path): A CSV file, a directory (all '*.csv' files in it) or a glob pattern
+            (e.g. 'data/*_chips.csv', '**' matches subdirectories).
+
+    Returns:
+        list[Path]: The CSV files in sorted order.
+    """
+    path = Path(path)
+    if path.is_dir():
+        return sorted(path.glob("*.csv"))
+    if any(c in str(path) for c in "*?["):
+        return sorted(Path(f) for f in glob.glob(str(path), recursive=True))
+    return [path]
+
+
+# Formats of the matplotlib figure (see get_figure_targets).
+RASTER_FORMATS = ("png", "jpg", "jpeg", "tif", "tiff", "webp")
+VECTOR_FORMATS = ("pdf", "svg", "svgz", "eps", "ps")
 
 
 @dataclass
 class PltSettings:
     """Contains all information for one pyplot figure.
     Attributes:
-        dc_chips_path (Path): Path to the data file.
+        dc_chips_path (Path): Path to the data file. Can also be a directory or a glob pattern
+            to combine several CSV files (e.g. one per vendor or chip class).
         output_name (str): Name of the output plot file.
         raw_data_col (list[str]): Columns to normalize.
         y_col (list[str]): Columns to plot on y-axis.
@@ -30,6 +58,55 @@ class PltSettings:
         ylim (tuple[float, float]): Y-axis limits.
         title (str): Title of the plot.
         mem_bw_label_type (str): Type of label for memory bandwidth data ("name" or "mem_type").
+        label_placement (str): "manual" places the labels at the curated positions of the
+            '*_labels' columns, "auto" computes non-overlapping positions for all chips
+            (see src/labels.py).
+        pgf_external_data (bool): Write the data points and regression samples of the pgfplots
+            output to '.dat' files that are loaded with 'addplot table' instead of inline
+            coordinates and TeX-side sampling.
+        pgf_precision (int): Significant digits of the values and regression coefficients in
+            the pgfplots output and '.dat' files (years are written with three decimals).
+            The fixed precision makes the output independent of rounding noise in the last bits.
+        pgf_regression_samples (int): Number of precomputed samples per regression line.
+        pgf_externalize (bool): Name the tikzpicture for the TikZ 'external' library
+            (the library must be loaded and enabled in the preamble of the document).
+        lod_threshold (int): Series with more points are rendered in level-of-detail mode
+            (dense layers rasterized or binned, pgfplots output decimated). None disables it.
+        lod_mode (str): Rendering of dense series in the pyplot figure ("raster" or "density").
+        lod_gridsize (int): Number of hexagons in x-direction for lod_mode "density".
+        backends (tuple[str, ...]): Outputs to render: "png" (matplotlib) and/or "tex" (pgfplots).
+            matplotlib is only imported if "png" is selected.
+        export_formats (tuple[str, ...]): Formats of the matplotlib figure, e.g. ("png", "pdf", "svg").
+            The figure is built once and saved as '<output stem>.<format>' for every format.
+            None = only the format of output_name.
+        export_dpi (tuple[int, ...]): Resolutions of the raster formats. With several resolutions
+            the files are named '<output stem>_<dpi>dpi.<format>'. None = savefig default.
+        bootstrap_resamples (int): Number of bootstrap resamples for the confidence intervals
+            of the regression lines. 0 disables the confidence intervals.
+        bootstrap_seed (int): Seed of the bootstrap resampling.
+        ci_level (float): Level of the confidence intervals (e.g. 0.95).
+        regression_type (str): Estimator of the regression lines: "ols" (least squares),
+            "theil_sen" or "huber" (robust against outliers) or "segmented" (piecewise).
+        regression_segments (int): Number of segments for regression_type "segmented".
+        min_segment_points (int): Minimum number of points per segment.
+        huber_delta (float): Residuals above huber_delta times the robust scale are down-weighted.
+        csv_engine (str): pandas parser engine of the chip table: "c" or "pyarrow"
+            (faster for large files, requires the pyarrow package).
+        vendors (tuple[str, ...]): Only plot chips of these vendors (None = all).
+        dtypes (tuple[str, ...]): Only plot chips with these values in the 'dtype' column (None = all).
+        date_range (tuple[float, float]): Only plot chips released in this range of years
+            (inclusive, None = all). A None bound is open, e.g. (None, 2020) selects the chips
+            released up to 2020.
+        baseline (str): Name of the chip the columns are normalized to. The chip may lie outside
+            of the selected rows, so figures of different date ranges or vendors share the
+            baseline. None = the first selected chip with a value in the column.
+        facet_col (str): Column (e.g. 'vendor' or 'dtype') that splits the figure into one panel
+            per value with shared axes (small multiples, see src/facets.py). None = one panel.
+        facet_values (tuple[str, ...]): Values of facet_col that get a panel, in panel order
+            (None = all values, sorted).
+        facet_columns (int): Number of panels per row.
+        animation_fps (int): Frames per second of animations (see src/animate.py).
+        animation_step (float): Years per animation frame.
     """
     dc_chips_path: Path
     output_name: str
@@ -49,6 +126,34 @@ class PltSettings:
     ylim: tuple[float, float] = None
     title: str = None
     mem_bw_label_type: str = "name"
+    label_placement: str = "manual"
+    pgf_external_data: bool = False
+    pgf_precision: int = 6
+    pgf_regression_samples: int = 200
+    pgf_externalize: bool = False
+    lod_threshold: int = 5000
+    lod_mode: str = "raster"
+    lod_gridsize: int = 100
+    backends: tuple[str, ...] = ("png", "tex")
+    export_formats: tuple[str, ...] = None
+    export_dpi: tuple[int, ...] = None
+    bootstrap_resamples: int = 0
+    bootstrap_seed: int = 0
+    ci_level: float = 0.95
+    regression_type: str = "ols"
+    regression_segments: int = 2
+    min_segment_points: int = 5
+    huber_delta: float = 1.345
+    csv_engine: str = "c"
+    vendors: tuple[str, ...] = None
+    dtypes: tuple[str, ...] = None
+    date_range: tuple[float, float] = None
+    baseline: str = None
+    facet_col: str = None
+    facet_values: tuple[str, ...] = None
+    facet_columns: int = 2
+    animation_fps: int = 2
+    animation_step: float = 1.0
 
     # Verify that all lists have the same length.
     def __post_init__(self):
@@ -66,19 +171,164 @@ class PltSettings:
                 'mem_bw_label_type must be either "name" or "mem_type". '
                 f'Got: {self.mem_bw_label_type}'
             )
+        if self.label_placement not in ["manual", "auto"]:
+            raise ValueError(
+                f'label_placement must be either "manual" or "auto". Got: {self.label_placement}'
+            )
+        if self.pgf_precision < 1 or self.pgf_regression_samples < 2:
+            raise ValueError(
+                "pgf_precision must be >= 1 and pgf_regression_samples must be >= 2. "
+                f"Got: {self.pgf_precision}, {self.pgf_regression_samples}"
+            )
+        if not self.backends or not set(self.backends) <= {"png", "tex"}:
+            raise ValueError(f'backends must be a subset of ("png", "tex"). Got: {self.backends}')
+        if self.export_formats is not None and (
+            not self.export_formats
+            or not set(self.export_formats) <= set(RASTER_FORMATS + VECTOR_FORMATS)
+        ):
+            raise ValueError(
+                f"export_formats must be a subset of {RASTER_FORMATS + VECTOR_FORMATS}. "
+                f"Got: {self.export_formats}"
+            )
+        if self.export_dpi is not None and (not self.export_dpi or min(self.export_dpi) <= 0):
+            raise ValueError(
+                f"export_dpi must contain positive resolutions. Got: {self.export_dpi}"
+            )
+        if not 0 < self.ci_level < 1:
+            raise ValueError(f"ci_level must be in (0, 1). Got: {self.ci_level}")
+        if self.regression_type not in ["ols", "theil_sen", "huber", "segmented"]:
+            raise ValueError(
+                'regression_type must be one of "ols", "theil_sen", "huber" or "segmented". '
+                f"Got: {self.regression_type}"
+            )
+        if self.regression_segments < 1 or self.min_segment_points < 2:
+            raise ValueError("regression_segments must be >= 1 and min_segment_points >= 2.")
+        if self.bootstrap_resamples > 0 and self.regression_type != "ols":
+            raise ValueError('Bootstrap confidence intervals require regression_type "ols".')
+        if self.csv_engine not in ["c", "pyarrow"]:
+            raise ValueError(f'csv_engine must be either "c" or "pyarrow". Got: {self.csv_engine}')
+        if self.lod_mode not in ["raster", "density"]:
+            raise ValueError(f'lod_mode must be either "raster" or "density". Got: {self.lod_mode}')
+        if self.facet_columns < 1:
+            raise ValueError(f"facet_columns must be >= 1. Got: {self.facet_columns}")
+        if self.facet_col is not None and self.label_placement == "auto":
+            raise ValueError("Automatic label placement is not available for faceted figures.")
 
     def get_label_cols(self, raw_data_col: str) -> tuple[str, str]:
         """Get the label column information based on raw_data_col and mem_bw_label_type.
 
         Args:
-            raw_data_col (str): The raw data column name.
+            raw_data_col (str): The raw data column name. Derived metrics use the labels of
+                the column in their labels_of attribute (see metrics.py).
 
         Returns:
             tuple[str, str]: A tuple containing
             * The name of the column that contains the label position
             * The name of the column that contains the label text
         """
+        raw_data_col = label_source(raw_data_col)
         if raw_data_col == "mem_bw_GBs" and self.mem_bw_label_type == "mem_type":
             return "mem_type_labels", "mem_type"
         else:
             return f"{raw_data_col}_labels", "name"
+
+    def get_label_pos_col(self, raw_data_col: str) -> str:
+        """Returns the column of the label positions that the outputs read: the curated
+        position column (see get_label_cols) or, with automatic label placement, the private
+        column of the computed positions (see labels.place_labels).
+        """
+        label_pos_col, _ = self.get_label_cols(raw_data_col)
+        return f"_auto_{label_pos_col}" if self.label_placement == "auto" else label_pos_col
+
+    def get_data_files(self) -> list[Path]:
+        """Returns the CSV files of the chip table (see find_data_files)."""
+        return find_data_files(self.dc_chips_path)
+
+    def get_row_filter(self) -> tuple:
+        """Returns the row selection of the figure (hashable, None entries select all rows)."""
+        return (
+            None if self.vendors is None else tuple(self.vendors),
+            None if self.dtypes is None else tuple(self.dtypes),
+            None if self.date_range is None else tuple(self.date_range),
+        )
+
+    def get_fit_key(self) -> tuple:
+        """Returns the settings that determine a regression line (hashable)."""
+        return (
+            self.regression_type, self.regression_segments, self.min_segment_points,
+            self.huber_delta, self.bootstrap_resamples, self.bootstrap_seed, self.ci_level
+        )
+
+    def get_input_columns(self) -> set[str]:
+        """Returns the names of all CSV columns the figure depends on."""
+        columns = {"date_num", "date_de"}
+        if self.vendors is not None:
+            columns.add("vendor")
+        if self.dtypes is not None:
+            columns.add("dtype")
+        if self.facet_col is not None:
+            columns.add(self.facet_col)
+        if self.baseline is not None:
+            columns.add("name")
+        for raw_data_col in self.raw_data_col:
+            columns.update(base_columns(raw_data_col))
+            columns.update(self.get_label_cols(raw_data_col))
+        return columns
+
+    def get_tex_name(self) -> str:
+        """Returns the name of the pgfplots output file."""
+        return f"{os.path.splitext(self.output_name)[0]}.tex"
+
+    def get_animation_name(self, fmt: str) -> str:
+        """Returns the name of the animation file ('<stem>.gif' or '<stem>.mp4') or, for "png",
+        of the directory of its frames ('<stem>_frames').
+        """
+        stem = os.path.splitext(self.output_name)[0]
+        return f"{stem}_frames" if fmt == "png" else f"{stem}.{fmt}"
+
+    def get_data_name(self, y_col: str, suffix: str = "") -> str:
+        """Returns the name of the pgfplots data file of a y-column."""
+        return f"{os.path.splitext(self.output_name)[0]}_{y_col}{suffix}.dat"
+
+    def get_figure_targets(self) -> list[tuple[str, str, int]]:
+        """Returns file name, format and resolution (None = default) of every file of the
+        matplotlib figure.
+        """
+        stem, ext = os.path.splitext(self.output_name)
+        if self.export_formats is None:
+            formats = (ext[1:].lower() or "png", )
+        else:
+            formats = self.export_formats
+        dpis = self.export_dpi or (None, )
+        targets = []
+        for fmt in formats:
+            if fmt not in RASTER_FORMATS:
+                targets.append((f"{stem}.{fmt}", fmt, None))
+                continue
+            for dpi in dpis:
+                suffix = f"_{dpi}dpi" if len(dpis) > 1 else ""
+                targets.append((f"{stem}{suffix}.{fmt}", fmt, dpi))
+        return targets
+
+    def get_output_files(self) -> list[str]:
+        """Returns the names of all files that are written for this figure."""
+        files = []
+        if "png" in self.backends:
+            files += [name for name, _, _ in self.get_figure_targets()]
+        if "tex" not in self.backends:
+            return files
+        files.append(self.get_tex_name())
+        # Faceted figures always contain their data inline (see pgfplot_facets).
+        if self.pgf_external_data and self.facet_col is None:
+            for y_col in self.y_col:
+                files.append(self.get_data_name(y_col))
+                if self.regression_type == "segmented" and self.regression_segments > 1:
+                    files += [
+                        self.get_data_name(y_col, f"_regression_{k}")
+                        for k in range(self.regression_segments)
+                    ]
+                else:
+                    files.append(self.get_data_name(y_col, "_regression"))
+                if self.bootstrap_resamples > 0:
+                    files.append(self.get_data_name(y_col, "_ci"))
+        return files
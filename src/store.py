@@ -0,0 +1,137 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from typing import Iterator
+import sys
+import numpy as np
+import pandas as pd
+
+from .schema import as_float64
+
+
+class ChipRecord:
+    """Read-only view of one chip of a ChipStore (attributes are the columns)."""
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: "ChipStore", row: int):
+        self._store = store
+        self._row = row
+
+    def __getattr__(self, name: str):
+        try:
+            return self._store.value(name, self._row)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __repr__(self) -> str:
+        return f"ChipRecord({self._store.value('name', self._row)!r})"
+
+
+class ChipStore:
+    """Columnar chip table made of NumPy arrays, used without pandas by the TeX-only path.
+    Numeric columns are kept in the compact types of the schema (float32 columns are widened
+    to their exact float64 values on access, see as_float64). Text and category columns are
+    stored as integer codes into arrays of distinct values, so repeated strings exist once.
+    Row selections with take() share the category arrays and slices share the data.
+
+    Attributes:
+        length (int): Number of rows.
+    """
+    __slots__ = ("_values", "_codes", "_categories", "length")
+
+    def __init__(
+        self, values: dict[str, np.ndarray], codes: dict[str, np.ndarray],
+        categories: dict[str, np.ndarray], length: int
+    ):
+        self._values = values
+        self._codes = codes
+        self._categories = categories
+        self.length = length
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, release: bool = False) -> "ChipStore":
+        """Converts a chip table (e.g. ChipDataset.df). Text columns are interned once.
+
+        Args:
+            df (pd.DataFrame): The chip table.
+            release (bool): Removes every column from df once it is converted (numeric columns
+                are copied instead of shared), so the memory of the frame is freed while the
+                store is built.
+        """
+        values, codes, categories = {}, {}, {}
+        length = len(df)
+        for name in list(df.columns):
+            column = df.pop(name) if release else df[name]
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                codes[name] = column.cat.codes.to_numpy()
+                uniques = column.cat.categories
+            elif column.dtype.kind in "biufcmM":
+                values[name] = column.to_numpy(copy=release)
+                continue
+            else:
+                column_codes, uniques = pd.factorize(column)
+                # Smallest signed type that holds all codes and -1.
+                codes[name] = column_codes.astype(np.min_scalar_type(-max(len(uniques), 1)))
+            # The last entry decodes the code -1 (missing).
+            categories[name] = np.append(np.asarray(uniques, dtype=object), None)
+        return cls(values, codes, categories, length)
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def columns(self) -> list[str]:
+        return [*self._values, *self._codes]
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """Returns a column: float64 values, other numbers or decoded objects (None = missing)."""
+        if name in self._codes:
+            return self._categories[name][self._codes[name]]
+        values = self._values[name]
+        return as_float64(values, name) if values.dtype == np.float32 else values
+
+    def value(self, name: str, row: int):
+        """Returns the value of one cell."""
+        if name in self._codes:
+            return self._categories[name][self._codes[name][row]]
+        values = self._values[name]
+        if values.dtype == np.float32:
+            return as_float64(values[row:row + 1], name)[0]
+        return values[row]
+
+    def isin(self, name: str, wanted) -> np.ndarray:
+        """Returns the rows whose value is in wanted (compared once per distinct value)."""
+        if name not in self._codes:
+            return np.isin(self[name], list(wanted))
+        categories = self._categories[name]
+        hits = np.flatnonzero(np.isin(categories[:-1], list(wanted)))
+        return np.isin(self._codes[name], hits)
+
+    def take(self, rows: slice | np.ndarray) -> "ChipStore":
+        """Returns the selected rows (a slice or row numbers). A slice shares the data."""
+        length = len(range(*rows.indices(self.length))) if isinstance(rows, slice) else len(rows)
+        values = {name: v[rows] for name, v in self._values.items()}
+        codes = {name: c[rows] for name, c in self._codes.items()}
+        return ChipStore(values, codes, self._categories, length)
+
+    def with_columns(self, columns: dict[str, np.ndarray]) -> "ChipStore":
+        """Returns a store with additional numeric columns (the other columns are shared)."""
+        return ChipStore({**self._values, **columns}, self._codes, self._categories, self.length)
+
+    def records(self) -> Iterator[ChipRecord]:
+        return (ChipRecord(self, row) for row in range(self.length))
+
+    def __iter__(self) -> Iterator[ChipRecord]:
+        return self.records()
+
+    @property
+    def nbytes(self) -> int:
+        """Memory of the arrays and the distinct strings."""
+        size = sum(v.nbytes for v in self._values.values())
+        size += sum(c.nbytes for c in self._codes.values())
+        for categories in self._categories.values():
+            size += categories.nbytes + sum(sys.getsizeof(c) for c in categories if c is not None)
+        return size
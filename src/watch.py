@@ -0,0 +1,120 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from pathlib import Path
+from typing import Callable
+import os
+import time
+import traceback
+
+from .build import build
+from .settings import PltSettings, find_data_files
+
+
+def _file_mtime(path: Path) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _mtime(path: Path) -> tuple:
+    """Modification times of a file or of all CSV files of a directory or glob pattern.
+    Adding or removing a file also changes the result.
+    """
+    return tuple((f, _file_mtime(f)) for f in find_data_files(path))
+
+
+def _changed_columns(old, new) -> set[str]:
+    """Returns the columns that differ between two versions of the (sorted) chip table.
+    If rows were added, removed or reordered, all columns are reported as changed.
+    """
+    if old is None or len(old) != len(new) or list(old.columns) != list(new.columns):
+        return set(new.columns) | (set(old.columns) if old is not None else set())
+    if not old["date_num"].equals(new["date_num"]) or not old["name"].equals(new["name"]):
+        return set(new.columns)
+    return {c for c in new.columns if not old[c].equals(new[c])}
+
+
+def watch(
+    load_configs: Callable[[], list[PltSettings]],
+    config_file: Path,
+    run: Callable[[PltSettings], str],
+    interval: float = 0.2
+) -> None:
+    """Keeps the interpreter alive and re-renders figures after their inputs changed.
+    The CSV files of all configs and the config file are polled for modifications.
+    After a CSV change only the figures that depend on a modified column
+    (see PltSettings.get_input_columns) are rebuilt, after a config change only the
+    figures whose settings changed. Runs until interrupted with Ctrl+C.
+
+    Args:
+        load_configs (Callable[[], list[PltSettings]]): (Re-)loads the figure settings.
+        config_file (Path): File that defines the figure settings.
+        run (Callable[[PltSettings], str]): Renders one figure.
+        interval (float): Polling interval in seconds.
+    """
+    configs = load_configs()
+
+    # The heavy modules are imported once and then stay warm.
+    from .dataset import load_dataset
+    from . import precompute
+    if any("png" in cfg.backends for cfg in configs):
+        from . import plot
+    build(configs, run)
+    tables = {
+        cfg.dc_chips_path: load_dataset(cfg.dc_chips_path, cfg.csv_engine).df
+        for cfg in configs
+    }
+    mtimes = {f: _mtime(f) for f in [config_file, *tables]}
+    print(f"Watching {', '.join(str(f) for f in mtimes)} (Ctrl+C to stop)", flush=True)
+
+    try:
+        while True:
+            time.sleep(interval)
+            current = {f: _mtime(f) for f in mtimes}
+            if current == mtimes:
+                continue
+            changed_files = [f for f in current if current[f] != mtimes[f]]
+            mtimes = current
+
+            start = time.perf_counter()
+            try:
+                rebuild = []
+                if config_file in changed_files:
+                    old_configs, configs = configs, load_configs()
+                    rebuild += [cfg for cfg in configs if cfg not in old_configs]
+                    for cfg in configs:
+                        if cfg.dc_chips_path not in mtimes:
+                            mtimes[cfg.dc_chips_path] = _mtime(cfg.dc_chips_path)
+                            changed_files.append(cfg.dc_chips_path)
+
+                for path in changed_files:
+                    if path == config_file:
+                        continue
+                    engine = next(cfg.csv_engine for cfg in configs if cfg.dc_chips_path == path)
+                    table = load_dataset(path, engine).df
+                    columns = _changed_columns(tables.get(path), table)
+                    tables[path] = table
+                    rebuild += [
+                        cfg for cfg in configs if cfg.dc_chips_path == path and columns &
+                        cfg.get_input_columns() and cfg not in rebuild
+                    ]
+            except Exception:
+                # E.g. a syntax error in the config file or a half-written CSV file.
+                traceback.print_exc()
+                continue
+
+            if rebuild:
+                build(rebuild, run)
+                print(
+                    f"Rebuilt {len(rebuild)} figure(s) in {time.perf_counter() - start:.2f}s",
+                    flush=True
+                )
+            else:
+                print("No figure is affected by the change", flush=True)
+    except KeyboardInterrupt:
+        pass
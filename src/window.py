@@ -0,0 +1,101 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+import numpy as np
+
+
+def window_rows(years: np.ndarray, start: float = None, end: float = None) -> slice:
+    """Returns the rows of a sorted year array in the window [start, end] (binary search).
+    None bounds are open. Missing years (NaN) are sorted last and never selected.
+    """
+    lo = 0 if start is None else int(np.searchsorted(years, start, side="left"))
+    if end is None:
+        # The missing years at the end are not part of an open window.
+        hi = int(np.searchsorted(years, np.inf, side="right"))
+    else:
+        hi = int(np.searchsorted(years, end, side="right"))
+    return slice(lo, max(lo, hi))
+
+
+class TimeIndex:
+    """Time-window queries on one series of a table sorted by date_num.
+    Windows are found by binary search and returned as slices, so the selected rows are
+    views of the table. The prefix sums of x, y, x^2 and xy of the valid points
+    (x = year - 2000, y = log10 of the value, like calulate_regression_lines) are
+    accumulated once, after that the least-squares line of any window and the baseline
+    of any normalization take O(1).
+
+    Attributes:
+        years (np.ndarray): Sorted years (date_num) of all rows.
+        values (np.ndarray): Values of the series (NaN or <= 0 = no data point).
+    """
+    def __init__(self, years: np.ndarray, values: np.ndarray):
+        self.years = np.asarray(years, dtype=float)
+        self.values = np.asarray(values, dtype=float)
+        x = self.years - 2000
+        with np.errstate(divide="ignore", invalid="ignore"):
+            y = np.log10(self.values)
+        valid = np.isfinite(x) & np.isfinite(y)
+        x, y = np.where(valid, x, 0.0), np.where(valid, y, 0.0)
+
+        def _prefix(v: np.ndarray) -> np.ndarray:
+            return np.concatenate([[0.0], np.cumsum(v)])
+
+        self.count = _prefix(valid)
+        self.sx, self.sy = _prefix(x), _prefix(y)
+        self.sxx, self.sxy = _prefix(x * x), _prefix(x * y)
+        # First valid row at or after every row (len(values) = none).
+        n = len(valid)
+        rows = np.where(valid, np.arange(n), n)
+        self._next = np.append(np.minimum.accumulate(rows[::-1])[::-1], n)
+
+    def __len__(self) -> int:
+        return len(self.years)
+
+    def window(self, start: float = None, end: float = None) -> slice:
+        """Returns the rows released in [start, end] (see window_rows)."""
+        return window_rows(self.years, start, end)
+
+    def as_of(self, year: float) -> slice:
+        """Returns the rows released up to and including year."""
+        return self.window(None, year)
+
+    def first(self, rows: slice = slice(None)) -> int:
+        """Returns the first row of the window with a data point (None if there is none)."""
+        lo, hi, _ = rows.indices(len(self))
+        row = int(self._next[lo])
+        return row if row < hi else None
+
+    def normalize(self, rows: slice = slice(None), baseline: int = None) -> np.ndarray:
+        """Returns the values of the window divided by the value of the baseline row
+        (default: the first row of the window with a data point, NaN if there is none).
+        The baseline may lie outside of the window.
+        """
+        baseline = self.first(rows) if baseline is None else baseline
+        scale = np.nan if baseline is None else self.values[baseline]
+        return self.values[rows] / scale
+
+    def fit(self, rows: slice = slice(None), baseline: int = None) -> tuple[float, float]:
+        """Returns intercept and slope (log10 space) of the least-squares line through the
+        data points of the window, normalized to the baseline row (None = not normalized).
+        None if the line is undefined (fewer than two distinct years).
+        """
+        lo, hi, _ = rows.indices(len(self))
+        k = self.count[hi] - self.count[lo]
+        if k < 2:
+            return None
+        sx, sy = self.sx[hi] - self.sx[lo], self.sy[hi] - self.sy[lo]
+        sxx, sxy = self.sxx[hi] - self.sxx[lo], self.sxy[hi] - self.sxy[lo]
+        denominator = k * sxx - sx * sx
+        # All points at the same date.
+        if denominator <= 1e-12 * k * sxx:
+            return None
+        b = (k * sxy - sx * sy) / denominator
+        logA = (sy - b * sx) / k
+        if baseline is not None:
+            # log10(y / y_baseline) only shifts the intercept.
+            logA -= np.log10(self.values[baseline])
+        return logA, b
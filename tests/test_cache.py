@@ -0,0 +1,78 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from dataclasses import replace
+import os
+
+from src import cache as build_cache
+from src.cache import BuildCache, renderer_version
+from src.settings import PltSettings
+
+
+def _settings(tmp_path) -> PltSettings:
+    csv = tmp_path / "chips.csv"
+    if not csv.exists():
+        csv.write_text("name\nA100\n")
+    return PltSettings(
+        dc_chips_path=csv,
+        output_name=str(tmp_path / "figure.png"),
+        raw_data_col=["mem_bw_GBs"],
+        marker=["o"],
+        y_col=["norm_mem_bw_GBs"],
+        y_label=["Memory Bandwidth (GB/s)"],
+        marker_color=["green"],
+        backends=("tex", ),
+    )
+
+
+def test_store_and_restore(tmp_path):
+    settings = _settings(tmp_path)
+    cache = BuildCache(cache_dir=tmp_path / "cache")
+    tex = tmp_path / "figure.tex"
+    key = cache.key(settings)
+    assert not cache.restore(key, settings)
+
+    tex.write_text("figure")
+    cache.store(key, settings)
+    tex.unlink()
+    assert cache.restore(key, settings)
+    assert tex.read_text() == "figure"
+    assert not BuildCache(cache_dir=tmp_path / "cache", force=True).restore(key, settings)
+
+
+def test_key_changes_with_data_and_settings(tmp_path):
+    settings = _settings(tmp_path)
+    cache = BuildCache(cache_dir=tmp_path / "cache")
+    key = cache.key(settings)
+    assert cache.key(replace(settings)) == key
+    assert cache.key(replace(settings, ylim=(1, 10))) != key
+    (tmp_path / "chips.csv").write_text("name\nH100\nB200\n")
+    assert cache.key(settings) != key
+
+
+def test_renderer_version_includes_main(tmp_path, monkeypatch):
+    main = tmp_path / "main.py"
+    main.write_text("print(1)\n")
+    monkeypatch.setattr(build_cache, "MAIN_FILE", main)
+    try:
+        renderer_version.cache_clear()
+        version = renderer_version()
+        main.write_text("print(2)\n")
+        renderer_version.cache_clear()
+        assert renderer_version() != version
+    finally:
+        renderer_version.cache_clear()
+
+
+def test_evict_least_recently_used(tmp_path):
+    settings = _settings(tmp_path)
+    cache = BuildCache(cache_dir=tmp_path / "cache", max_bytes=10)
+    tex = tmp_path / "figure.tex"
+    tex.write_text("x" * 8)
+    cache.store("old", settings)
+    os.utime(tmp_path / "cache" / "old", (0, 0))
+    cache.store("new", settings)
+    assert sorted(p.name for p in (tmp_path / "cache").iterdir()) == ["new"]
@@ -0,0 +1,145 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from pathlib import Path
+import importlib.util
+import os
+import pickle
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.dataset import ChipDataset, is_loaded, load_dataset, load_store, merge_sorted
+from src.schema import as_float64
+
+DATA = Path(__file__).resolve().parents[1] / "data" / "datacenter_chips.csv"
+
+
+def _run(rng: np.random.Generator, n: int, vendors: list[str], offset: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "date_num": np.sort(rng.integers(2000, 2010, n)).astype(float),
+            "value": rng.random(n),
+            "count": rng.integers(0, 100, n),
+            "vendor": pd.Categorical(rng.choice(vendors, n)),
+            "name": [f"chip {offset + i}" for i in range(n)],
+            "extra": np.zeros(n)
+        },
+        index=np.arange(offset, offset + n)
+    )
+
+
+def test_merge_sorted_matches_concat_and_stable_sort():
+    rng = np.random.default_rng(0)
+    runs = [
+        _run(rng, 50, ["a", "b"], 0),
+        _run(rng, 1, ["c"], 50),
+        _run(rng, 30, ["b", "d"], 51).drop(columns="extra")
+    ]
+    expected = pd.concat(runs).sort_values("date_num", kind="stable").drop(columns="extra")
+
+    merged = merge_sorted(iter(runs))
+    assert list(merged.columns) == list(expected.columns)
+    assert isinstance(merged["vendor"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(
+        merged.astype({"vendor": object}), expected.astype({"vendor": object})
+    )
+
+
+def test_merge_sorted_single_run_is_returned_unchanged():
+    run = _run(np.random.default_rng(1), 10, ["a"], 0)
+    assert merge_sorted([run]) is run
+
+
+def test_merge_sorted_two_runs_from_generator():
+    rng = np.random.default_rng(2)
+    runs = [_run(rng, 20, ["a"], 0), _run(rng, 20, ["b"], 20)]
+    merged = merge_sorted(r for r in runs)
+    expected = pd.concat(runs).sort_values("date_num", kind="stable")
+    np.testing.assert_array_equal(merged.index, expected.index)
+    np.testing.assert_array_equal(merged["value"], expected["value"])
+
+
+@pytest.fixture
+def csv(tmp_path) -> Path:
+    path = tmp_path / "chips.csv"
+    shutil.copyfile(DATA, path)
+    return path
+
+
+def _no_parse(monkeypatch):
+    def _parse(self):
+        raise AssertionError("parsed instead of loading the sidecar")
+
+    monkeypatch.setattr(ChipDataset, "_parse", _parse)
+
+
+def test_sidecar_is_reused(csv, monkeypatch):
+    df = ChipDataset(csv).df
+    assert ChipDataset(csv).sidecar_path.is_file()
+    _no_parse(monkeypatch)
+    pd.testing.assert_frame_equal(ChipDataset(csv).df, df)
+
+
+def test_sidecar_is_invalidated_by_a_modified_file(csv):
+    rows = len(ChipDataset(csv).df)
+    st = os.stat(csv)
+    lines = csv.read_text().splitlines(keepends=True)
+    csv.write_text("".join(lines[:-1]))
+    # Same mtime as before: the content hash still differs.
+    os.utime(csv, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert len(ChipDataset(csv).df) == rows - 1
+
+
+@pytest.mark.parametrize("field", ["version", "digest", "mtime_ns"])
+def test_sidecar_is_invalidated_by_its_fields(csv, field):
+    dataset = ChipDataset(csv)
+    with open(dataset.sidecar_path, "rb") as f:
+        sidecar = pickle.load(f)
+    sidecar[field] = "other"
+    sidecar["frame"] = sidecar["frame"].iloc[:1]
+    with open(dataset.sidecar_path, "wb") as f:
+        pickle.dump(sidecar, f)
+    assert len(ChipDataset(csv).df) == len(dataset.df)
+
+
+def test_corrupt_sidecar_is_ignored(csv):
+    rows = len(ChipDataset(csv).df)
+    ChipDataset(csv).sidecar_path.write_bytes(b"not a pickle")
+    assert len(ChipDataset(csv).df) == rows
+
+
+@pytest.mark.skipif(importlib.util.find_spec("pyarrow") is not None, reason="pyarrow installed")
+def test_missing_engine_is_reported_with_a_valid_sidecar(csv):
+    ChipDataset(csv)
+    with pytest.raises(ImportError, match="pyarrow"):
+        ChipDataset(csv, "pyarrow")
+    with pytest.raises(ImportError, match="pyarrow"):
+        load_dataset(csv, "pyarrow")
+
+
+def test_load_dataset_reloads_modified_files(csv):
+    dataset = load_dataset(csv)
+    assert load_dataset(csv) is dataset
+    st = os.stat(csv)
+    os.utime(csv, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+    assert load_dataset(csv) is not dataset
+
+
+def test_load_store_replaces_the_frame(csv):
+    df = ChipDataset(csv).df
+    load_dataset(csv)
+    assert is_loaded(csv)
+    store = load_store(csv)
+    assert not is_loaded(csv)
+    assert load_store(csv) is store
+    assert len(store) == len(df)
+    np.testing.assert_array_equal(store["mem_bw_GBs"], as_float64(df["mem_bw_GBs"]))
+    np.testing.assert_array_equal(store["name"], df["name"].to_numpy(dtype=object))
+    load_dataset(csv)
+    assert load_store(csv) is not store
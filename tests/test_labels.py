@@ -0,0 +1,118 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.labels import POSITIONS, _canvases, place_labels
+from src.settings import PltSettings
+
+DATA = Path(__file__).resolve().parents[1] / "data" / "datacenter_chips.csv"
+
+
+def _settings(**kwargs) -> PltSettings:
+    return PltSettings(
+        dc_chips_path=DATA,
+        output_name="figure.png",
+        raw_data_col=["fp32_peak_compute_Gflops", "mem_bw_GBs"],
+        marker=["o", "D"],
+        y_col=["norm_fp32_peak_compute_Gflops", "norm_mem_bw_GBs"],
+        y_label=["FP32 Peak Compute (GFLOPS)", "Memory Bandwidth (GB/s)"],
+        marker_color=["royalblue", "mediumseagreen"],
+        label_placement="auto",
+        **kwargs
+    )
+
+
+def _chips(seed: int, n: int) -> pd.DataFrame:
+    """Dense chip table: many labels compete for the space around the points."""
+    rng = np.random.default_rng(seed)
+    date_num = np.sort(rng.uniform(2005, 2025, n))
+    curated = rng.choice(np.array(["t", "b", None], dtype=object), n, p=[0.1, 0.1, 0.8])
+    return pd.DataFrame(
+        {
+            "date_num": date_num,
+            "name": [f"Chip {i}" for i in range(n)],
+            "norm_fp32_peak_compute_Gflops": 10**(0.15 * (date_num - 2005) + rng.normal(0, 0.3, n)),
+            "norm_mem_bw_GBs": 10**(0.08 * (date_num - 2005) + rng.normal(0, 0.3, n)),
+            "fp32_peak_compute_Gflops_labels": curated,
+            "mem_bw_GBs_labels": np.roll(curated, 1),
+        }
+    )
+
+
+def _placed_boxes(df: pd.DataFrame, settings: PltSettings):
+    """Frames of the placed labels and boxes of all markers in every output."""
+    points, labels = [], []
+    for d_col, y_col in zip(settings.raw_data_col, settings.y_col):
+        _, label_text_col = settings.get_label_cols(d_col)
+        mask = (df[y_col].notna() & df["date_num"].notna()).to_numpy()
+        x, v = df["date_num"].to_numpy()[mask], np.log10(df[y_col].to_numpy()[mask])
+        start = sum(len(p[0]) for p in points)
+        points.append((x, v))
+        positions = df[settings.get_label_pos_col(d_col)].to_numpy()[mask]
+        chars = np.array([len(str(t)) for t in df[label_text_col].to_numpy()[mask]])
+        for i in np.flatnonzero(pd.notna(positions)):
+            labels.append((x[i], v[i], chars[i], positions[i], start + i))
+    x = np.concatenate([p[0] for p in points])
+    v = np.concatenate([p[1] for p in points])
+    for canvas in _canvases(x, v, settings):
+        marks = canvas.marks(x, v)
+        boxes = np.array(
+            [
+                canvas.boxes(np.array([xi]), np.array([vi]), np.array([n]), pos)[0]
+                for xi, vi, n, pos, _ in labels
+            ]
+        ).reshape(-1, 4)
+        yield boxes, marks, [own for *_, own in labels]
+
+
+def _overlap(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (a[0] < b[:, 2]) & (b[:, 0] < a[2]) & (a[1] < b[:, 3]) & (b[:, 1] < a[3])
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_placed_labels_overlap_neither_labels_nor_markers(seed):
+    settings = _settings()
+    df = place_labels(_chips(seed, 400), settings)
+    placed = sum(df[settings.get_label_pos_col(c)].notna().sum() for c in settings.raw_data_col)
+    # Enough labels fit, so that the test checks actual placements.
+    assert placed > 10
+    for boxes, marks, owners in _placed_boxes(df, settings):
+        assert ((boxes[:, :2] >= 0) & (boxes[:, 2:] <= 1)).all()
+        for i, (box, own) in enumerate(zip(boxes, owners)):
+            others = np.delete(boxes, i, axis=0)
+            assert not _overlap(box, others).any()
+            assert not _overlap(box, np.delete(marks, own, axis=0)).any()
+
+
+def test_curated_positions_are_kept_where_they_fit():
+    settings = _settings()
+    # Few chips far apart: every label fits at its curated position.
+    chips = _chips(0, 6).assign(date_num=np.arange(2006, 2024, 3.0))
+    chips["fp32_peak_compute_Gflops_labels"] = ["t", "b", None, "t", "b", None]
+    df = place_labels(chips, settings)
+    placed = df[settings.get_label_pos_col("fp32_peak_compute_Gflops")].astype(object)
+    assert list(placed[[0, 1, 3, 4]]) == ["t", "b", "t", "b"]
+    assert placed.dropna().isin(POSITIONS).all()
+    # The curated column is not modified.
+    pd.testing.assert_series_equal(
+        df["fp32_peak_compute_Gflops_labels"], chips["fp32_peak_compute_Gflops_labels"]
+    )
+
+
+def test_placement_is_deterministic():
+    settings = _settings()
+    chips = _chips(1, 400)
+    first = place_labels(chips, settings)
+    for _ in range(3):
+        again = place_labels(chips.copy(), settings)
+        for d_col in settings.raw_data_col:
+            column = settings.get_label_pos_col(d_col)
+            pd.testing.assert_series_equal(again[column], first[column])
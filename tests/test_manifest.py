@@ -0,0 +1,78 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+import json
+
+import pytest
+
+from src.manifest import MANIFEST_NAME, build_manifest, compare, publish, read_manifest
+
+
+def _write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return path.name
+
+
+def test_compare_reports_new_changed_and_removed_artifacts():
+    previous = {"a.png": {"sha256": "1", "size": 1}, "b.tex": {"sha256": "2", "size": 2}}
+    manifest = {"a.png": {"sha256": "1", "size": 1}, "c.png": {"sha256": "3", "size": 3}}
+    assert compare(previous, manifest) == (["c.png"], ["b.tex"])
+    manifest["a.png"] = {"sha256": "4", "size": 1}
+    assert compare(previous, manifest) == (["a.png", "c.png"], ["b.tex"])
+    assert compare(manifest, manifest) == ([], [])
+
+
+def test_publish_copies_only_changed_artifacts(tmp_path, monkeypatch):
+    build, target = tmp_path / "build", tmp_path / "target"
+    build.mkdir()
+    monkeypatch.chdir(build)
+    names = [_write(build / "a.tex", "a"), _write(build / "b.tex", "b")]
+
+    manifest = build_manifest(names)
+    assert publish(manifest, target) == (["a.tex", "b.tex"], [])
+    assert (target / "b.tex").read_text() == "b"
+    assert read_manifest(target / MANIFEST_NAME) == manifest
+    assert publish(manifest, target) == ([], [])
+
+    # Changed, removed and artifacts deleted in the target.
+    _write(build / "a.tex", "A")
+    _write(build / "c.tex", "c")
+    (target / "a.tex").unlink()
+    manifest = build_manifest(["a.tex", "c.tex"])
+    assert publish(manifest, target) == (["a.tex", "c.tex"], ["b.tex"])
+    assert (target / "a.tex").read_text() == "A"
+    assert not (target / "b.tex").exists()
+
+
+@pytest.mark.parametrize(
+    "name", ["../outside.tex", "sub/../../outside.tex", "/tmp/a.tex", "..", "."]
+)
+def test_publish_rejects_names_outside_of_the_target(tmp_path, monkeypatch, name):
+    target = tmp_path / "target"
+    target.mkdir()
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "outside.tex").write_text("keep")
+    # A tampered manifest in the target must not delete files outside of it.
+    (target / MANIFEST_NAME).write_text(json.dumps({name: {"sha256": "1", "size": 1}}))
+    with pytest.raises(ValueError, match="inside of the target"):
+        publish({}, target)
+    with pytest.raises(ValueError, match="inside of the target"):
+        publish({name: {"sha256": "1", "size": 1}}, tmp_path / "other")
+    assert (tmp_path / "outside.tex").read_text() == "keep"
+    assert not (tmp_path / "other").exists()
+
+
+def test_publish_copies_artifacts_in_subdirectories(tmp_path, monkeypatch):
+    build, target = tmp_path / "build", tmp_path / "target"
+    (build / "matrix").mkdir(parents=True)
+    monkeypatch.chdir(build)
+    _write(build / "matrix" / "a.tex", "a")
+
+    manifest = build_manifest(["matrix/a.tex"])
+    assert publish(manifest, target) == (["matrix/a.tex"], [])
+    assert (target / "matrix" / "a.tex").read_text() == "a"
+    assert publish({}, target) == ([], ["matrix/a.tex"])
+    assert not (target / "matrix" / "a.tex").exists()
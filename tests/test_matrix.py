@@ -0,0 +1,98 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from dataclasses import replace
+from pathlib import Path
+
+from src.build import BuildResult
+from src.matrix import FigureMatrix, finish, schedule
+from src.settings import PltSettings
+
+DATA = Path(__file__).resolve().parents[1] / "data" / "datacenter_chips.csv"
+
+
+def _settings(**kwargs) -> PltSettings:
+    return PltSettings(
+        dc_chips_path=DATA,
+        output_name="figure.png",
+        raw_data_col=["mem_bw_GBs"],
+        marker=["o"],
+        y_col=["norm_mem_bw_GBs"],
+        y_label=["Memory Bandwidth (GB/s)"],
+        marker_color=["green"],
+        ylim=(5 * 10e-2, 5.0 * 10e3),
+        **kwargs
+    )
+
+
+def test_identical_figures_are_rendered_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    a = _settings(backends=("png", ))
+    b = replace(a, output_name="matrix/copy.png")
+    # The date range contains all chips, so the figure selects the same rows as a.
+    c = replace(a, output_name="all_years.png", date_range=(2000, 2100))
+    plan = schedule([a, b, c])
+    assert plan.render == [a]
+    assert plan.duplicates == [(b, a), (c, a)]
+    assert plan.empty == []
+
+    Path("figure.png").write_bytes(b"figure")
+    reports = finish(plan, [BuildResult("figure.png", 1.0)])
+    assert [(r.output_name, r.status)
+            for r in reports] == [("matrix/copy.png", "same"), ("all_years.png", "same")]
+    assert Path("matrix/copy.png").read_bytes() == b"figure"
+    assert Path("all_years.png").read_bytes() == b"figure"
+
+
+def test_figures_that_name_their_output_are_not_copied():
+    # The pgfplots code contains the output name (\label{fig:<name>}).
+    a = _settings(backends=("png", "tex"))
+    b = replace(a, output_name="other.png")
+    assert schedule([a, b]).render == [a, b]
+
+
+def test_different_figures_are_not_deduplicated():
+    a = _settings(backends=("png", ))
+    b = replace(a, output_name="other.png", marker_color=["red"])
+    c = replace(a, output_name="recent.png", date_range=(2015, 2026))
+    assert schedule([a, b, c]).render == [a, b, c]
+
+
+def test_figures_without_data_are_skipped(capsys):
+    a = _settings(backends=("png", ))
+    empty = replace(a, output_name="future.png", date_range=(2100, 2200))
+    plan = schedule([a, empty])
+    assert plan.render == [a]
+    assert plan.empty == [empty]
+    reports = finish(plan, [BuildResult("figure.png", 1.0)])
+    assert [(r.output_name, r.status) for r in reports] == [("future.png", "empty")]
+    assert "[empty]  future.png" in capsys.readouterr().out
+
+
+def test_copies_of_failed_figures_fail():
+    a = _settings(backends=("png", ))
+    plan = schedule([a, replace(a, output_name="copy.png")])
+    reports = finish(plan, [BuildResult("figure.png", 1.0, "Traceback", "failed")])
+    assert [(r.output_name, r.status, r.ok) for r in reports] == [("copy.png", "failed", False)]
+
+
+def test_empty_schedule():
+    plan = schedule([])
+    assert (plan.render, plan.duplicates, plan.empty) == ([], [], [])
+    assert finish(plan, []) == []
+
+
+def test_matrix_expands_named_axes():
+    matrix = FigureMatrix(
+        base=replace(_settings(), output_name="matrix/wall.png"),
+        metrics={"bw": {}},
+        vendors={
+            "all": None,
+            "nvidia": ("NVIDIA", )
+        },
+    )
+    assert [cfg.output_name
+            for cfg in matrix.expand()] == ["matrix/wall_all.png", "matrix/wall_nvidia.png"]
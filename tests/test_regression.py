@@ -0,0 +1,170 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from dataclasses import replace
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.regression import (
+    _count_inversions, _ols, bootstrap_fits, calculate_regression_line, huber, segmented_fit,
+    theil_sen
+)
+from src.settings import PltSettings
+
+
+def _points(seed: int, n: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    # Few distinct years, so that there are ties in x.
+    x = rng.integers(0, n // 2, n).astype(float)
+    return x, 0.3 * x + rng.standard_t(2, n)
+
+
+def _sse(x: np.ndarray, y: np.ndarray) -> float:
+    b, a = np.polyfit(x, y, 1)
+    return float(((y - a - b * x)**2).sum())
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_count_inversions(seed):
+    v = np.random.default_rng(seed).integers(0, 10, 40).astype(float)
+    expected = sum(v[j] < v[i] for i, j in itertools.combinations(range(len(v)), 2))
+    assert _count_inversions(v) == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("n", [7, 30, 31])
+def test_theil_sen_matches_brute_force(seed, n):
+    x, y = _points(seed, n)
+    slopes = [
+        (y[j] - y[i]) / (x[j] - x[i])
+        for i, j in itertools.combinations(range(n), 2) if x[i] != x[j]
+    ]
+    b = np.median(slopes)
+    a = np.median(y - b * x)
+    assert theil_sen(x, y) == pytest.approx((a, b))
+    # The search over the slope values instead of the enumeration of all pairs.
+    assert theil_sen(x, y, exact_max_pairs=0) == pytest.approx((a, b), rel=1e-8, abs=1e-8)
+
+
+def test_theil_sen_needs_two_distinct_x():
+    with pytest.raises(ValueError):
+        theil_sen(np.ones(5), np.arange(5.0))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_huber_is_a_fixed_point_of_the_reweighting(seed):
+    x, y = _points(seed, 40)
+    a, b = huber(x, y, delta=1.345)
+    r = y - (a + b * x)
+    scale = 1.4826 * np.median(np.abs(r - np.median(r)))
+    u = np.abs(r) / (1.345 * scale)
+    w = np.where(u <= 1, 1.0, 1.0 / u)
+    assert _ols(x, y, w) == pytest.approx((a, b), abs=1e-8)
+
+
+def test_huber_without_outliers_is_least_squares():
+    x, y = _points(0, 40)
+    b, a = np.polyfit(x, y, 1)
+    assert huber(x, y, delta=1e6) == pytest.approx((a, b))
+
+
+def test_huber_downweights_outliers():
+    x = np.arange(20.0)
+    y = 2 * x + 1
+    y[5] += 1000
+    assert huber(x, y) == pytest.approx((1, 2), abs=1e-6)
+
+
+@pytest.mark.parametrize("n_segments", [2, 3])
+@pytest.mark.parametrize("seed", range(3))
+def test_segmented_fit_matches_brute_force(seed, n_segments):
+    x, y = _points(seed, 24)
+    order = np.argsort(x, kind="stable")
+    xs, ys = x[order], y[order]
+    bounds = np.flatnonzero(np.diff(xs) > 0) + 1
+    best = np.inf
+    for cuts in itertools.combinations(bounds, n_segments - 1):
+        ends = [0, *cuts, len(xs)]
+        pieces = list(zip(ends[:-1], ends[1:]))
+        if any(hi - lo < 5 or xs[lo] == xs[hi - 1] for lo, hi in pieces):
+            continue
+        best = min(best, sum(_sse(xs[lo:hi], ys[lo:hi]) for lo, hi in pieces))
+
+    segments = segmented_fit(x, y, n_segments)
+    assert len(segments) == n_segments
+    assert segments[0][2] == 0 and segments[-1][3] == len(x)
+    total = 0.0
+    for a, b, lo, hi in segments:
+        assert (a, b) == pytest.approx(_ols(xs[lo:hi], ys[lo:hi]))
+        total += float(((ys[lo:hi] - a - b * xs[lo:hi])**2).sum())
+    assert total == pytest.approx(best)
+
+
+def test_segmented_fit_needs_enough_points():
+    x, y = _points(0, 8)
+    with pytest.raises(ValueError):
+        segmented_fit(x, y, 2)
+
+
+def _settings(tmp_path, **kwargs) -> PltSettings:
+    csv = tmp_path / "chips.csv"
+    csv.write_text("name\nA100\n")
+    return PltSettings(
+        dc_chips_path=csv,
+        output_name="figure.png",
+        raw_data_col=["mem_bw_GBs"],
+        marker=["o"],
+        y_col=["norm_mem_bw_GBs"],
+        y_label=["Memory Bandwidth (GB/s)"],
+        marker_color=["green"],
+        **kwargs
+    )
+
+
+def test_seeded_bootstrap_is_reproducible(tmp_path):
+    x, y = _points(0, 40)
+    df = pd.DataFrame({"date_num": x + 2000, "norm_mem_bw_GBs": 10**y})
+    settings = _settings(tmp_path, bootstrap_resamples=200, bootstrap_seed=7)
+    line = calculate_regression_line(df, "norm_mem_bw_GBs", settings)
+    again = calculate_regression_line(df, "norm_mem_bw_GBs", settings)
+    assert line.b_ci is not None
+    assert (again.b_ci, again.factor_20y_ci,
+            again.factor_2y_ci) == (line.b_ci, line.factor_20y_ci, line.factor_2y_ci)
+    np.testing.assert_array_equal(again.boot_b, line.boot_b)
+    other = calculate_regression_line(df, "norm_mem_bw_GBs", replace(settings, bootstrap_seed=8))
+    assert other.b_ci != line.b_ci
+
+
+@pytest.mark.parametrize("chunk_elements", [1, 100, 2**22])
+def test_bootstrap_fits_match_polyfit_of_the_resamples(chunk_elements):
+    x, y = _points(1, 25)
+    intercepts, slopes = bootstrap_fits(
+        x, y, 30, np.random.default_rng(3), chunk_elements=chunk_elements
+    )
+    # The same generator draws the same index matrices (one row per resample).
+    rng = np.random.default_rng(3)
+    chunk = max(chunk_elements // len(x), 1)
+    idx = np.concatenate(
+        [
+            rng.integers(0, len(x), size=(min(chunk, 30 - start), len(x)))
+            for start in range(0, 30, chunk)
+        ]
+    )
+    for k, rows in enumerate(idx):
+        if len(np.unique(x[rows])) < 2:
+            assert np.isnan(slopes[k])
+            continue
+        b, a = np.polyfit(x[rows], y[rows], 1)
+        assert (intercepts[k], slopes[k]) == pytest.approx((a, b), rel=1e-9, abs=1e-9)
+
+
+def test_bootstrap_requires_least_squares(tmp_path):
+    with pytest.raises(ValueError, match="require regression_type"):
+        _settings(tmp_path, bootstrap_resamples=10, regression_type="huber")
+    assert _settings(tmp_path, bootstrap_resamples=10).bootstrap_resamples == 10
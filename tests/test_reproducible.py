@@ -0,0 +1,53 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from pathlib import Path
+
+import matplotlib
+
+from main import run_plot
+from src import precompute
+from src.settings import PltSettings
+
+DATA = Path(__file__).resolve().parents[1] / "data" / "datacenter_chips.csv"
+
+
+def _settings() -> PltSettings:
+    return PltSettings(
+        dc_chips_path=DATA,
+        output_name="figure.png",
+        raw_data_col=["fp32_peak_compute_Gflops", "mem_bw_GBs"],
+        marker=["o", "D"],
+        y_col=["norm_fp32_peak_compute_Gflops", "norm_mem_bw_GBs"],
+        y_label=["FP32 Peak Compute (GFLOPS)", "Memory Bandwidth (GB/s)"],
+        marker_color=["royalblue", "mediumseagreen"],
+        title="Development of Peak Compute (only FP32) vs. Memory Bandwidth",
+        ylim=(5 * 10e-2, 5.0 * 10e3),
+        export_formats=("png", "pdf", "svg"),
+    )
+
+
+def _build(directory: Path, monkeypatch) -> dict[str, bytes]:
+    directory.mkdir()
+    monkeypatch.chdir(directory)
+    # Nothing is reused from the previous build.
+    precompute.clear()
+    settings = _settings()
+    assert run_plot(settings) == "ok"
+    return {name: Path(name).read_bytes() for name in settings.get_output_files()}
+
+
+def test_rebuild_is_byte_identical(tmp_path, monkeypatch):
+    first = _build(tmp_path / "first", monkeypatch)
+    second = _build(tmp_path / "second", monkeypatch)
+    assert sorted(first) == ["figure.pdf", "figure.png", "figure.svg", "figure.tex"]
+    for name in first:
+        assert first[name] == second[name], name
+    # No creation dates and no library versions (see export.METADATA).
+    for name in ["figure.pdf", "figure.svg", "figure.png"]:
+        assert b"CreationDate" not in first[name] and b"<dc:date>" not in first[name]
+        assert b"Matplotlib" not in first[name]
+        assert matplotlib.__version__.encode() not in first[name]
@@ -0,0 +1,87 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from pathlib import Path
+import csv
+
+import pytest
+
+from src.dataset import ChipDataset
+from src.schema import MAX_ERRORS, SchemaError, read_csv_chunks
+
+DATA = Path(__file__).resolve().parents[1] / "data" / "datacenter_chips.csv"
+
+
+def _write(path: Path, edits: dict[tuple[int, str], str] = None, drop: str = None) -> Path:
+    """Writes the chip table with modified cells ((data row, column) -> value) and optionally
+    without a column. Data row 0 is line 2 of the file.
+    """
+    with open(DATA, encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.DictReader(f))
+    for (row, column), value in (edits or {}).items():
+        rows[row][column] = value
+    columns = [c for c in rows[0] if c != drop]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def _errors(path: Path, chunksize: int = None) -> list[str]:
+    with pytest.raises(SchemaError) as info:
+        for _ in read_csv_chunks(path, chunksize=chunksize):
+            pass
+    return info.value.errors
+
+
+def test_valid_table_has_no_errors(tmp_path):
+    chunks = list(read_csv_chunks(_write(tmp_path / "chips.csv")))
+    assert len(chunks) == 1
+
+
+def test_missing_column_is_reported(tmp_path):
+    path = _write(tmp_path / "chips.csv", drop="mem_bw_GBs")
+    assert _errors(path) == ["header: missing column 'mem_bw_GBs'"]
+
+
+@pytest.mark.parametrize(
+    "column, value, message", [
+        ("mem_bw_GBs", "fast", "'fast' is not a number"),
+        ("name", "", "missing value"),
+        ("date_num", "", "missing value"),
+        ("mem_bw_GBs_labels", "x", "'x' is not one of t, b"),
+        ("date_de", "2020-01-31", "'2020-01-31' does not match %d.%m.%Y"),
+    ]
+)
+def test_invalid_values_report_line_and_column(tmp_path, column, value, message):
+    path = _write(tmp_path / "chips.csv", {(3, column): value})
+    assert _errors(path) == [f"line 5: {column}: {message}"]
+
+
+def test_all_offending_lines_are_reported_in_order(tmp_path):
+    edits = {(7, "mem_type_labels"): "top", (2, "name"): "", (7, "name"): ""}
+    errors = _errors(_write(tmp_path / "chips.csv", edits))
+    assert errors == [
+        "line 4: name: missing value",
+        "line 9: mem_type_labels: 'top' is not one of t, b",
+        "line 9: name: missing value",
+    ]
+
+
+def test_lines_of_later_chunks_are_file_lines(tmp_path):
+    path = _write(tmp_path / "chips.csv", {(12, "name"): ""})
+    assert _errors(path, chunksize=5) == ["line 14: name: missing value"]
+
+
+def test_message_names_the_file_and_is_truncated(tmp_path):
+    edits = {(row, "mem_bw_GBs_labels"): "x" for row in range(MAX_ERRORS + 3)}
+    path = _write(tmp_path / "chips.csv", edits)
+    with pytest.raises(SchemaError, match="chips.csv does not match") as info:
+        ChipDataset(path)
+    assert len(info.value.errors) == MAX_ERRORS + 3
+    assert str(info.value).endswith("... (3 more)")
+    assert "line 2: mem_bw_GBs_labels" in str(info.value)
@@ -0,0 +1,137 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+from email.message import Message
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+
+from src.serve import FigureService, _Handler, settings_from_query
+from src.settings import PltSettings
+
+DATA = Path(__file__).resolve().parents[1] / "data" / "datacenter_chips.csv"
+
+
+def _config(name: str) -> PltSettings:
+    return PltSettings(
+        dc_chips_path=DATA,
+        output_name=f"figures/{name}.png",
+        raw_data_col=["fp32_peak_compute_Gflops", "mem_bw_GBs"],
+        marker=["o", "D"],
+        y_col=["norm_fp32_peak_compute_Gflops", "norm_mem_bw_GBs"],
+        y_label=["FP32 Peak Compute (GFLOPS)", "Memory Bandwidth (GB/s)"],
+        marker_color=["royalblue", "mediumseagreen"],
+        ylim=(5 * 10e-2, 5.0 * 10e3),
+    )
+
+
+CONFIGS = [_config("fp32"), _config("ai")]
+
+
+def _query(text: str) -> dict[str, list[str]]:
+    return {k: [v] for k, v in (p.split("=", 1) for p in text.split("&"))}
+
+
+def test_query_overrides_the_base_figure():
+    settings, fmt = settings_from_query(
+        CONFIGS, _query("config=ai&raw_data_col=mem_bw_GBs&date_range=2015,2026&format=tex")
+    )
+    assert fmt == "tex"
+    assert settings.raw_data_col == ["mem_bw_GBs"]
+    # Derived from the columns and the styles of the base figure.
+    assert settings.y_col == ["norm_mem_bw_GBs"]
+    assert settings.marker == ["o"]
+    assert settings.date_range == (2015.0, 2026.0)
+    assert settings.backends == ("tex", )
+    assert settings.output_name == "ai.png"
+
+
+def test_query_defaults_to_the_first_figure_as_png():
+    settings, fmt = settings_from_query(CONFIGS, {})
+    assert fmt == "png"
+    assert settings.raw_data_col == CONFIGS[0].raw_data_col
+    assert settings.export_formats == ("png", )
+
+
+@pytest.mark.parametrize(
+    "query, message", [
+        ("config=other", "Unknown config"),
+        ("format=gif", "format must be one of"),
+        ("output_name=x.png", "Unknown parameters"),
+        ("colour=red", "Unknown parameters"),
+        ("label_fontsize=large", "invalid literal"),
+        ("pgf_externalize=maybe", "is not a boolean"),
+        ("regression_type=linear", "regression_type must be one of"),
+    ]
+)
+def test_invalid_queries_are_rejected(query, message):
+    with pytest.raises(ValueError, match=message):
+        settings_from_query(CONFIGS, _query(query))
+
+
+def _write_figure(settings: PltSettings) -> str:
+    """Stand-in for run_plot (runs in the worker process)."""
+    Path(settings.get_figure_targets()[0][0]).write_bytes(f"{settings.raw_data_col}".encode())
+    return "ok"
+
+
+class _Server:
+    def __init__(self, service):
+        self.service = service
+
+
+def _get(service, path: str) -> tuple[int, dict, bytes]:
+    """Calls the request handler directly (without a socket)."""
+    handler = _Handler.__new__(_Handler)
+    handler.server = _Server(service)
+    handler.path = path
+    handler.headers = Message()
+    handler.request_version = "HTTP/1.1"
+    handler.requestline = f"GET {path} HTTP/1.1"
+    handler.command = "GET"
+    handler.client_address = ("127.0.0.1", 0)
+    handler.wfile = BytesIO()
+    handler.log_message = lambda *args: None
+    handler.do_GET()
+    head, _, body = handler.wfile.getvalue().partition(b"\r\n\r\n")
+    lines = head.decode().split("\r\n")
+    headers = dict(line.split(": ", 1) for line in lines[1:])
+    return int(lines[0].split()[1]), headers, body
+
+
+@pytest.fixture
+def service():
+    service = FigureService(CONFIGS, _write_figure, jobs=1)
+    yield service
+    service.close()
+
+
+def test_handler_renders_and_caches_figures(service):
+    status, headers, body = _get(service, "/figure?raw_data_col=mem_bw_GBs")
+    assert (status, headers["X-Cache"]) == (200, "miss")
+    assert headers["Content-Type"] == "image/png"
+    assert body == b"['mem_bw_GBs']"
+    status, again, body = _get(service, "/figure?raw_data_col=mem_bw_GBs")
+    assert (status, again["X-Cache"], again["ETag"]) == (200, "hit", headers["ETag"])
+    assert body == b"['mem_bw_GBs']"
+
+
+@pytest.mark.parametrize(
+    "path", [
+        "/figure?format=gif",
+        "/figure?raw_data_col=unknown_column",
+        "/figure?date_range=2100,2200",
+    ]
+)
+def test_handler_rejects_bad_requests(service, path):
+    status, _, body = _get(service, path)
+    assert status == 400
+    assert body
+
+
+def test_handler_reports_unknown_paths(service):
+    assert _get(service, "/other")[0] == 404
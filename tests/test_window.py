@@ -0,0 +1,70 @@
+##############################################################################
+# Copyright (C) 2026 Rebecca Pelke                                           #
+# All Rights Reserved                                                        #
+# This work is licensed under the terms described in the LICENSE file        #
+# found in the root directory of this source tree.                           #
+##############################################################################
+import numpy as np
+import pytest
+
+from src.window import TimeIndex, window_rows
+
+
+def _series(seed: int, n: int = 60) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    years = np.sort(rng.uniform(2005, 2025, n).round(1))
+    values = 10**(0.15 * (years - 2000) + rng.normal(0, 0.2, n))
+    # Rows without a data point and rows without a date (sorted last).
+    values[rng.choice(n, 10, replace=False)] = np.nan
+    values[3] = 0.0
+    years[-2:] = np.nan
+    return years, values
+
+
+def _direct_fit(years, values, start, end, baseline=None):
+    selected = (years >= start) & (years <= end) & (values > 0)
+    x, y = years[selected] - 2000, np.log10(values[selected])
+    if baseline is not None:
+        y = y - np.log10(values[baseline])
+    b, logA = np.polyfit(x, y, 1)
+    return logA, b
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("window", [(2005, 2025), (2010, 2018.5), (2012.3, 2012.9), (None, 2015)])
+def test_fit_matches_a_direct_fit(seed, window):
+    years, values = _series(seed)
+    index = TimeIndex(years, values)
+    rows = index.window(*window)
+    start, end = window[0] or -np.inf, window[1]
+    if np.sum((years >= start) & (years <= end) & (values > 0)) < 2:
+        assert index.fit(rows) is None
+        return
+    assert index.fit(rows) == pytest.approx(_direct_fit(years, values, start, end))
+    row = index.first(rows)
+    assert index.fit(rows, row) == pytest.approx(_direct_fit(years, values, start, end, row))
+
+
+def test_window_rows_and_baselines():
+    years, values = _series(0)
+    index = TimeIndex(years, values)
+    rows = index.window(2010, 2020)
+    selected = np.flatnonzero((years >= 2010) & (years <= 2020))
+    assert (rows.start, rows.stop) == (selected[0], selected[-1] + 1)
+    # Open windows never select the rows without a date.
+    assert index.as_of(3000) == slice(0, len(years) - 2)
+    assert window_rows(years, 2030, 2040) == slice(len(years) - 2, len(years) - 2)
+
+    first = index.first(rows)
+    assert first == selected[values[selected] > 0][0]
+    np.testing.assert_allclose(index.normalize(rows), values[rows] / values[first])
+    # A fixed baseline chip before the window.
+    baseline = np.flatnonzero(values > 0)[0]
+    assert baseline < rows.start
+    np.testing.assert_allclose(index.normalize(rows, baseline), values[rows] / values[baseline])
+
+
+def test_fit_of_points_at_one_date_is_undefined():
+    index = TimeIndex(np.array([2010.0, 2010.0, 2010.0]), np.array([1.0, 2.0, 3.0]))
+    assert index.fit() is None
+    assert index.first(slice(3, 3)) is None